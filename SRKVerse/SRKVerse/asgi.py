@@ -2,6 +2,8 @@
 ASGI config for SRKVerse project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it are routed by ASYNC_ROOT_URLCONF, which maps the
+catalog read endpoints to async views (see api.middleware).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
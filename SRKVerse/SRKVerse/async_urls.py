@@ -0,0 +1,40 @@
+"""
+URL configuration used when SRKVerse is served over ASGI.
+
+The catalog read endpoints are routed to their async views (api.async_views);
+everything else falls through to the sync routes in urls.py. Names match,
+so reverse() gives the same paths under either entry point.
+"""
+from django.urls import path
+from api import async_views
+from . import urls
+
+urlpatterns = [
+    # Movies
+    path('movies/', async_views.get_all_movies, name='movie-list'),
+    path('movies/<int:year>/', async_views.get_movies_by_year_view, name='movies-by-year'),
+    path('movie/<str:title>/', async_views.get_movie_by_title_view, name='movie-by-title'),
+    path('movies/top-rated/', async_views.get_top_rated_view, name='top-rated'),
+    path('movies/genres/<str:genre>/', async_views.get_by_genre_view, name='movies-by-genre'),
+
+    # Songs
+    path('songs/', async_views.get_all_songs, name='song-list'),
+    path('movies/<str:title>/songs/', async_views.get_movie_songs, name='movie-songs'),
+
+    # Quotes
+    path('quotes/', async_views.get_all_quotes, name='quote-list'),
+    path('quotes/movie/<str:title>/', async_views.get_quotes_by_movie_view, name='quotes-by-movie'),
+    path('quotes/tag/<str:tag>/', async_views.get_quotes_by_tag_view, name='quotes-by-tag'),
+
+    # Awards
+    path('awards/', async_views.get_all_awards, name='award-list'),
+    path('awards/<int:year>/', async_views.get_awards_by_year_view, name='awards-by-year'),
+    path('awards/type/<str:award_type>/', async_views.get_awards_by_type_view, name='awards-by-type'),
+
+    # Timeline
+    path('timeline/', async_views.get_timeline_view, name='timeline'),
+    path('events/<int:year>/', async_views.get_events_by_year_view, name='events-by-year'),
+
+    # Fan Interactions
+    path('polls/favorite-movie/stream/', async_views.leaderboard_stream_view, name='leaderboard-stream'),
+] + urls.urlpatterns
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -36,7 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.async_urlconf_middleware',
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.ratelimit_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,6 +50,7 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'srkverse.urls'
+ASYNC_ROOT_URLCONF = 'SRKVerse.async_urls'  # Used for requests served over ASGI (asgi.py)
 
 TEMPLATES = [
     {
@@ -112,6 +116,14 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cursor pagination for list endpoints (?cursor=...&page_size=...)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+# Catalog search (/search/?q=...): ranked hits kept per query, shortest query accepted
+SEARCH_MAX_RESULTS = 200
+SEARCH_MIN_QUERY_LENGTH = 2
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -130,6 +142,93 @@ CACHES = {
     }
 }
 
+# Rendered API responses are invalidated by model writes, so they can live long
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60 * 60 * 24 * 7))  # 7 days
+# Pages after the first: one entry per cursor position, so they expire sooner
+CURSOR_PAGE_CACHE_TIMEOUT = int(os.getenv('CURSOR_PAGE_CACHE_TIMEOUT', 60 * 60))  # 1 hour
+
+# Single-flight cache fills: lock lifetime, how long waiters poll for the
+# lock holder's result, and how long expired entries may be served stale
+CACHE_FILL_LOCK_TIMEOUT = 30
+CACHE_FILL_WAIT = 5
+CACHE_STALE_GRACE = 300
+
+# In-process cache tier in front of Redis, evicted across workers over pub/sub
+LOCAL_CACHE_MAX_ENTRIES = 1024
+LOCAL_CACHE_TIMEOUT = 30
+CACHE_INVALIDATION_CHANNEL = 'srkverse:cache-invalidation'
+
+# Seconds between write-behind flushes of pending fan votes (manage.py flush_votes)
+VOTE_FLUSH_INTERVAL = 1
+
+# Write-behind fan messages (manage.py flush_fan_messages --loop): queued in
+# Redis and stored with one INSERT per FAN_MESSAGE_BATCH_SIZE messages, at
+# least every FAN_MESSAGE_FLUSH_INTERVAL seconds
+FAN_MESSAGE_BATCH_SIZE = 500
+FAN_MESSAGE_FLUSH_INTERVAL = 1
+
+# Vote ranking (Redis sorted set): the most movies polls/favorite-movie/?top=N
+# returns, and the most neighbours either side .../<title>/rank/?around=K does
+VOTE_RANKING_MAX_TOP = 100
+VOTE_RANKING_MAX_AROUND = 10
+
+# Live leaderboard stream (polls/favorite-movie/stream/, ASGI only): votes are
+# announced on LEADERBOARD_CHANNEL, each worker recomputes at most once per
+# LEADERBOARD_FRAME_INTERVAL seconds and fans the delta out to its clients.
+# Idle streams get a keepalive comment every LEADERBOARD_HEARTBEAT seconds and
+# are closed after LEADERBOARD_STREAM_MAX_AGE (EventSource reconnects).
+LEADERBOARD_CHANNEL = 'srkverse:leaderboard'
+LEADERBOARD_FRAME_INTERVAL = 1
+LEADERBOARD_HEARTBEAT = 15
+LEADERBOARD_STREAM_MAX_AGE = 300
+
+# Rate limits (api.middleware.ratelimit_middleware): the first policy listing
+# a request's URL name and method applies, then '*' policies. Routes listed in
+# a policy share its counter, while a '*' policy keeps one counter per route (as
+# the old per-view decorators did); limits are per window seconds, per client tier
+# ('authenticated' means a valid JWT; None is unlimited). 'user_or_ip' counts
+# authenticated clients by user rather than address.
+RATELIMIT_ENABLE = True
+RATELIMIT_POLICIES = {
+    'uploads': {
+        'routes': ['upload-song', 'start-upload'], 'methods': ['POST'], 'key': 'user_or_ip',
+        'window': 60, 'limits': {'anonymous': 5, 'authenticated': 5},
+    },
+    'fan-writes': {
+        'routes': ['vote-favorite', 'validate-quiz', 'submit-message'], 'methods': ['POST'], 'key': 'user_or_ip',
+        'window': 60, 'limits': {'anonymous': 10, 'authenticated': 30},
+    },
+    'streams': {
+        'routes': ['stream-song', 'song-preview'], 'methods': ['GET', 'HEAD'], 'key': 'ip',
+        'window': 60, 'limits': {'anonymous': 300, 'authenticated': 300},
+    },
+    'leaderboard-stream': {
+        'routes': ['leaderboard-stream'], 'methods': ['GET', 'HEAD'], 'key': 'ip',
+        'window': 60, 'limits': {'anonymous': 30, 'authenticated': 30},
+    },
+    'reads': {
+        'routes': '*', 'methods': ['GET', 'HEAD'], 'key': 'ip',
+        'window': 60, 'limits': {'anonymous': 100, 'authenticated': 200},
+    },
+}
+# Each worker admits a client locally, without a Redis call, while it has used
+# under RATELIMIT_SHADOW_SHARE of the headroom Redis reported less than
+# RATELIMIT_SHADOW_TTL seconds ago; it tracks at most
+# RATELIMIT_SHADOW_MAX_ENTRIES clients
+RATELIMIT_SHADOW_SHARE = 0.1
+RATELIMIT_SHADOW_TTL = 1
+RATELIMIT_SHADOW_MAX_ENTRIES = 10000
+
+# Background jobs (manage.py run_jobs): a claimed job is leased for
+# JOB_VISIBILITY_TIMEOUT seconds, failures back off exponentially and a job
+# that fails JOB_MAX_ATTEMPTS times is dead-lettered
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_POLL_INTERVAL = 1
+JOB_VISIBILITY_TIMEOUT = 300
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 30
+JOB_RETRY_BACKOFF_MAX = 3600
+
 # Sentry
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -143,6 +242,31 @@ sentry_sdk.init(
 # Spotify
 SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID', '')
 SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET', '')
+# Shared token bucket for all workers: sustained requests/second and burst size
+SPOTIFY_RATE_LIMIT = float(os.getenv('SPOTIFY_RATE_LIMIT', 5))
+SPOTIFY_BURST = 10
+SPOTIFY_ACQUIRE_TIMEOUT = 10  # Longest a caller waits for a token before giving up
+SPOTIFY_ENRICH_CONCURRENCY = 8
+SPOTIFY_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# TMDb (point TMDB_API_URL at a local stand-in for testing)
+TMDB_API_KEY = os.getenv('TMDB_API_KEY', '')
+TMDB_API_URL = os.getenv('TMDB_API_URL', 'https://api.themoviedb.org/3')
+TMDB_PERSON_NAME = 'Shah Rukh Khan'
+TMDB_MAX_CONCURRENCY = int(os.getenv('TMDB_MAX_CONCURRENCY', 8))  # Parallel page requests
+TMDB_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# External providers: how long a lookup miss is remembered, and the per-provider
+# circuit breaker (failures within the window that open it, seconds it stays open)
+NEGATIVE_CACHE_TIMEOUT = 900
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_FAILURE_WINDOW = 60
+CIRCUIT_RESET_TIMEOUT = 30
+
+# Pooled outbound HTTP clients (api.clients): hosts kept per session, keep-alive
+# connections kept per host (size it to the largest concurrency above)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
 
 # AWS S3 (for production song storage)
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID', '')
@@ -150,6 +274,9 @@ AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY', '')
 AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME', '')
 AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_DEFAULT_ACL = None
+AWS_S3_FILE_OVERWRITE = False  # Never let two uploads with the same file name share an object
+AWS_S3_MAX_MEMORY_SIZE = 5242880  # Spool S3 reads to disk beyond 5MB instead of holding whole songs in memory
+AWS_QUERYSTRING_EXPIRE = 3600  # Lifetime of presigned URLs, e.g. song stream redirects
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
 # Logging
@@ -174,4 +301,28 @@ LOGGING = {
 
 # File Upload Limits
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
\ No newline at end of file
+FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+
+# Song streaming (api.streaming): how long a song's approval/audio lookup is cached,
+# and how long a presigned S3 URL is reused (keep it well under AWS_QUERYSTRING_EXPIRE
+# so a redirect never hands out a URL about to expire)
+AUDIO_STREAM_CACHE_TIMEOUT = 3600
+AUDIO_URL_CACHE_TIMEOUT = 3000
+
+# Media processing (api.media): waveform resolution, preview clip length and where
+# it starts (fraction of the song), render processes (None: one per CPU), songs per
+# queued job (the job lease is renewed after each song), and the ffmpeg used to
+# decode MP3 (WAV needs nothing extra)
+MEDIA_WAVEFORM_POINTS = 1000
+MEDIA_PREVIEW_SECONDS = 30
+MEDIA_PREVIEW_START = 0.3
+MEDIA_WORKERS = None
+MEDIA_JOB_BATCH_SIZE = 20
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+
+# Resumable chunked uploads (api.uploads): largest song accepted, bytes per chunk
+# (S3 multipart parts other than the last must be at least 5MB), and how long an
+# unfinished upload is kept before expire_uploads discards it
+CHUNKED_UPLOAD_MAX_SIZE = 200 * 1024 * 1024  # 200MB
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+CHUNKED_UPLOAD_EXPIRY = 86400
\ No newline at end of file
@@ -16,7 +16,7 @@ Including another URLconf
 """
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from . import views
+from api import views
 
 urlpatterns = [
     # JWT Authentication
@@ -34,6 +34,13 @@ urlpatterns = [
     path('songs/', views.get_all_songs, name='song-list'),
     path('movies/<str:title>/songs/', views.get_movie_songs, name='movie-songs'),
     path('songs/upload/', views.upload_song, name='upload-song'),
+    path('songs/<int:song_id>/stream/', views.stream_song_view, name='stream-song'),
+    path('songs/<int:song_id>/preview/', views.stream_song_view, {'field': 'preview_clip'}, name='song-preview'),
+    path('songs/<int:song_id>/waveform/', views.song_waveform_view, name='song-waveform'),
+    path('songs/uploads/', views.start_chunked_upload_view, name='start-upload'),
+    path('songs/uploads/<uuid:token>/', views.chunked_upload_view, name='chunked-upload'),
+    path('songs/uploads/<uuid:token>/chunks/<int:index>/', views.upload_chunk_view, name='upload-chunk'),
+    path('songs/uploads/<uuid:token>/complete/', views.complete_chunked_upload_view, name='complete-upload'),
 
     # Quotes
     path('quotes/', views.get_all_quotes, name='quote-list'),
@@ -54,9 +61,20 @@ urlpatterns = [
     # Fan Interactions
     path('polls/favorite-movie/', views.get_votes_view, name='get-votes'),
     path('polls/favorite-movie/vote/', views.vote_favorite_view, name='vote-favorite'),
+    path('polls/favorite-movie/<str:title>/rank/', views.movie_rank_view, name='movie-rank'),
     path('fan-messages/', views.submit_message_view, name='submit-message'),
+    path('fan-messages/feed/', views.get_fan_messages_view, name='fan-message-feed'),
 
     # Quiz
     path('quiz/', views.get_quiz_view, name='quiz'),
     path('quiz/validate/', views.validate_quiz_view, name='validate-quiz'),
+
+    # Search
+    path('search/', views.search_view, name='search'),
+
+    # Operations
+    path('jobs/<int:job_id>/', views.job_status_view, name='job-status'),
+    path('cache/stats/', views.cache_stats_view, name='cache-stats'),
+    path('clients/stats/', views.client_stats_view, name='client-stats'),
+    path('ratelimit/stats/', views.ratelimit_stats_view, name='ratelimit-stats'),
 ]
\ No newline at end of file
@@ -1,5 +1,9 @@
+from django import forms
 from django.contrib import admin
-from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage
+from django.utils import timezone
+from .audio import content_hash, probe_upload
+from .jobs import enqueue_media_processing
+from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage, Job
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
@@ -7,15 +11,45 @@ class MovieAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     list_filter = ('release_year', 'genres')
 
+class SongAdminForm(forms.ModelForm):
+    class Meta:
+        model = Song
+        fields = '__all__'
+
+    def clean_audio_file(self):
+        audio_file = self.cleaned_data.get('audio_file')
+        self.content_hash = None
+        if 'audio_file' in self.changed_data and audio_file:
+            # Checked here so a duplicate is a form error, not an IntegrityError on the unique column
+            self.content_hash = content_hash(audio_file)
+            if Song.objects.filter(content_hash=self.content_hash).exclude(pk=self.instance.pk).exists():
+                raise forms.ValidationError("This audio file has already been uploaded.")
+        return audio_file
+
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
+    form = SongAdminForm
     list_display = ('title', 'movie', 'is_approved', 'created_at')
     list_filter = ('is_approved', 'movie')
     search_fields = ('title',)
     actions = ['approve_songs']
 
+    def save_model(self, request, obj, form, change):
+        # Read duration/bitrate and the content hash from the uploaded file before the row is written
+        if 'audio_file' in form.changed_data and form.cleaned_data.get('audio_file'):
+            audio_info = probe_upload(form.cleaned_data['audio_file'])
+            obj.duration = audio_info['duration'] if audio_info['duration'] is not None else obj.duration
+            obj.bitrate = audio_info['bitrate']
+            obj.content_hash = form.content_hash
+        elif 'audio_file' in form.changed_data:
+            obj.content_hash = None  # File cleared
+        super().save_model(request, obj, form, change)
+
     def approve_songs(self, request, queryset):
+        song_ids = list(queryset.filter(is_approved=False).values_list('pk', flat=True))
         queryset.update(is_approved=True)
+        # Waveforms and preview clips are rendered by the job workers, not in this request
+        enqueue_media_processing(song_ids)
         self.message_user(request, "Selected songs have been approved.")
     approve_songs.short_description = "Approve selected songs"
 
@@ -45,4 +79,18 @@ class FanVoteAdmin(admin.ModelAdmin):
 @admin.register(FanMessage)
 class FanMessageAdmin(admin.ModelAdmin):
     list_display = ('name', 'message', 'created_at')
-    search_fields = ('name', 'message')
\ No newline at end of file
+    search_fields = ('name', 'message')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('attempts', 'locked_until', 'last_error', 'result', 'created_at', 'updated_at')
+    actions = ['requeue_jobs']
+
+    def requeue_jobs(self, request, queryset):
+        queryset.filter(status=Job.DEAD).update(
+            status=Job.PENDING, attempts=0, run_at=timezone.now(), locked_until=None
+        )
+        self.message_user(request, "Selected dead jobs have been requeued.")
+    requeue_jobs.short_description = "Requeue selected dead jobs"
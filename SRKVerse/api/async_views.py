@@ -0,0 +1,281 @@
+"""Async twins of the catalog read endpoints, served when the app runs under ASGI.
+
+They share cache keys, tags and response bodies with the sync views in
+views.py, which stay in place for WSGI. DRF has no async views, so these are
+plain Django views returning JsonResponse errors. Cache hits never leave the
+event loop; the async ORM still runs queries on a worker thread in Django 4.2,
+but only on a miss.
+"""
+from django.conf import settings
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from .cache import acached_response
+from .leaderboard import broadcaster, sse_event
+from .fast_serializers import movie_values, quote_values, award_values
+from .pagination import apaginated_response
+from .serializers import MovieSerializer, SongSerializer, TimelineSerializer
+from .services import (
+    aget_movie_by_title, aget_quotes_by_movie, aget_songs_by_movie,
+    get_movies, get_movies_by_year, get_movies_by_genre, get_top_rated_movies, get_approved_songs,
+    get_quotes, get_quotes_by_tag, get_awards, get_awards_by_year, get_awards_by_type,
+    get_timeline, get_events_by_year
+)
+from functools import wraps
+import asyncio
+import logging
+import sentry_sdk
+
+logger = logging.getLogger(__name__)
+
+def async_require_safe(view):
+    """require_safe for async views; Django 4.2's method decorators only wrap sync functions."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+@async_require_safe
+async def get_all_movies(request):
+    """Fetch all movies a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, 'movies_all', get_movies, movie_values,
+            tags=['movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching movies: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch movies"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_movies_by_year_view(request, year):
+    """Fetch movies by release year a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'movies_year_{year}', lambda: get_movies_by_year(year), movie_values,
+            tags=[f'movies:year:{year}']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching movies for year {year}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No movies found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_movie_by_title_view(request, title):
+    """Fetch a movie by title, or 404 if there is none."""
+    async def build():
+        movie = await aget_movie_by_title(title)
+        return MovieSerializer(movie).data if movie is not None else None
+
+    try:
+        response = await acached_response(
+            request, f'movie_title_{title.lower()}', build,
+            tags=[f'movies:title:{title.lower()}']
+        )
+        if response is not None:
+            return response
+        return JsonResponse({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error fetching movie '{title}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch movie"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_top_rated_view(request):
+    """Fetch top-rated movies."""
+    try:
+        return await acached_response(
+            request, 'movies_top_rated',
+            lambda: movie_values.aserialize(get_top_rated_movies()),
+            tags=['movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching top-rated movies: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch top-rated movies"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_by_genre_view(request, genre):
+    """Fetch movies by genre a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'movies_genre_{genre.lower()}', lambda: get_movies_by_genre(genre), movie_values,
+            tags=[f'movies:genre:{genre.lower()}']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching movies for genre {genre}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No movies found for genre {genre}"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_all_songs(request):
+    """Fetch all approved songs a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, 'songs_all', get_approved_songs, SongSerializer,
+            tags=['songs', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching songs: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch songs"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_movie_songs(request, title):
+    """Fetch approved songs for a movie a cursor page at a time, or 404 if the movie is unknown."""
+    try:
+        response = await apaginated_response(
+            request, f'songs_movie_{title.lower()}', lambda: aget_songs_by_movie(title), SongSerializer,
+            tags=[f'songs:movie:{title.lower()}', 'movies']
+        )
+        if response is not None:
+            return response
+        return JsonResponse({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error fetching songs for movie '{title}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch songs"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_all_quotes(request):
+    """Fetch all quotes a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, 'quotes_all', get_quotes, quote_values,
+            tags=['quotes', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching quotes: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch quotes"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_quotes_by_movie_view(request, title):
+    """Fetch quotes by movie title a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'quotes_movie_{title.lower()}', lambda: aget_quotes_by_movie(title), quote_values,
+            tags=[f'quotes:movie:{title.lower()}', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching quotes for movie '{title}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No quotes found for movie '{title}'"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_quotes_by_tag_view(request, tag):
+    """Fetch quotes by tag a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'quotes_tag_{tag.lower()}', lambda: get_quotes_by_tag(tag), quote_values,
+            tags=[f'quotes:tag:{tag.lower()}', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching quotes for tag '{tag}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No quotes found for tag '{tag}'"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_all_awards(request):
+    """Fetch all awards a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, 'awards_all', get_awards, award_values,
+            ordering=('year', 'id'),
+            tags=['awards', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching awards: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch awards"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_awards_by_year_view(request, year):
+    """Fetch awards by year a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'awards_year_{year}', lambda: get_awards_by_year(year), award_values,
+            ordering=('year', 'id'),
+            tags=[f'awards:year:{year}', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching awards for year {year}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No awards found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_awards_by_type_view(request, award_type):
+    """Fetch awards by type a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'awards_type_{award_type.lower()}', lambda: get_awards_by_type(award_type), award_values,
+            ordering=('year', 'id'),
+            tags=[f'awards:type:{award_type.lower()}', 'movies']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching awards for type '{award_type}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No awards found for type '{award_type}'"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def get_timeline_view(request):
+    """Fetch the career timeline a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, 'timeline', get_timeline, TimelineSerializer,
+            ordering=('year', 'id'),
+            tags=['timeline']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching timeline: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch timeline"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_require_safe
+async def get_events_by_year_view(request, year):
+    """Fetch timeline events by year a cursor page at a time."""
+    try:
+        return await apaginated_response(
+            request, f'events_year_{year}', lambda: get_events_by_year(year), TimelineSerializer,
+            ordering=('year', 'id'),
+            tags=[f'timeline:year:{year}']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching events for year {year}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": f"No events found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
+
+@async_require_safe
+async def leaderboard_stream_view(request):
+    """Stream the fan-poll leaderboard as Server-Sent Events: a snapshot, then coalesced deltas.
+
+    Clients share their worker's single leaderboard computation per frame
+    instead of each polling polls/favorite-movie/. Only routed under ASGI.
+    """
+    async def events():
+        subscription = broadcaster.subscribe()
+        try:
+            loop = asyncio.get_running_loop()
+            closes_at = loop.time() + settings.LEADERBOARD_STREAM_MAX_AGE
+            yield b'retry: 3000\n\n' + sse_event('snapshot', await broadcaster.snapshot())
+            while loop.time() < closes_at:
+                frame = await subscription.next_frame(timeout=settings.LEADERBOARD_HEARTBEAT)
+                if frame is None:
+                    yield b': keepalive\n\n'
+                    continue
+                yield sse_event('delta', {
+                    'changed': sorted((row for row in frame.values() if row is not None), key=lambda row: row['rank']),
+                    'removed': [movie_id for movie_id, row in frame.items() if row is None],
+                })
+        except Exception as e:
+            logger.error(f"Error streaming leaderboard: {str(e)}")
+            sentry_sdk.capture_exception(e)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering frames
+    return response
@@ -0,0 +1,101 @@
+from django.core.files.storage import default_storage
+from .workers import process_pool
+import hashlib
+import logging
+import mimetypes
+import mutagen
+
+logger = logging.getLogger(__name__)
+
+MPEG = 'audio/mpeg'
+WAV = 'audio/wav'
+EXTENSION_FORMATS = {'audio/mpeg': MPEG, 'audio/mp3': MPEG, 'audio/wav': WAV, 'audio/x-wav': WAV}
+
+def expected_format(name):
+    """Return MPEG or WAV as a file name's extension implies, or None for other files."""
+    mime_type, _ = mimetypes.guess_type(name)
+    return EXTENSION_FORMATS.get(mime_type)
+
+def sniff_audio_format(head):
+    """Identify MP3 or WAV content from its first bytes, or return None."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return WAV
+    if head[:3] == b'ID3':
+        return MPEG
+    # Bare MPEG audio frame: 11 sync bits, then a layer other than "reserved"
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0 and head[1] & 0x06:
+        return MPEG
+    return None
+
+def probe_upload(upload):
+    """Read format, duration (s) and bitrate (kbps) from an incoming upload.
+
+    Works on the request's in-memory or spooled temporary upload, before
+    anything is written to storage, and rewinds it afterwards so the
+    storage backend saves the whole file. Values that cannot be read are
+    None.
+    """
+    upload.seek(0)
+    info = {'format': sniff_audio_format(upload.read(12)), 'duration': None, 'bitrate': None}
+    upload.seek(0)
+    try:
+        audio = mutagen.File(upload)
+        if audio is not None and audio.info is not None:
+            info['duration'] = int(audio.info.length)
+            bitrate = getattr(audio.info, 'bitrate', None)
+            info['bitrate'] = round(bitrate / 1000) if bitrate else None
+    except Exception as e:
+        logger.warning(f"Could not read audio metadata from '{upload.name}': {str(e)}")
+    finally:
+        upload.seek(0)
+    return info
+
+def content_hash(file):
+    """SHA-256 hex digest of a Django File (upload or stored), streamed a chunk at a time."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def _hash_stored_file(name):
+    """Process-pool worker: hash one stored file, or return None if it cannot be read."""
+    try:
+        with default_storage.open(name, 'rb') as file:
+            return content_hash(file)
+    except Exception as e:
+        logger.error(f"Could not hash stored file '{name}': {str(e)}")
+        return None
+
+def backfill_content_hashes(workers=None):
+    """Hash the stored audio of songs without a content_hash, in parallel processes.
+
+    Hashing is CPU-bound, so it runs on a process pool rather than threads.
+    Where several songs share a file's content, only the oldest gets the
+    hash; the rest are reported as duplicates for review. Returns
+    (hashed, duplicate song ids, failed).
+    """
+    from .models import Song
+
+    songs = list(
+        Song.objects.filter(content_hash__isnull=True).exclude(audio_file='').exclude(audio_file__isnull=True)
+        .order_by('pk').values_list('pk', 'audio_file')
+    )
+    if not songs:
+        return 0, [], 0
+    with process_pool(len(songs), workers, settings_names=['MEDIA_ROOT']) as pool:
+        hashes = list(pool.map(_hash_stored_file, [name for _, name in songs], chunksize=8))
+
+    taken = set(Song.objects.exclude(content_hash=None).values_list('content_hash', flat=True))
+    updates, duplicates, failed = [], [], 0
+    for (pk, _), digest in zip(songs, hashes):
+        if digest is None:
+            failed += 1
+        elif digest in taken:
+            duplicates.append(pk)
+        else:
+            taken.add(digest)
+            updates.append(Song(pk=pk, content_hash=digest))
+    # content_hash is never served, so no cached response needs invalidating
+    Song._base_manager.bulk_update(updates, ['content_hash'], batch_size=500)
+    return len(updates), duplicates, failed
@@ -0,0 +1,601 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+import weakref
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_KEY_PREFIX = 'response'
+TAG_VERSION_PREFIX = 'tag_version'
+FILL_LOCK_PREFIX = 'fill_lock'
+FILL_POLL_INTERVAL = 0.05
+_MISSING = object()
+
+# Deletes a lock only while it still holds the caller's token, so a holder
+# whose lock expired cannot release the next holder's
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def get_redis():
+    """Return the raw Redis client behind the default cache, or None if it is not Redis."""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+class AsyncSharedCache:
+    """Non-blocking client for the shared cache, used by the async read path.
+
+    With django_redis it talks to the same Redis over redis.asyncio, reusing
+    django_redis's key and value encoding so sync and async code share
+    entries. Other backends go through Django's async cache API.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._clients = weakref.WeakKeyDictionary()  # redis.asyncio clients are bound to one event loop
+
+    def client(self):
+        """Return this event loop's redis.asyncio client, or None when the cache is not Redis."""
+        if not hasattr(self.backend, 'client') or not hasattr(self.backend.client, 'encode'):
+            return None
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            import redis.asyncio
+            location = settings.CACHES['default']['LOCATION']
+            if isinstance(location, (list, tuple)):
+                location = location[0]  # The primary; replicas are not used for async reads
+            self._clients[loop] = redis.asyncio.from_url(location)
+        return self._clients[loop]
+
+    def _key(self, key):
+        return self.backend.client.make_key(key)
+
+    async def get(self, key, default=None):
+        client = self.client()
+        if client is None:
+            return await self.backend.aget(key, default)
+        value = await client.get(self._key(key))
+        return default if value is None else self.backend.client.decode(value)
+
+    async def get_many(self, keys):
+        client = self.client()
+        if client is None:
+            return await self.backend.aget_many(keys)
+        values = await client.mget([self._key(key) for key in keys])
+        return {key: self.backend.client.decode(value) for key, value in zip(keys, values) if value is not None}
+
+    async def set(self, key, value, timeout):
+        client = self.client()
+        if client is None:
+            return await self.backend.aset(key, value, timeout=timeout)
+        await client.set(self._key(key), self.backend.client.encode(value), px=None if timeout is None else int(timeout * 1000))
+
+    async def add(self, key, value, timeout):
+        client = self.client()
+        if client is None:
+            return await self.backend.aadd(key, value, timeout=timeout)
+        return bool(await client.set(
+            self._key(key), self.backend.client.encode(value), nx=True,
+            px=None if timeout is None else int(timeout * 1000)
+        ))
+
+    async def delete(self, key):
+        client = self.client()
+        if client is None:
+            return await self.backend.adelete(key)
+        await client.delete(self._key(key))
+
+    async def release(self, key, token):
+        """Async twin of release_lock()."""
+        client = self.client()
+        if client is None:
+            if await self.backend.aget(key) == token:
+                await self.backend.adelete(key)
+            return
+        await client.eval(RELEASE_LOCK_SCRIPT, 1, self._key(key), self.backend.client.encode(token))
+
+shared_async = AsyncSharedCache(cache)
+
+class LocalCache:
+    """Thread-safe, size-bounded LRU with a per-entry TTL, private to one process."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # Bumped on every eviction so a read that raced an invalidation is not stored
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def evict(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class TwoTierCache:
+    """Per-process LRU tier in front of the shared cache, kept coherent over Redis pub/sub.
+
+    Writes that change what a key means (tag bumps, deletes) are broadcast on
+    CACHE_INVALIDATION_CHANNEL; every worker runs a listener thread that drops
+    the named keys from its local tier, skipping its own messages since the
+    publishing worker already evicted them. The local TTL bounds staleness if
+    a message is ever missed.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.local = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TIMEOUT)
+        self.counts = {'local_hits': 0, 'local_misses': 0, 'shared_hits': 0, 'shared_misses': 0}
+        self._counts_lock = threading.Lock()
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._instance = uuid.uuid4().hex
+
+    def _redis(self):
+        return get_redis()
+
+    def _origin(self):
+        """Sender id for invalidation messages, distinct for each forked worker."""
+        return f'{self._instance}:{os.getpid()}'
+
+    def _ensure_listener(self):
+        # Started lazily, and again after a fork, so each worker process subscribes once
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self.local.clear()
+            if self._redis() is not None:
+                threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    self._on_invalidation(message['data'])
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {str(e)}")
+            # Messages may have been missed while disconnected
+            self.local.clear()
+            time.sleep(1)
+
+    def _on_invalidation(self, data):
+        payload = json.loads(data)
+        if payload['origin'] != self._origin():  # The publisher evicted its own copies already
+            self.local.evict(payload['keys'])
+
+    def _count(self, **counts):
+        with self._counts_lock:
+            for name, count in counts.items():
+                self.counts[name] += count
+
+    def get(self, key, default=None):
+        self._ensure_listener()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self._count(local_hits=1)
+            return value
+        self._count(local_misses=1)
+        generation = self.local.generation
+        value = self.backend.get(key)
+        if value is None:
+            self._count(shared_misses=1)
+            return default
+        self._count(shared_hits=1)
+        self.local.set(key, value, generation=generation)
+        return value
+
+    def get_many(self, keys):
+        self._ensure_listener()
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count(local_hits=len(found), local_misses=len(missing))
+        if missing:
+            generation = self.local.generation
+            shared = self.backend.get_many(missing)
+            self._count(shared_hits=len(shared), shared_misses=len(missing) - len(shared))
+            for key, value in shared.items():
+                self.local.set(key, value, generation=generation)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout):
+        self.backend.set(key, value, timeout=timeout)
+        self.local.set(key, value)
+
+    async def aget(self, key, default=None):
+        """Async twin of get(): local hits never leave the event loop."""
+        self._ensure_listener()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self._count(local_hits=1)
+            return value
+        self._count(local_misses=1)
+        generation = self.local.generation
+        value = await shared_async.get(key)
+        if value is None:
+            self._count(shared_misses=1)
+            return default
+        self._count(shared_hits=1)
+        self.local.set(key, value, generation=generation)
+        return value
+
+    async def aget_many(self, keys):
+        self._ensure_listener()
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count(local_hits=len(found), local_misses=len(missing))
+        if missing:
+            generation = self.local.generation
+            shared = await shared_async.get_many(missing)
+            self._count(shared_hits=len(shared), shared_misses=len(missing) - len(shared))
+            for key, value in shared.items():
+                self.local.set(key, value, generation=generation)
+            found.update(shared)
+        return found
+
+    async def aset(self, key, value, timeout):
+        await shared_async.set(key, value, timeout=timeout)
+        self.local.set(key, value)
+
+    def discard_local(self, key):
+        self.local.evict([key])
+
+    def evict(self, keys):
+        """Drop keys from the local tier of every worker."""
+        keys = list(keys)
+        self.local.evict(keys)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                redis.publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps({'origin': self._origin(), 'keys': keys}))
+            except Exception as e:
+                logger.error(f"Failed to publish cache invalidation: {str(e)}")
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            'local': {'hits': counts['local_hits'], 'misses': counts['local_misses'], 'size': len(self.local)},
+            'shared': {'hits': counts['shared_hits'], 'misses': counts['shared_misses']},
+        }
+
+two_tier = TwoTierCache(cache)
+
+def _tag_version_key(tag):
+    return f'{TAG_VERSION_PREFIX}:{tag}'
+
+def get_tag_versions(tags):
+    """Fetch the current version of each tag, seeding any that are missing."""
+    keys = {tag: _tag_version_key(tag) for tag in tags}
+    generation = two_tier.local.generation
+    versions = two_tier.get_many(list(keys.values()))
+    result = {}
+    for tag, key in keys.items():
+        version = versions.get(key)
+        if version is None:
+            # Seed from the clock so an evicted counter can never fall back
+            # to a version that older cached entries were stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+            if version is not None:
+                two_tier.local.set(key, version, generation=generation)
+        result[tag] = version
+    return result
+
+async def aget_tag_versions(tags):
+    """Async twin of get_tag_versions()."""
+    keys = {tag: _tag_version_key(tag) for tag in tags}
+    generation = two_tier.local.generation
+    versions = await two_tier.aget_many(list(keys.values()))
+    result = {}
+    for tag, key in keys.items():
+        version = versions.get(key)
+        if version is None:
+            await shared_async.add(key, time.time_ns(), timeout=None)
+            version = await shared_async.get(key)
+            if version is not None:
+                two_tier.local.set(key, version, generation=generation)
+        result[tag] = version
+    return result
+
+def invalidate_tags(tags):
+    """Bump the version of each tag, orphaning every response cached under it."""
+    keys = [_tag_version_key(tag) for tag in set(tags)]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    if keys:
+        two_tier.evict(keys)
+        logger.debug(f"Invalidated cache tags: {sorted(set(tags))}")
+
+def _should_refresh(entry, now, beta):
+    """Probabilistic early expiry: refresh sooner the longer the value takes to compute."""
+    return now - entry['delta'] * beta * math.log(random.random() or 1e-12) >= entry['expires_at']
+
+def _fill(key, compute, timeout, negative_timeout=None):
+    start = time.time()
+    value = compute()
+    if value is None:
+        if not negative_timeout:
+            return None
+        timeout = negative_timeout  # Remember the miss, briefly
+    now = time.time()
+    entry = {'value': value, 'expires_at': now + timeout, 'delta': now - start}
+    # Keep the entry past its logical expiry so it can be served stale during a refresh
+    two_tier.set(key, entry, timeout=timeout + settings.CACHE_STALE_GRACE)
+    return value
+
+def release_lock(key, token):
+    """Delete the lock `key` in the shared cache if it still holds `token`, atomically on Redis."""
+    client = getattr(cache, 'client', None)
+    redis = get_redis() if hasattr(client, 'encode') else None
+    if redis is None:
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
+    redis.eval(RELEASE_LOCK_SCRIPT, 1, client.make_key(key), client.encode(token))
+
+def get_or_fill(key, compute, timeout, beta=1.0, negative_timeout=None):
+    """Return the cached value for `key`, recomputing it in at most one worker at a time.
+
+    A value nearing expiry is refreshed early with a probability that grows as
+    expiry approaches. Only the worker holding the fill lock calls `compute`;
+    concurrent callers get the stale value if one exists, otherwise they wait
+    for the lock holder to publish. A `compute` result of None is not cached,
+    unless `negative_timeout` is given: then the miss is cached that long.
+    """
+    entry = two_tier.get(key)
+    if entry is not None and _should_refresh(entry, time.time(), beta):
+        # Another worker may already have published a refresh our local copy predates
+        two_tier.discard_local(key)
+        entry = two_tier.get(key)
+    if entry is not None and not _should_refresh(entry, time.time(), beta):
+        return entry['value']
+
+    lock_key = f'{FILL_LOCK_PREFIX}:{key}'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, timeout=settings.CACHE_FILL_LOCK_TIMEOUT):
+        try:
+            return _fill(key, compute, timeout, negative_timeout)
+        finally:
+            release_lock(lock_key, token)
+
+    if entry is not None:
+        return entry['value']
+
+    deadline = time.time() + settings.CACHE_FILL_WAIT
+    while time.time() < deadline:
+        time.sleep(FILL_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+        if cache.get(lock_key) is None:
+            break
+    logger.warning(f"Single-flight wait for '{key}' gave up; computing locally")
+    return _fill(key, compute, timeout, negative_timeout)
+
+async def _afill(key, compute, timeout, negative_timeout=None):
+    start = time.time()
+    value = await compute()
+    if value is None:
+        if not negative_timeout:
+            return None
+        timeout = negative_timeout
+    now = time.time()
+    entry = {'value': value, 'expires_at': now + timeout, 'delta': now - start}
+    await two_tier.aset(key, entry, timeout=timeout + settings.CACHE_STALE_GRACE)
+    return value
+
+async def aget_or_fill(key, compute, timeout, beta=1.0, negative_timeout=None):
+    """Async twin of get_or_fill(); `compute` is a coroutine function.
+
+    Same entries, fill lock and early refresh as the sync version, so sync
+    and async workers single-flight each other.
+    """
+    entry = await two_tier.aget(key)
+    if entry is not None and _should_refresh(entry, time.time(), beta):
+        two_tier.discard_local(key)
+        entry = await two_tier.aget(key)
+    if entry is not None and not _should_refresh(entry, time.time(), beta):
+        return entry['value']
+
+    lock_key = f'{FILL_LOCK_PREFIX}:{key}'
+    token = uuid.uuid4().hex
+    if await shared_async.add(lock_key, token, timeout=settings.CACHE_FILL_LOCK_TIMEOUT):
+        try:
+            return await _afill(key, compute, timeout, negative_timeout)
+        finally:
+            await shared_async.release(lock_key, token)
+
+    if entry is not None:
+        return entry['value']
+
+    deadline = time.time() + settings.CACHE_FILL_WAIT
+    while time.time() < deadline:
+        await asyncio.sleep(FILL_POLL_INTERVAL)
+        entry = await shared_async.get(key)
+        if entry is not None:
+            return entry['value']
+        if await shared_async.get(lock_key) is None:
+            break
+    logger.warning(f"Single-flight wait for '{key}' gave up; computing locally")
+    return await _afill(key, compute, timeout, negative_timeout)
+
+def tagged_key(name, tags=()):
+    """Build a cache key that changes whenever any of `tags` is invalidated."""
+    if not tags:
+        return name
+    versions = get_tag_versions(sorted(set(tags)))
+    stamp = '.'.join(str(versions[tag]) for tag in sorted(versions))
+    return f'{name}:{stamp}'
+
+async def atagged_key(name, tags=()):
+    if not tags:
+        return name
+    versions = await aget_tag_versions(sorted(set(tags)))
+    stamp = '.'.join(str(versions[tag]) for tag in sorted(versions))
+    return f'{name}:{stamp}'
+
+def response_key(name, tags=()):
+    """Build the cache key for a rendered endpoint response under the current tag versions."""
+    return tagged_key(f'{RESPONSE_KEY_PREFIX}:{name}', tags)
+
+def render_entry(data, headers=None):
+    """Render serializer output once into a cacheable entry of bytes plus metadata."""
+    renderer = JSONRenderer()
+    content = renderer.render(data)
+    return {
+        'content': content,
+        'content_type': renderer.media_type,
+        'etag': hashlib.sha256(content).hexdigest(),
+        'headers': headers or {},
+    }
+
+class CachedResponse(Response):
+    """DRF response that serves pre-rendered bytes from the response cache."""
+
+    def __init__(self, entry, status=status.HTTP_200_OK):
+        self.entry = entry
+        super().__init__(status=status, content_type=entry['content_type'])
+        self['Content-Type'] = entry['content_type']
+        self['ETag'] = f'"{entry["etag"]}"'
+        for header, value in entry.get('headers', {}).items():
+            self[header] = value
+
+    @property
+    def data(self):
+        # Decoded lazily; the hot path only ever touches the raw bytes.
+        if self.status_code == status.HTTP_304_NOT_MODIFIED:
+            return None
+        return json.loads(self.entry['content'])
+
+    @data.setter
+    def data(self, value):
+        pass
+
+    @property
+    def rendered_content(self):
+        if self.status_code == status.HTTP_304_NOT_MODIFIED:
+            return b''
+        return self.entry['content']
+
+def cached_entry(name, fill, tags=(), timeout=None):
+    """Return the rendered entry for `name`, calling `fill` to render it on a miss."""
+    key = response_key(name, tags)
+    return get_or_fill(key, fill, timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+async def acached_entry(name, fill, tags=(), timeout=None):
+    """Async twin of cached_entry(); `fill` is a coroutine function."""
+    key = await atagged_key(f'{RESPONSE_KEY_PREFIX}:{name}', tags)
+    return await aget_or_fill(key, fill, timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+def entry_response(request, entry):
+    """Serve a rendered entry, answering a matching If-None-Match with 304."""
+    if request.headers.get('If-None-Match') == f'"{entry["etag"]}"':
+        return CachedResponse(entry, status=status.HTTP_304_NOT_MODIFIED)
+    return CachedResponse(entry)
+
+def cached_response(request, name, build, tags=(), timeout=None):
+    """Return the cached rendered response for `name`, building and caching it on a miss.
+
+    `build` returns serializer data, or None when there is nothing to serve;
+    in that case nothing is cached and None is returned. Entries are keyed on
+    the current versions of `tags`, so model writes invalidate them.
+    """
+    def fill():
+        data = build()
+        return render_entry(data) if data is not None else None
+
+    entry = cached_entry(name, fill, tags, timeout)
+    if entry is None:
+        return None
+    return entry_response(request, entry)
+
+def entry_http_response(request, entry):
+    """Plain Django twin of entry_response(), for async views, which run outside DRF."""
+    if request.headers.get('If-None-Match') == f'"{entry["etag"]}"':
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = f'"{entry["etag"]}"'
+    for header, value in entry.get('headers', {}).items():
+        response[header] = value
+    return response
+
+async def acached_response(request, name, build, tags=(), timeout=None):
+    """Async twin of cached_response(); `build` is a coroutine function returning serializer data or None."""
+    async def fill():
+        data = await build()
+        return render_entry(data) if data is not None else None
+
+    entry = await acached_entry(name, fill, tags, timeout)
+    if entry is None:
+        return None
+    return entry_http_response(request, entry)
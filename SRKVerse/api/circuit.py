@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.cache import cache
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    pass
+
+def is_provider_failure(exception):
+    """Count timeouts, connection errors and 5xx responses; 4xx (incl. 429) are not outages."""
+    status = getattr(exception, 'http_status', None)
+    if status is None:
+        status = getattr(getattr(exception, 'response', None), 'status_code', None)
+    return status is None or status >= 500
+
+class CircuitBreaker:
+    """Per-provider circuit breaker whose state lives in the shared cache.
+
+    CIRCUIT_FAILURE_THRESHOLD failures within CIRCUIT_FAILURE_WINDOW seconds
+    open the circuit in every worker: calls then fail fast with
+    CircuitOpenError for CIRCUIT_RESET_TIMEOUT seconds. After that one trial
+    call is let through (half-open); success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.failures_key = f'circuit:{name}:failures'
+        self.opened_until_key = f'circuit:{name}:opened_until'
+        self.trial_key = f'circuit:{name}:trial'
+
+    def state(self):
+        opened_until = cache.get(self.opened_until_key)
+        if opened_until is None:
+            return CLOSED
+        return OPEN if time.time() < opened_until else HALF_OPEN
+
+    def allow(self):
+        """Return whether a call may go to the provider now."""
+        state = self.state()
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # Exactly one worker gets to probe the provider
+            return cache.add(self.trial_key, 1, timeout=settings.CIRCUIT_RESET_TIMEOUT)
+        return False
+
+    def _open(self):
+        opened_until = time.time() + settings.CIRCUIT_RESET_TIMEOUT
+        # Kept past the reset so the circuit reads half-open, not closed, until a trial succeeds
+        cache.set(self.opened_until_key, opened_until, timeout=None)
+        cache.delete_many([self.failures_key, self.trial_key])
+        logger.error(f"Circuit '{self.name}' opened for {settings.CIRCUIT_RESET_TIMEOUT}s")
+
+    def record_success(self):
+        # While closed, failures simply age out of their window
+        if self.state() != CLOSED:
+            cache.delete_many([self.failures_key, self.opened_until_key, self.trial_key])
+            logger.warning(f"Circuit '{self.name}' closed")
+
+    def record_failure(self):
+        if self.state() != CLOSED:
+            self._open()
+            return
+        cache.add(self.failures_key, 0, timeout=settings.CIRCUIT_FAILURE_WINDOW)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:  # Window expired between add and incr
+            cache.set(self.failures_key, 1, timeout=settings.CIRCUIT_FAILURE_WINDOW)
+            failures = 1
+        if failures >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            self._open()
+
+    def call(self, func, *args, **kwargs):
+        """Call `func` through the breaker, raising CircuitOpenError instead while it is open."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_provider_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def status(self):
+        return {
+            'state': self.state(),
+            'failures': cache.get(self.failures_key, 0),
+            'opened_until': cache.get(self.opened_until_key),
+        }
+
+spotify_breaker = CircuitBreaker('spotify')
+tmdb_breaker = CircuitBreaker('tmdb')
+
+def circuit_states():
+    return {breaker.name: breaker.status() for breaker in (spotify_breaker, tmdb_breaker)}
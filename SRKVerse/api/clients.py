@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+import logging
+import os
+import requests
+import spotipy
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Surface 429s to call_spotify instead of letting spotipy sleep through them
+SPOTIFY_RETRY_STATUSES = (500, 502, 503, 504)
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request that does not set one."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+class SharedTokenCache(CacheHandler):
+    """spotipy token store in the shared cache, so all workers reuse one client-credentials token."""
+
+    def __init__(self, registry, client_id):
+        self.registry = registry
+        self.key = f'spotify_token:{client_id}'
+
+    def get_cached_token(self):
+        return cache.get(self.key)
+
+    def save_token_to_cache(self, token_info):
+        # spotipy refreshes 60s before expiry; drop the entry at the same point
+        cache.set(self.key, token_info, timeout=max(token_info.get('expires_in', 3600) - 60, 1))
+        self.registry.counts['spotify_token_fetches'] += 1
+
+class ClientRegistry:
+    """Long-lived outbound HTTP clients, one set per process.
+
+    Each provider gets a keep-alive session with a bounded connection pool
+    and a default timeout. Clients are rebuilt after a fork so worker
+    processes never share sockets.
+    """
+
+    def __init__(self):
+        self.counts = {'spotify_token_fetches': 0}
+        self._pid = None
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._spotify = None
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._sessions = {}
+            self._spotify = None
+
+    def _timeouts(self):
+        return {'spotify': settings.SPOTIFY_TIMEOUT, 'tmdb': settings.TMDB_TIMEOUT}
+
+    def session(self, provider):
+        """Return this process's pooled session for `provider` ('spotify' or 'tmdb')."""
+        with self._lock:
+            self._check_pid()
+            if provider not in self._sessions:
+                session = TimeoutSession(self._timeouts()[provider])
+                adapter = HTTPAdapter(pool_connections=settings.HTTP_POOL_CONNECTIONS, pool_maxsize=settings.HTTP_POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[provider] = session
+            return self._sessions[provider]
+
+    def spotify(self):
+        """Return this process's Spotify client; its access token lives in the shared cache."""
+        session = self.session('spotify')
+        with self._lock:
+            if self._spotify is None:
+                auth_manager = SpotifyClientCredentials(
+                    client_id=settings.SPOTIFY_CLIENT_ID,
+                    client_secret=settings.SPOTIFY_CLIENT_SECRET,
+                    requests_session=session,
+                    requests_timeout=settings.SPOTIFY_TIMEOUT,
+                    cache_handler=SharedTokenCache(self, settings.SPOTIFY_CLIENT_ID)
+                )
+                self._spotify = spotipy.Spotify(
+                    auth_manager=auth_manager,
+                    requests_session=session,
+                    requests_timeout=settings.SPOTIFY_TIMEOUT,
+                    status_forcelist=SPOTIFY_RETRY_STATUSES
+                )
+            return self._spotify
+
+    def stats(self):
+        """Connection-pool metrics per provider and host for this process."""
+        with self._lock:
+            self._check_pid()
+            sessions = dict(self._sessions)
+        providers = {}
+        for provider, session in sessions.items():
+            hosts = {}
+            for adapter in dict.fromkeys(session.adapters.values()):
+                for key in adapter.poolmanager.pools.keys():
+                    pool = adapter.poolmanager.pools[key]
+                    hosts[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                        'connections_opened': pool.num_connections,
+                        'requests': pool.num_requests,
+                        # The pool queue holds None placeholders for connections not yet opened
+                        'idle': sum(conn is not None for conn in list(pool.pool.queue)) if pool.pool else 0,
+                        'max_size': pool.pool.maxsize if pool.pool else 0,
+                    }
+            providers[provider] = hosts
+        return {'pid': os.getpid(), 'providers': providers, **self.counts}
+
+clients = ClientRegistry()
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db.models import Q
+from .models import Song
+from .cache import get_or_fill
+from .services import (
+    call_spotify, get_spotify_client, spotify_search_key, spotify_track_data, spotify_track_query
+)
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_TRACKS_BATCH = 50  # GET /v1/tracks accepts at most 50 ids
+ENRICHED_FIELDS = ['spotify_id', 'preview_url', 'popularity', 'duration']
+
+def songs_missing_metadata():
+    return Song.objects.filter(Q(spotify_id__isnull=True) | Q(popularity__isnull=True) | Q(duration__isnull=True))
+
+def _search(sp, songs):
+    song = songs[0]
+    query = spotify_track_query(song.title, song.movie.title)
+
+    def search():
+        items = call_spotify(lambda: sp.search(q=query, type='track', limit=1)).get('tracks', {}).get('items', [])
+        return spotify_track_data(items[0]) if items else None
+
+    # Shares the single-song cache, so recent misses are not searched again
+    data = get_or_fill(
+        spotify_search_key(song.title, song.movie.title), search,
+        timeout=86400, negative_timeout=settings.NEGATIVE_CACHE_TIMEOUT
+    )
+    return [(song, data)]
+
+def _lookup(sp, songs):
+    tracks = call_spotify(lambda: sp.tracks([song.spotify_id for song in songs])).get('tracks', [])
+    return [(song, spotify_track_data(track) if track else None) for song, track in zip(songs, tracks)]
+
+def enrich_songs(songs=None, concurrency=None):
+    """Fetch Spotify metadata for a Song queryset (default: songs missing some) and bulk_update it.
+
+    Songs that already have a spotify_id are refreshed SPOTIFY_TRACKS_BATCH
+    ids per request; the rest are resolved with one search each. All
+    requests run on a thread pool and draw from the shared Spotify token
+    bucket, so concurrent runs and workers stay within the rate limit.
+    Returns the number of updated, unmatched and failed songs.
+    """
+    songs = list((songs if songs is not None else songs_missing_metadata()).select_related('movie'))
+    concurrency = concurrency or settings.SPOTIFY_ENRICH_CONCURRENCY
+    sp = get_spotify_client()
+    known = [song for song in songs if song.spotify_id]
+    unknown = [song for song in songs if not song.spotify_id]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        batches = [[song] for song in unknown]
+        batches += [known[i:i + SPOTIFY_TRACKS_BATCH] for i in range(0, len(known), SPOTIFY_TRACKS_BATCH)]
+        futures = [
+            (batch, pool.submit(_lookup if batch[0].spotify_id else _search, sp, batch))
+            for batch in batches
+        ]
+        updated, unmatched, failed = [], 0, 0
+        for batch, future in futures:
+            try:
+                matches = future.result()
+            except Exception as e:
+                logger.error(f"Spotify enrichment failed for {len(batch)} songs: {str(e)}")
+                failed += len(batch)
+                continue
+            for song, data in matches:
+                if data is None:
+                    unmatched += 1
+                    continue
+                for field, value in data.items():
+                    setattr(song, field, value)
+                updated.append(song)
+
+    Song.objects.bulk_update(updated, ENRICHED_FIELDS, batch_size=500)
+    logger.info(f"Enriched {len(updated)} songs ({unmatched} unmatched, {failed} failed)")
+    return {'updated': len(updated), 'unmatched': unmatched, 'failed': failed}
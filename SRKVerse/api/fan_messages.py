@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import LockError, ResponseError
+from .cache import get_redis
+from .models import FanMessage
+import json
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PENDING_MESSAGES_KEY = 'fan_messages:pending'
+FLUSHING_MESSAGES_KEY = 'fan_messages:flushing'
+FLUSH_LOCK_KEY = 'fan_messages:flush_lock'
+FLUSH_LOCK_TIMEOUT = 60  # Renewed before every batch
+
+def submit_fan_message(name, message):
+    """Accept a validated fan message, returning once it is safely queued.
+
+    With Redis the message is one RPUSH onto a list that
+    flush_fan_messages drains in bulk, so submissions never wait on (or hold)
+    a database connection. Without Redis it is inserted directly.
+    """
+    redis = get_redis()
+    if redis is None:
+        FanMessage.objects.create(name=name, message=message)
+        return
+    redis.rpush(PENDING_MESSAGES_KEY, json.dumps({
+        'name': name,
+        'message': message,
+        'created_at': timezone.now().isoformat(),
+        'ingest_id': str(uuid.uuid4()),
+    }))
+
+def pending_message_count():
+    redis = get_redis()
+    if redis is None:
+        return 0
+    pipe = redis.pipeline(transaction=False)
+    pipe.llen(PENDING_MESSAGES_KEY)
+    pipe.llen(FLUSHING_MESSAGES_KEY)
+    return sum(pipe.execute())
+
+def flush_fan_messages():
+    """Store queued fan messages with bulk_create, FAN_MESSAGE_BATCH_SIZE rows per INSERT, and return how many.
+
+    The pending list is atomically renamed before it is read, so messages
+    submitted during the flush land in a fresh list. Each batch is removed
+    from the renamed list only after its INSERT commits; a flush that dies
+    in between leaves the batch behind and the next flush stores it again,
+    which ingest_id makes a no-op. Only one flusher runs at a time: the lock
+    carries an owner token and is renewed before each trim, so a flusher
+    that lost it stops instead of trimming a batch another flusher has not
+    stored yet.
+    """
+    redis = get_redis()
+    if redis is None:
+        return 0
+    lock = redis.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        if not redis.exists(FLUSHING_MESSAGES_KEY):
+            try:
+                redis.rename(PENDING_MESSAGES_KEY, FLUSHING_MESSAGES_KEY)
+            except ResponseError:
+                return 0  # Nothing pending
+        flushed = 0
+        while True:
+            batch = redis.lrange(FLUSHING_MESSAGES_KEY, 0, settings.FAN_MESSAGE_BATCH_SIZE - 1)
+            if not batch:
+                return flushed
+            FanMessage.objects.bulk_create(
+                [FanMessage(**json.loads(raw)) for raw in batch], ignore_conflicts=True
+            )
+            lock.reacquire()  # Raises LockNotOwnedError if the lock expired and was taken over
+            # An emptied list is deleted, so the next flush renames in the newer messages
+            redis.ltrim(FLUSHING_MESSAGES_KEY, len(batch), -1)
+            flushed += len(batch)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Fan message flush lock expired before the flush finished")
+
+def wait_for_batch(interval, should_stop=lambda: False):
+    """Sleep until a full batch is queued, `interval` seconds pass, or `should_stop()` is true."""
+    deadline = time.monotonic() + interval
+    while time.monotonic() < deadline and not should_stop():
+        if pending_message_count() >= settings.FAN_MESSAGE_BATCH_SIZE:
+            return
+        time.sleep(min(0.05, max(deadline - time.monotonic(), 0)))
@@ -0,0 +1,86 @@
+from rest_framework import serializers
+from .serializers import MovieSerializer, QuoteSerializer, AwardSerializer
+
+# Converters matching DRF's to_representation for the plain field types the
+# catalog serializers use; anything else falls back to the field itself.
+_CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.BooleanField: bool,
+    serializers.CharField: str,
+}
+
+def _converter(field):
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return None
+    for field_class, convert in _CONVERTERS.items():
+        if type(field) is field_class:
+            return convert
+    return field.to_representation
+
+class ValuesSerializer:
+    """Read-only serializer that renders QuerySet.values() rows without building model instances.
+
+    Compiled once from a ModelSerializer: each output field becomes a
+    (name, column, converter) mapper, nested serializers become nested
+    mappers over `relation__column` values. Output matches the source
+    serializer's `.data` field for field.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self._mappers = self._compile(serializer_class(), prefix='')
+
+    def _compile(self, serializer, prefix):
+        mappers = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                raise TypeError(f"{name}: many=True relations are not supported on the values path")
+            source = field.source.replace('.', '__')
+            if isinstance(field, serializers.BaseSerializer):
+                # A null FK means the whole nested object renders as None
+                null_column = f'{prefix}{source}__{field.Meta.model._meta.pk.attname}'
+                self.columns.append(null_column)
+                mappers.append((name, null_column, self._compile(field, prefix=f'{prefix}{source}__')))
+            else:
+                column = f'{prefix}{source}'
+                self.columns.append(column)
+                mappers.append((name, column, _converter(field)))
+        return mappers
+
+    def _build(self, row, mappers):
+        data = {}
+        for name, column, convert in mappers:
+            value = row[column]
+            if value is None:
+                data[name] = None
+            elif isinstance(convert, list):
+                data[name] = self._build(row, convert)
+            elif convert is None:
+                data[name] = value
+            else:
+                data[name] = convert(value)
+        return data
+
+    def plan_queryset(self, queryset):
+        """Narrow a queryset to exactly the columns the output needs."""
+        return queryset.values(*dict.fromkeys(self.columns))
+
+    def serialize_many(self, rows):
+        mappers = self._mappers
+        return [self._build(row, mappers) for row in rows]
+
+    def serialize(self, queryset):
+        """Serialize a model queryset straight from its values() rows."""
+        return self.serialize_many(self.plan_queryset(queryset))
+
+    async def aserialize(self, queryset):
+        """Async twin of serialize(), fetching the rows with async iteration."""
+        return self.serialize_many([row async for row in self.plan_queryset(queryset)])
+
+movie_values = ValuesSerializer(MovieSerializer)
+quote_values = ValuesSerializer(QuoteSerializer)
+award_values = ValuesSerializer(AwardSerializer)
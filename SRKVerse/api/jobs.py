@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .media import process_song_media
+from .models import Job, Song
+from .services import enhance_song_with_spotify
+from .votes import rebuild_vote_ranking
+from datetime import timedelta
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_ENRICHMENT = 'spotify_enrichment'
+MEDIA_PROCESSING = 'media_processing'
+VOTE_RANKING_REBUILD = 'vote_ranking_rebuild'
+
+_running = threading.local()  # The job each worker thread is running, for renew_lease
+
+def enrich_song(payload):
+    """Fetch Spotify metadata for one song. Retries are left to the queue, so nothing here sleeps."""
+    song = Song.objects.select_related('movie').filter(pk=payload['song_id']).first()
+    if song is None:
+        return {'skipped': 'song deleted'}
+    enhance_song_with_spotify(song.title, song.movie.title, retries=1, backoff=0)
+    return {'song_id': song.pk}
+
+def render_song_media(payload):
+    """Render waveform peaks and preview clips for a batch of newly approved songs."""
+    processed, failed = process_song_media(payload['song_ids'], on_rendered=renew_lease)
+    return {'processed': processed, 'failed': failed}
+
+def enqueue_media_processing(song_ids):
+    """Queue media rendering for `song_ids`, MEDIA_JOB_BATCH_SIZE songs per job."""
+    song_ids = list(song_ids)
+    return [
+        enqueue_job(MEDIA_PROCESSING, {'song_ids': song_ids[start:start + settings.MEDIA_JOB_BATCH_SIZE]})
+        for start in range(0, len(song_ids), settings.MEDIA_JOB_BATCH_SIZE)
+    ]
+
+def reconcile_vote_ranking(payload):
+    """Rebuild the Redis vote ranking from FanVote, correcting any drift."""
+    return {'movies': rebuild_vote_ranking()}
+
+JOB_HANDLERS = {
+    SPOTIFY_ENRICHMENT: enrich_song,
+    MEDIA_PROCESSING: render_song_media,
+    VOTE_RANKING_REBUILD: reconcile_vote_ranking,
+}
+
+def enqueue_job(kind, payload, max_attempts=None, created_by=None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    return Job.objects.create(
+        kind=kind, payload=payload, max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS, created_by=created_by
+    )
+
+def _retry_delay(attempts):
+    return min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+
+def claim_job():
+    """Lease the next due job to this worker, or return None if there is none.
+
+    A job is due when it is pending and its run_at has passed, or when it is
+    running but its lease (visibility timeout) expired because the worker
+    that held it died. SKIP LOCKED lets concurrent workers claim different
+    jobs without blocking each other.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now))
+                .order_by('run_at', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                # Its last attempt never reported back
+                job.status = Job.DEAD
+                job.locked_until = None
+                job.last_error = job.last_error or "Visibility timeout expired"
+                job.save(update_fields=['status', 'locked_until', 'last_error', 'updated_at'])
+                logger.error(f"Dead-lettered {job}: lease expired on its last attempt")
+                continue
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)
+            job.save(update_fields=['status', 'attempts', 'locked_until', 'updated_at'])
+            return job
+
+def _finish(job, **fields):
+    # Only the lease holder may report; a worker whose lease expired lost the job
+    updated = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_until=job.locked_until).update(
+        locked_until=None, updated_at=timezone.now(), **fields
+    )
+    if not updated:
+        logger.warning(f"Discarded outcome of {job}: its lease expired and it was reclaimed")
+    return bool(updated)
+
+def renew_lease():
+    """Extend the lease of the job running in this thread by JOB_VISIBILITY_TIMEOUT.
+
+    Handlers that can outlast the timeout call this as they make progress, so
+    the job is not reclaimed by another worker while it is still running.
+    Returns False if the lease was already lost.
+    """
+    job = getattr(_running, 'job', None)
+    if job is None:
+        return True
+    locked_until = timezone.now() + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)
+    if not Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_until=job.locked_until).update(locked_until=locked_until):
+        return False
+    job.locked_until = locked_until
+    return True
+
+def run_job(job):
+    """Run a claimed job, then mark it succeeded, schedule a retry, or dead-letter it."""
+    _running.job = job
+    try:
+        result = JOB_HANDLERS[job.kind](job.payload)
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)}"
+        if job.attempts >= job.max_attempts:
+            logger.error(f"Dead-lettered {job} after {job.attempts} attempts: {error}")
+            _finish(job, status=Job.DEAD, last_error=error)
+        else:
+            delay = _retry_delay(job.attempts)
+            logger.warning(f"{job} failed (attempt {job.attempts}), retrying in {delay}s: {error}")
+            _finish(job, status=Job.PENDING, last_error=error, run_at=timezone.now() + timedelta(seconds=delay))
+        return False
+    finally:
+        _running.job = None
+    return _finish(job, status=Job.SUCCEEDED, result=result)
+
+def run_pending_jobs(limit=None):
+    """Run due jobs in this thread until none are left (or `limit` ran); return how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+def work(stop, drain=False):
+    """Worker loop: claim and run jobs until `stop` is set (or the queue is empty when `drain`)."""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_job()
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {str(e)}")
+                job = None
+            if job is not None:
+                run_job(job)
+            elif drain:
+                return
+            else:
+                stop.wait(settings.JOB_POLL_INTERVAL)
+    finally:
+        connection.close()
+
+def run_workers(count, drain=False, stop=None):
+    """Run `count` worker threads in this process and wait for them to exit."""
+    stop = stop or threading.Event()
+    threads = [
+        threading.Thread(target=work, args=(stop, drain), name=f'job-worker-{i}', daemon=True)
+        for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
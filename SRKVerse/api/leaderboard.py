@@ -0,0 +1,126 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .cache import shared_async
+from .votes import ranked_votes, with_titles
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def leaderboard_rows():
+    """Return {movie_id: row} for the whole fan-poll leaderboard, read from the vote ranking."""
+    return {
+        row['movie_id']: {'movie_id': row['movie_id'], 'title': row['title'], 'votes': row['vote_count'], 'rank': row['rank']}
+        for row in with_titles(ranked_votes())
+    }
+
+def sse_event(event, data):
+    """Encode one Server-Sent Events frame."""
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+class Subscription:
+    """One streaming client: deltas merge here until the client is ready for the next frame.
+
+    A slow client therefore gets one combined frame rather than a backlog,
+    and memory per client is bounded by the number of movies.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, delta):
+        self.pending.update(delta)
+        self.ready.set()
+
+    async def next_frame(self, timeout):
+        """Return the merged {movie_id: row or None} since the last frame, or None after `timeout` idle seconds."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        frame, self.pending = self.pending, {}
+        return frame
+
+class LeaderboardBroadcaster:
+    """Per-process fan-out of leaderboard deltas to every streaming client.
+
+    A single task per worker listens on LEADERBOARD_CHANNEL and, at most once
+    per LEADERBOARD_FRAME_INTERVAL, recomputes the leaderboard and pushes the
+    rows that changed to all subscriptions. Without Redis pub/sub it
+    recomputes every interval instead. The task runs only while the worker
+    has subscribers.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.rows = None
+        self.task = None
+        self._lock = None
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.rows = None
+            self._lock = asyncio.Lock()
+            self.task = loop.create_task(self._run())
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def snapshot(self):
+        """Return the current leaderboard rows in rank order."""
+        async with self._lock:
+            if self.rows is None:
+                self.rows = await sync_to_async(leaderboard_rows)()
+            return sorted(self.rows.values(), key=lambda row: row['rank'])
+
+    async def publish_frame(self):
+        """Recompute the leaderboard once and push what changed to every subscriber."""
+        async with self._lock:
+            rows = await sync_to_async(leaderboard_rows)()
+            previous, self.rows = self.rows or {}, rows
+        delta = {movie_id: row for movie_id, row in rows.items() if previous.get(movie_id) != row}
+        delta.update({movie_id: None for movie_id in previous.keys() - rows.keys()})
+        if delta:
+            for subscription in self.subscribers:
+                subscription.push(delta)
+
+    async def _run(self):
+        interval = settings.LEADERBOARD_FRAME_INTERVAL
+        redis = shared_async.client()
+        pubsub = None
+        while True:
+            try:
+                if redis is not None and pubsub is None:
+                    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                    await pubsub.subscribe(settings.LEADERBOARD_CHANNEL)
+                    await self.publish_frame()  # Catch up on votes missed while unsubscribed
+                if pubsub is not None:
+                    if await pubsub.get_message(timeout=None) is None:
+                        continue
+                await asyncio.sleep(interval)  # Votes arriving meanwhile share this frame
+                if pubsub is not None:
+                    while await pubsub.get_message(timeout=0) is not None:
+                        pass
+                await self.publish_frame()
+            except asyncio.CancelledError:
+                if pubsub is not None:
+                    await pubsub.aclose()
+                raise
+            except Exception as e:
+                logger.error(f"Leaderboard broadcaster failed: {str(e)}")
+                if pubsub is not None:
+                    await pubsub.aclose()
+                    pubsub = None
+                await asyncio.sleep(interval)
+
+broadcaster = LeaderboardBroadcaster()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.audio import backfill_content_hashes
+
+class Command(BaseCommand):
+    help = "Compute the SHA-256 content hash of stored song audio that predates upload deduplication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Hashing processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+        hashed, duplicates, failed = backfill_content_hashes(options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Hashed {hashed} songs ({failed} unreadable)"))
+        if duplicates:
+            self.stdout.write(self.style.WARNING(
+                f"{len(duplicates)} songs duplicate an earlier song's audio: {', '.join(map(str, duplicates))}"
+            ))
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from contextlib import contextmanager
+from api import cache as cache_module
+import asyncio
+import time
+
+class _SlowBackend:
+    """Shared-cache backend that waits `delay` seconds per read, as a remote Redis would."""
+
+    def __init__(self, backend, delay):
+        self.backend = backend
+        self.delay = delay
+
+    def get(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.backend.get(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.backend.get_many(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+class _SlowAsyncCache:
+    """Async shared-cache client that waits `delay` seconds per read without blocking the loop."""
+
+    def __init__(self, shared, delay):
+        self.shared = shared
+        self.delay = delay
+
+    async def get(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await self.shared.get(*args, **kwargs)
+
+    async def get_many(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await self.shared.get_many(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.shared, name)
+
+@contextmanager
+def _swapped(target, name, value):
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+class Command(BaseCommand):
+    help = "Compare requests per worker on the sync (WSGI) and async (ASGI) read paths under I/O-bound load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='/movies/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help="Requests in flight at once on the async worker.")
+        parser.add_argument('--latency', type=float, default=2.0,
+                            help="Milliseconds added to every shared-cache read, standing in for network round trips.")
+
+    def handle(self, *args, **options):
+        path, total, delay = options['path'], options['requests'], options['latency'] / 1000
+
+        # Every request reads the shared cache; ratelimits would cut the run short
+        overrides = override_settings(RATELIMIT_ENABLE=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+        with overrides, _swapped(cache_module.two_tier.local, 'max_entries', 0):
+            cache_module.two_tier.local.clear()
+            sync_client = Client()
+            warm = sync_client.get(path)  # Fill the cache so both runs measure hits
+            if warm.status_code != 200:
+                raise CommandError(f"GET {path} returned {warm.status_code}")
+
+            with _swapped(cache_module.two_tier, 'backend', _SlowBackend(cache_module.two_tier.backend, delay)):
+                start = time.perf_counter()
+                for _ in range(total):
+                    sync_client.get(path)
+                sync_elapsed = time.perf_counter() - start
+
+            with _swapped(cache_module, 'shared_async', _SlowAsyncCache(cache_module.shared_async, delay)):
+                async_elapsed = asyncio.run(self._run_async(path, total, options['concurrency']))
+
+        sync_rate, async_rate = total / sync_elapsed, total / async_elapsed
+        self.stdout.write(f"GET {path}: {total} requests, {options['latency']:g}ms per shared-cache read")
+        self.stdout.write(f"sync  (1 request at a time)       {sync_rate:9.1f} req/s")
+        self.stdout.write(f"async ({options['concurrency']} requests in flight) {async_rate:9.1f} req/s  ({async_rate / sync_rate:.1f}x)")
+
+    async def _run_async(self, path, total, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with limit:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {path} returned {response.status_code} on the async path")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(total)))
+        return time.perf_counter() - start
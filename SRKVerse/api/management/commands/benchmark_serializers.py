@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.models import Movie, Quote, Award
+from api.serializers import MovieSerializer, QuoteSerializer, AwardSerializer
+from api.fast_serializers import ValuesSerializer
+import time
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer and values()-based serialization of the catalog lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0,
+                            help="Seed this many synthetic movies/quotes/awards (rolled back afterwards).")
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                self._seed(options['rows'])
+            for label, serializer_class, queryset in (
+                ('movies', MovieSerializer, Movie.objects.order_by('id')),
+                ('quotes', QuoteSerializer, Quote.objects.order_by('id')),
+                ('awards', AwardSerializer, Award.objects.order_by('id')),
+            ):
+                self._compare(label, serializer_class, queryset, options['iterations'])
+            transaction.set_rollback(True)
+
+    def _seed(self, rows):
+        movies = Movie.objects.bulk_create(
+            Movie(title=f"Benchmark Movie {i}", release_year=1990 + i % 30, rating=i % 10, genres=["Drama"])
+            for i in range(rows)
+        )
+        Quote.objects.bulk_create(
+            Quote(text=f"Benchmark quote {i}", movie=movies[i], tags=["benchmark"]) for i in range(rows)
+        )
+        Award.objects.bulk_create(
+            Award(title=f"Benchmark award {i}", year=1990 + i % 30, type="Filmfare", movie=movies[i])
+            for i in range(rows)
+        )
+
+    def _time(self, fn, iterations):
+        best = float('inf')
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def _compare(self, label, serializer_class, queryset, iterations):
+        fast = ValuesSerializer(serializer_class)
+        model_time, model_data = self._time(
+            lambda: serializer_class.serialize_many(serializer_class.plan_queryset(queryset.all())),
+            iterations
+        )
+        values_time, values_data = self._time(lambda: fast.serialize(queryset.all()), iterations)
+        if list(model_data) != values_data:
+            raise CommandError(f"{label}: values() output differs from {serializer_class.__name__}")
+        speedup = model_time / values_time if values_time else float('inf')
+        self.stdout.write(
+            f"{label:<7} rows={len(values_data):<6} serializer={model_time * 1000:8.2f}ms "
+            f"values={values_time * 1000:8.2f}ms speedup={speedup:5.1f}x"
+        )
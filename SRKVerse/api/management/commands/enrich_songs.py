@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.enrichment import enrich_songs
+from api.models import Song
+
+class Command(BaseCommand):
+    help = "Backfill Spotify metadata (id, preview, popularity, duration) for songs in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Refresh every song, not just those missing metadata.")
+        parser.add_argument('--concurrency', type=int, default=settings.SPOTIFY_ENRICH_CONCURRENCY,
+                            help="Parallel Spotify requests (still bounded by the shared rate limit).")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        songs = Song.objects.all() if options['all'] else None
+        counts = enrich_songs(songs, options['concurrency'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {counts['updated']} songs ({counts['unmatched']} unmatched, {counts['failed']} failed)"
+        ))
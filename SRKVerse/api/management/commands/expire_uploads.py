@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.uploads import expire_uploads
+
+class Command(BaseCommand):
+    help = "Abort chunked uploads left unfinished for longer than CHUNKED_UPLOAD_EXPIRY and free their storage."
+
+    def handle(self, *args, **options):
+        expired = expire_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} unfinished uploads"))
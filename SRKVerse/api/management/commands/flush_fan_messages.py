@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.fan_messages import flush_fan_messages, wait_for_batch
+import logging
+import signal
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Store queued fan messages in batches, once or continuously."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep flushing whenever FAN_MESSAGE_BATCH_SIZE messages are queued "
+                                 "or FAN_MESSAGE_FLUSH_INTERVAL seconds pass.")
+
+    def handle(self, *args, **options):
+        stopping = []
+        if options['loop']:
+            # Finish the batch in hand and drain the queue once more before exiting
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda *args: stopping.append(True))
+        while True:
+            try:
+                flushed = flush_fan_messages()
+                if flushed:
+                    self.stdout.write(f"Stored {flushed} fan messages")
+            except Exception as e:
+                logger.error(f"Fan message flush failed: {str(e)}")
+                if not options['loop']:
+                    raise
+            if not options['loop'] or stopping:
+                return
+            wait_for_batch(settings.FAN_MESSAGE_FLUSH_INTERVAL, should_stop=lambda: bool(stopping))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.votes import flush_pending_votes
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Apply pending fan votes from Redis to FanVote, once or continuously."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep flushing every VOTE_FLUSH_INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                applied = flush_pending_votes()
+                if applied:
+                    self.stdout.write(f"Flushed {applied} votes")
+            except Exception as e:
+                logger.error(f"Vote flush failed: {str(e)}")
+                if not options['loop']:
+                    raise
+            if not options['loop']:
+                return
+            time.sleep(settings.VOTE_FLUSH_INTERVAL)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.tmdb import ingest_filmography
+import time
+
+class Command(BaseCommand):
+    help = "Upsert Shah Rukh Khan's full filmography from TMDb into Movie."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--person-id', type=int,
+                            help="TMDb person id; looked up from TMDB_PERSON_NAME if omitted.")
+        parser.add_argument('--concurrency', type=int, default=settings.TMDB_MAX_CONCURRENCY,
+                            help="Maximum parallel TMDb page requests.")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        start = time.perf_counter()
+        try:
+            count = ingest_filmography(options['person_id'], options['concurrency'])
+        except Exception as e:
+            raise CommandError(f"TMDb ingestion failed: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Upserted {count} movies in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.cache import invalidate_tags
+from api.search import SEARCH_SPECS, search_tags, update_search_vectors
+
+class Command(BaseCommand):
+    help = "Recompute search_vector for every movie, song and quote (e.g. after adding the column)."
+
+    def handle(self, *args, **options):
+        for spec in SEARCH_SPECS.values():
+            rows = update_search_vectors(spec.model)
+            self.stdout.write(f"Indexed {rows} {spec.model._meta.verbose_name_plural}")
+        invalidate_tags(search_tags(SEARCH_SPECS))
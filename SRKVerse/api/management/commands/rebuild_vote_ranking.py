@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.jobs import VOTE_RANKING_REBUILD, enqueue_job
+from api.votes import rebuild_vote_ranking
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis vote ranking from FanVote and pending votes (run periodically to correct drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue', action='store_true',
+                            help="Queue the rebuild as a background job instead of running it here.")
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue_job(VOTE_RANKING_REBUILD, {})
+            self.stdout.write(self.style.SUCCESS(f"Queued {job}"))
+            return
+        ranked = rebuild_vote_ranking()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {ranked} movies"))
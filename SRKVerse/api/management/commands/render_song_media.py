@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.media import process_song_media
+from api.models import Song
+
+class Command(BaseCommand):
+    help = "Render waveform peaks and preview clips for approved songs that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Re-render every approved song, not only those without a waveform.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Render processes (default: MEDIA_WORKERS, one per CPU).")
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+        songs = Song.objects.filter(is_approved=True)
+        if not options['all']:
+            songs = songs.filter(waveform__isnull=True)
+        processed, failed = process_song_media(list(songs.values_list('pk', flat=True)), options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Rendered media for {processed} songs ({failed} failed)"))
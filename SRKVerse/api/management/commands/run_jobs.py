@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.jobs import run_workers
+
+class Command(BaseCommand):
+    help = "Run background job workers (Spotify enrichment, ...) until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS,
+                            help="Worker threads in this process.")
+        parser.add_argument('--drain', action='store_true',
+                            help="Exit once no job is due instead of polling for more.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+        self.stdout.write(f"Starting {options['workers']} job workers")
+        run_workers(options['workers'], drain=options['drain'])
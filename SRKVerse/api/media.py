@@ -0,0 +1,163 @@
+from array import array
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .audio import WAV, expected_format
+from .models import Song
+from .workers import process_pool
+import io
+import logging
+import mutagen
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+
+logger = logging.getLogger(__name__)
+
+PCM_RATE = 8000  # Sample rate ffmpeg decodes to for peaks; plenty for a drawn waveform
+CLIP_BLOCK_FRAMES = 65536
+# Settings render_media reads, copied into pool workers so overrides apply there too
+RENDER_SETTINGS = ['MEDIA_ROOT', 'MEDIA_WAVEFORM_POINTS', 'MEDIA_PREVIEW_SECONDS', 'MEDIA_PREVIEW_START', 'FFMPEG_BINARY']
+
+class MediaError(Exception):
+    pass
+
+def _peak(data, sample_width):
+    """Loudest sample in a block of PCM bytes, scaled to 0-255."""
+    if not data:
+        return 0
+    if sample_width == 1:  # Unsigned 8-bit, silence at 128
+        return min(max(max(data) - 128, 128 - min(data)) * 2, 255)
+    samples = array('h', data)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return max(max(samples), -min(samples)) * 255 // 32768
+
+def _waveform(read_frames, total_frames, sample_width):
+    """Reduce PCM to about MEDIA_WAVEFORM_POINTS peaks, one byte each, reading one point's frames at a time."""
+    points = max(min(settings.MEDIA_WAVEFORM_POINTS, total_frames), 1)
+    frames_per_point = -(-max(total_frames, 1) // points)
+    peaks = bytearray()
+    while True:
+        data = read_frames(frames_per_point)
+        if not data:
+            return bytes(peaks)
+        peaks.append(_peak(data, sample_width))
+
+def _preview_window(duration):
+    """(start, length) in seconds of the preview clip, starting MEDIA_PREVIEW_START into the song."""
+    length = min(settings.MEDIA_PREVIEW_SECONDS, duration)
+    return max(min(duration * settings.MEDIA_PREVIEW_START, duration - length), 0), length
+
+def _render_wav(path):
+    with wave.open(path, 'rb') as wav:
+        params = wav.getparams()
+        if params.sampwidth not in (1, 2):
+            raise MediaError(f"Unsupported WAV sample width: {params.sampwidth * 8} bits")
+        peaks = _waveform(wav.readframes, params.nframes, params.sampwidth)
+
+        start, length = _preview_window(params.nframes / params.framerate)
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as clip:
+            clip.setparams(params)  # Frame count is corrected on close
+            wav.setpos(int(start * params.framerate))
+            remaining = int(length * params.framerate)
+            while remaining > 0:
+                data = wav.readframes(min(remaining, CLIP_BLOCK_FRAMES))
+                if not data:
+                    break
+                clip.writeframes(data)
+                remaining -= len(data) // (params.sampwidth * params.nchannels)
+    return peaks, buffer.getvalue()
+
+def _render_with_ffmpeg(path):
+    ffmpeg = shutil.which(settings.FFMPEG_BINARY)
+    if ffmpeg is None:
+        raise MediaError(f"'{settings.FFMPEG_BINARY}' is required to decode {os.path.basename(path)}")
+    duration = mutagen.File(path).info.length
+
+    decode = subprocess.Popen(
+        [ffmpeg, '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(PCM_RATE), '-'],
+        stdout=subprocess.PIPE
+    )
+    with decode:
+        peaks = _waveform(lambda frames: decode.stdout.read(frames * 2), int(duration * PCM_RATE), 2)
+    if decode.returncode:
+        raise MediaError(f"ffmpeg could not decode {os.path.basename(path)}")
+
+    start, length = _preview_window(duration)
+    clip = subprocess.run(
+        [ffmpeg, '-v', 'error', '-ss', str(start), '-t', str(length), '-i', path, '-c', 'copy', '-f', 'mp3', '-'],
+        capture_output=True, check=True
+    ).stdout
+    return peaks, clip
+
+@contextmanager
+def _local_path(name):
+    """Yield a filesystem path for a stored file, copying it to a temporary file if storage is remote."""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with default_storage.open(name, 'rb') as stored, tempfile.NamedTemporaryFile(suffix=os.path.splitext(name)[1]) as local:
+        for chunk in stored.chunks():
+            local.write(chunk)
+        local.flush()
+        yield local.name
+
+def render_media(name):
+    """Process-pool worker: return (waveform peaks, preview clip, clip extension) for stored audio, or None.
+
+    WAV is decoded with the standard library; MP3 needs ffmpeg, whose preview
+    is a frame-exact copy of the original stream rather than a re-encode.
+    """
+    try:
+        with _local_path(name) as path:
+            if expected_format(name) == WAV:
+                return (*_render_wav(path), '.wav')
+            return (*_render_with_ffmpeg(path), '.mp3')
+    except Exception as e:
+        logger.error(f"Could not render media for '{name}': {str(e)}")
+        return None
+
+def process_song_media(song_ids, workers=None, on_rendered=None):
+    """Generate waveform peaks and preview clips for approved songs, in parallel processes.
+
+    Decoding is CPU-bound, so each file is rendered on a process pool; the
+    parent then stores the clips and updates the songs in one bulk write,
+    which also refreshes cached song responses. `on_rendered` is called as
+    each song finishes (the job queue renews its lease there). Returns
+    (processed, failed).
+    """
+    songs = list(
+        Song.objects.select_related('movie').filter(pk__in=song_ids, is_approved=True)
+        .exclude(audio_file='').exclude(audio_file__isnull=True)
+    )
+    if not songs:
+        return 0, 0
+    results = []
+    with process_pool(len(songs), workers or settings.MEDIA_WORKERS, settings_names=RENDER_SETTINGS) as pool:
+        for result in pool.map(render_media, [song.audio_file.name for song in songs]):
+            results.append(result)
+            if on_rendered is not None:
+                on_rendered()
+
+    processed = []
+    for song, result in zip(songs, results):
+        if result is None:
+            continue
+        peaks, clip, extension = result
+        if song.preview_clip:
+            song.preview_clip.delete(save=False)
+        song.preview_clip.save(f'{song.pk}{extension}', ContentFile(clip), save=False)
+        song.waveform = peaks
+        processed.append(song)
+    Song.objects.bulk_update(processed, ['waveform', 'preview_clip'])
+    return len(processed), len(songs) - len(processed)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import status
+from .ratelimit import limiter
+import asyncio
+
+@sync_and_async_middleware
+def async_urlconf_middleware(get_response):
+    """Route requests that arrive over ASGI through ASYNC_ROOT_URLCONF, where the read endpoints are async views."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if isinstance(request, ASGIRequest):
+                request.urlconf = settings.ASYNC_ROOT_URLCONF
+            return await get_response(request)
+    else:
+        def middleware(request):
+            if isinstance(request, ASGIRequest):
+                request.urlconf = settings.ASYNC_ROOT_URLCONF
+            return get_response(request)
+    return middleware
+
+def _limited_response(decision):
+    if decision.allowed:
+        return None
+    response = JsonResponse({"error": "Rate limit exceeded"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(max(decision.retry_after, 1))
+    return response
+
+def _add_ratelimit_headers(response, decision, elapsed_ms):
+    response['RateLimit-Limit'] = str(decision.limit)
+    response['RateLimit-Remaining'] = str(decision.remaining)
+    response['RateLimit-Reset'] = str(decision.reset)
+    response['RateLimit-Policy'] = f'{decision.limit};w={decision.policy.window}'
+    response['Server-Timing'] = f'ratelimit;dur={elapsed_ms:.3f}'
+    return response
+
+@sync_and_async_middleware
+def ratelimit_middleware(get_response):
+    """Apply RATELIMIT_POLICIES to every request before it reaches a view (see api.ratelimit).
+
+    Limited routes get RateLimit-* headers and the limiter's own time as
+    Server-Timing; rejected requests get a 429 with Retry-After.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not getattr(settings, 'RATELIMIT_ENABLE', True):
+                return await get_response(request)
+            decision, elapsed_ms = await limiter.acheck(request)
+            if decision is None:
+                return await get_response(request)
+            response = _limited_response(decision) or await get_response(request)
+            return _add_ratelimit_headers(response, decision, elapsed_ms)
+    else:
+        def middleware(request):
+            if not getattr(settings, 'RATELIMIT_ENABLE', True):
+                return get_response(request)
+            decision, elapsed_ms = limiter.check(request)
+            if decision is None:
+                return get_response(request)
+            response = _limited_response(decision) or get_response(request)
+            return _add_ratelimit_headers(response, decision, elapsed_ms)
+    return middleware
@@ -0,0 +1,160 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Movie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.IntegerField(blank=True, null=True, unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('release_year', models.IntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('role', models.CharField(blank=True, max_length=100)),
+                ('poster_path', models.CharField(blank=True, max_length=255)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('genres', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('event', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'id'], name='api_timelin_year_6d9719_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Song',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('composer', models.CharField(blank=True, max_length=100)),
+                ('lyricist', models.CharField(blank=True, max_length=100)),
+                ('audio_file', models.FileField(blank=True, null=True, upload_to='songs/')),
+                ('spotify_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('youtube_link', models.URLField(blank=True, null=True)),
+                ('preview_url', models.URLField(blank=True, null=True)),
+                ('popularity', models.IntegerField(blank=True, null=True)),
+                ('duration', models.IntegerField(blank=True, null=True)),
+                ('bitrate', models.IntegerField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True)),
+                ('waveform', models.BinaryField(blank=True, null=True)),
+                ('preview_clip', models.FileField(blank=True, null=True, upload_to='previews/')),
+                ('is_approved', models.BooleanField(default=False)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='songs', to='api.movie')),
+            ],
+            options={
+                'unique_together': {('title', 'movie')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Quote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('context', models.TextField(blank=True)),
+                ('tags', models.JSONField(default=list)),
+                ('movie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='quotes', to='api.movie')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FanVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vote_count', models.IntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fan_votes', to='api.movie')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FanMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ingest_id', models.UUIDField(editable=False, null=True, unique=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='api_fanmess_created_f1d546_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('composer', models.CharField(blank=True, max_length=100)),
+                ('lyricist', models.CharField(blank=True, max_length=100)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('chunk_size', models.IntegerField()),
+                ('received_chunks', models.IntegerField(default=0)),
+                ('storage_name', models.CharField(blank=True, max_length=255)),
+                ('multipart_id', models.CharField(blank=True, max_length=255)),
+                ('parts', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='api.movie')),
+                ('song', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chunked_upload', to='api.song')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('dead', 'Dead')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=5)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_at'], name='api_job_status_bbd164_idx'), models.Index(fields=['status', 'locked_until'], name='api_job_status_f94d7e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Award',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('year', models.IntegerField()),
+                ('type', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('movie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='awards', to='api.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'id'], name='api_award_year_88dc3c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:59
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def search_trigger(table, weights):
+    """Keep `table`.search_vector current on write, as api.search.search_vector() builds it."""
+    vector = ' || '.join(
+        f"setweight(to_tsvector('english', COALESCE(NEW.\"{column}\"::text, '')), '{weight}')"
+        for column, weight in weights.items()
+    )
+    columns = ', '.join(f'"{column}"' for column in weights)
+    name = f'{table}_search_vector'
+    return migrations.RunSQL(
+        [
+            f"""CREATE FUNCTION {name}() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {vector};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+            f"""CREATE TRIGGER {name} BEFORE INSERT OR UPDATE OF {columns} ON {table}
+FOR EACH ROW EXECUTE PROCEDURE {name}()""",
+        ],
+        reverse_sql=[f'DROP TRIGGER {name} ON {table}', f'DROP FUNCTION {name}()'],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        # The trigram indexes need pg_trgm
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='movie',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='movie_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='movie_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='quote_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['text'], name='quote_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='song_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='song_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        # Computed inside the statement that writes a row; updates that touch
+        # no searchable column do not fire the trigger
+        search_trigger('api_movie', {'title': 'A', 'description': 'B', 'role': 'C'}),
+        search_trigger('api_song', {'title': 'A', 'composer': 'B', 'lyricist': 'B'}),
+        search_trigger('api_quote', {'text': 'A', 'context': 'B'}),
+    ]
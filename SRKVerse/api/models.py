@@ -1,6 +1,111 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
+from django.dispatch import Signal
+import math
+import uuid
 
-class Movie(models.Model):
+# Sent with the cache tags of the rows touched by a bulk write that bypasses
+# post_save (QuerySet.update, bulk_create, bulk_update), before and after it.
+post_bulk_write = Signal()
+
+class CacheTaggedQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes announce the tags of the rows they touched for cache invalidation.
+
+    Tags are read with one values() query over the model's tag columns, and
+    a second one after the write only if it can change them.
+    """
+
+    def update(self, **kwargs):
+        model = self.model
+        if not model.changes_cache_tags(kwargs):
+            tags = model.tags_of(self)
+            rows = super().update(**kwargs)
+        else:
+            before = list(self.values('pk', *model.cache_tag_fields))
+            rows = super().update(**kwargs)
+            tags = {tag for row in before for tag in model.tags_for(row)}
+            tags |= model.tags_of(model._base_manager.filter(pk__in=[row['pk'] for row in before]))
+        post_bulk_write.send(sender=model, tags=tags)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        model = self.model
+        tags = set()
+        unique_fields = kwargs.get('unique_fields')
+        if kwargs.get('update_conflicts') and unique_fields and model.changes_cache_tags(kwargs.get('update_fields') or ()):
+            # Rows an upsert overwrites come back without pks, so their old tags are read up front
+            if len(unique_fields) == 1:
+                existing = models.Q(**{f'{unique_fields[0]}__in': [getattr(obj, unique_fields[0]) for obj in objs]})
+            else:
+                existing = models.Q()
+                for obj in objs:
+                    existing |= models.Q(**{field: getattr(obj, field) for field in unique_fields})
+            tags = model.tags_of(model._base_manager.filter(existing))
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_write.send(sender=model, tags=tags | model.tags_of_instances(objs))
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        model = self.model
+        tags = set()
+        if model.changes_cache_tags(fields):
+            tags = model.tags_of(model._base_manager.filter(pk__in=[obj.pk for obj in objs]))
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        post_bulk_write.send(sender=model, tags=tags | model.tags_of_instances(objs))
+        return rows
+
+class CacheTaggedModel(models.Model):
+    """A model whose rows tag cached responses.
+
+    A row's tags come from tags_for() applied to the values() lookups in
+    cache_tag_fields, so the tags of many rows (including related columns
+    such as movie__title) are read with one query.
+    """
+    cache_tag_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def tags_for(row):
+        raise NotImplementedError
+
+    def cache_tags(self):
+        row = {}
+        for lookup in self.cache_tag_fields:
+            value = self
+            for name in lookup.split('__'):
+                value = None if value is None else getattr(value, name)
+            row[lookup] = value
+        return self.tags_for(row)
+
+    @classmethod
+    def tags_of(cls, queryset):
+        """Tags of every row in `queryset`, in one values() query (none if the tags are constant)."""
+        if not cls.cache_tag_fields:
+            return set(cls.tags_for({}))
+        return {tag for row in queryset.values(*cls.cache_tag_fields) for tag in cls.tags_for(row)}
+
+    @classmethod
+    def tags_of_instances(cls, objs):
+        """Tags of saved instances, reading related columns in one query rather than one per instance."""
+        pks = [obj.pk for obj in objs]
+        if pks and None not in pks and any('__' in lookup for lookup in cls.cache_tag_fields):
+            return cls.tags_of(cls._base_manager.filter(pk__in=pks))
+        return {tag for obj in objs for tag in obj.cache_tags()}
+
+    @classmethod
+    def changes_cache_tags(cls, fields):
+        """Whether writing `fields` can change a row's tags."""
+        roots = {lookup.split('__')[0] for lookup in cls.cache_tag_fields}
+        return any(cls._meta.get_field(field).name in roots for field in fields)
+
+class Movie(CacheTaggedModel):
     tmdb_id = models.IntegerField(unique=True, null=True, blank=True)
     title = models.CharField(max_length=255)
     release_year = models.IntegerField(null=True, blank=True)
@@ -9,11 +114,28 @@ class Movie(models.Model):
     poster_path = models.CharField(max_length=255, blank=True)
     rating = models.FloatField(null=True, blank=True)
     genres = models.JSONField(default=list)
+    search_vector = SearchVectorField(null=True, editable=False)  # Maintained by a trigger, see migration 0002_search
+
+    objects = CacheTaggedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='movie_search_vector_idx'),
+            GinIndex(fields=['title'], name='movie_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.title
 
-class Song(models.Model):
+    cache_tag_fields = ('release_year', 'title', 'genres')
+
+    @staticmethod
+    def tags_for(row):
+        tags = ['movies', f"movies:year:{row['release_year']}", f"movies:title:{row['title'].lower()}"]
+        tags += [f'movies:genre:{str(genre).lower()}' for genre in row['genres'] or []]
+        return tags
+
+class Song(CacheTaggedModel):
     title = models.CharField(max_length=255)
     movie = models.ForeignKey(Movie, related_name='songs', on_delete=models.CASCADE)
     composer = models.CharField(max_length=100, blank=True)
@@ -24,52 +146,189 @@ class Song(models.Model):
     preview_url = models.URLField(blank=True, null=True)
     popularity = models.IntegerField(null=True, blank=True)
     duration = models.IntegerField(null=True, blank=True)  # In seconds
+    bitrate = models.IntegerField(null=True, blank=True)  # In kbps, read from the upload
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)  # SHA-256 of audio_file
+    waveform = models.BinaryField(null=True, blank=True)  # One peak byte (0-255) per point, from api.media
+    preview_clip = models.FileField(upload_to='previews/', blank=True, null=True)  # Short excerpt, from api.media
     is_approved = models.BooleanField(default=False)  # Admin approval for user uploads
+    search_vector = SearchVectorField(null=True, editable=False)  # Maintained by a trigger, see migration 0002_search
+
+    objects = CacheTaggedQuerySet.as_manager()
 
     class Meta:
         unique_together = ('title', 'movie')
+        indexes = [
+            GinIndex(fields=['search_vector'], name='song_search_vector_idx'),
+            GinIndex(fields=['title'], name='song_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.movie.title}"
 
-class Quote(models.Model):
+    cache_tag_fields = ('movie__title',)
+
+    @staticmethod
+    def tags_for(row):
+        return ['songs', f"songs:movie:{row['movie__title'].lower()}"]
+
+class Quote(CacheTaggedModel):
     text = models.TextField()
     movie = models.ForeignKey(Movie, related_name='quotes', on_delete=models.CASCADE, null=True, blank=True)
     context = models.TextField(blank=True)
     tags = models.JSONField(default=list)
+    search_vector = SearchVectorField(null=True, editable=False)  # Maintained by a trigger, see migration 0002_search
+
+    objects = CacheTaggedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='quote_search_vector_idx'),
+            GinIndex(fields=['text'], name='quote_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.text
 
-class Award(models.Model):
+    cache_tag_fields = ('tags', 'movie__title')
+
+    @staticmethod
+    def tags_for(row):
+        tags = ['quotes'] + [f'quotes:tag:{str(tag).lower()}' for tag in row['tags'] or []]
+        if row['movie__title'] is not None:
+            tags.append(f"quotes:movie:{row['movie__title'].lower()}")
+        return tags
+
+class Award(CacheTaggedModel):
     title = models.CharField(max_length=255)
     year = models.IntegerField()
     type = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     movie = models.ForeignKey(Movie, related_name='awards', on_delete=models.CASCADE, null=True, blank=True)
 
+    objects = CacheTaggedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['year', 'id'])]  # Keyset pagination order
+
     def __str__(self):
         return f"{self.title} ({self.year})"
 
-class Timeline(models.Model):
+    cache_tag_fields = ('year', 'type')
+
+    @staticmethod
+    def tags_for(row):
+        return ['awards', f"awards:year:{row['year']}", f"awards:type:{row['type'].lower()}"]
+
+class Timeline(CacheTaggedModel):
     year = models.IntegerField()
     event = models.CharField(max_length=255)
     description = models.TextField(blank=True)
 
+    objects = CacheTaggedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['year', 'id'])]  # Keyset pagination order
+
     def __str__(self):
         return f"{self.event} ({self.year})"
 
-class FanVote(models.Model):
+    cache_tag_fields = ('year',)
+
+    @staticmethod
+    def tags_for(row):
+        return ['timeline', f"timeline:year:{row['year']}"]
+
+class FanVote(CacheTaggedModel):
     movie = models.ForeignKey(Movie, related_name='fan_votes', on_delete=models.CASCADE)
     vote_count = models.IntegerField(default=0)
 
+    objects = CacheTaggedQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.movie.title}: {self.vote_count} votes"
 
-class FanMessage(models.Model):
+    @staticmethod
+    def tags_for(row):
+        return ['votes']
+
+class FanMessage(CacheTaggedModel):
     name = models.CharField(max_length=100)
     message = models.TextField()
+    # Set when the message is submitted, not when the write-behind flush stores it
+    created_at = models.DateTimeField(default=timezone.now)
+    # Assigned on submission so a batch replayed after a failed flush is not stored twice
+    ingest_id = models.UUIDField(unique=True, null=True, editable=False)
+
+    objects = CacheTaggedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['-created_at', '-id'])]  # Newest-first keyset pagination order
+
+    def __str__(self):
+        return f"{self.name}: {self.message}"
+
+    @staticmethod
+    def tags_for(row):
+        return ['fan_messages']
+
+class Job(models.Model):
+    """Unit of background work, leased to one worker at a time (see api.jobs)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    DEAD = 'dead'  # Out of attempts; kept for inspection and manual requeue
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (DEAD, 'Dead')]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # Not claimable before this
+    locked_until = models.DateTimeField(null=True, blank=True)  # Lease expiry while running
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_by = models.ForeignKey(  # Who may follow it via the job status endpoint; None for system jobs
+        settings.AUTH_USER_MODEL, related_name='jobs', on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+            models.Index(fields=['status', 'locked_until']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+class ChunkedUpload(models.Model):
+    """Resumable song upload, assembled chunk by chunk in storage (see api.uploads)."""
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)  # Public id in upload URLs
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='chunked_uploads', on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    movie = models.ForeignKey(Movie, related_name='chunked_uploads', on_delete=models.CASCADE)
+    composer = models.CharField(max_length=100, blank=True)
+    lyricist = models.CharField(max_length=100, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()  # Total bytes announced at init
+    chunk_size = models.IntegerField()
+    received_chunks = models.IntegerField(default=0)  # Chunks 0..received_chunks-1 are stored
+    storage_name = models.CharField(max_length=255, blank=True)
+    multipart_id = models.CharField(max_length=255, blank=True)  # S3 UploadId
+    parts = models.JSONField(default=list)  # S3 part ETags, by chunk index
+    song = models.OneToOneField(Song, related_name='chunked_upload', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.name}: {self.message}"
\ No newline at end of file
+        return f"{self.filename} ({self.received_chunks}/{self.chunk_count} chunks)"
+
+    @property
+    def chunk_count(self):
+        return max(math.ceil(self.size / self.chunk_size), 1)
+
+    def chunk_length(self, index):
+        """Exact byte length chunk `index` must have; only the last one may be short."""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
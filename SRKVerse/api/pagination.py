@@ -0,0 +1,232 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse, QueryDict
+from rest_framework import status
+from rest_framework.response import Response
+from .cache import acached_entry, cached_entry, entry_http_response, entry_response, get_or_fill, render_entry, tagged_key
+from collections import namedtuple
+import base64
+import binascii
+import inspect
+import json
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_position'])
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(position):
+    """Encode the ordering values of the last row served into an opaque cursor.
+
+    Datetimes are encoded as ISO 8601 strings, which the ORM accepts back in lookups.
+    """
+    raw = json.dumps(position, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, ordering):
+    """Decode a cursor back into ordering values, rejecting anything malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(position, list) or len(position) != len(ordering):
+        raise InvalidCursor("Invalid cursor")
+    if not all(value is None or isinstance(value, (str, int, float)) for value in position):
+        raise InvalidCursor("Invalid cursor")
+    return position
+
+def _after(ordering, position):
+    """Build the keyset predicate for rows strictly after `position` in `ordering`."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+def _typed_position(model, ordering, position):
+    """Convert a decoded position to the ordering fields' types, rejecting values that do not fit."""
+    try:
+        position = [
+            model._meta.get_field(field.lstrip('-')).to_python(value) for field, value in zip(ordering, position)
+        ]
+    except (ValidationError, ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if any(value is None for value in position):
+        raise InvalidCursor("Invalid cursor")
+    return position
+
+def keyset_page(queryset, ordering, position, page_size):
+    """Fetch one page after `position` using an index-friendly seek instead of OFFSET.
+
+    Raises InvalidCursor if `position` does not fit the ordering fields.
+    """
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = queryset.filter(_after(ordering, _typed_position(queryset.model, ordering, position)))
+    items = list(queryset[:page_size + 1])
+    if len(items) <= page_size:
+        return KeysetPage(items, None)
+    items = items[:page_size]
+    last = items[-1]
+    if isinstance(last, dict):  # values() rows
+        return KeysetPage(items, [last[field.lstrip('-')] for field in ordering])
+    return KeysetPage(items, [getattr(last, field.lstrip('-')) for field in ordering])
+
+async def akeyset_page(queryset, ordering, position, page_size):
+    """Async twin of keyset_page(), fetching the page with async iteration."""
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = queryset.filter(_after(ordering, _typed_position(queryset.model, ordering, position)))
+    items = [item async for item in queryset[:page_size + 1]]
+    if len(items) <= page_size:
+        return KeysetPage(items, None)
+    items = items[:page_size]
+    last = items[-1]
+    if isinstance(last, dict):
+        return KeysetPage(items, [last[field.lstrip('-')] for field in ordering])
+    return KeysetPage(items, [getattr(last, field.lstrip('-')) for field in ordering])
+
+def _page_size(request):
+    # request.GET rather than DRF's query_params, so plain (async) Django views can share this
+    value = request.GET.get('page_size')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+def _page_entry(name, page_size, position, timeout):
+    """The cache name and timeout for one page of a list.
+
+    Pages after the first are keyed on the decoded position, re-encoded, so
+    every spelling of a cursor shares one entry, and expire after
+    CURSOR_PAGE_CACHE_TIMEOUT: the positions clients page through go stale
+    as the list changes, and there is one entry per position.
+    """
+    if position is None:
+        return f'{name}:page:{page_size}:', timeout
+    timeout = min(timeout or settings.RESPONSE_CACHE_TIMEOUT, settings.CURSOR_PAGE_CACHE_TIMEOUT)
+    return f'{name}:page:{page_size}:{encode_cursor(position)}', timeout
+
+def _page(items, next_position):
+    """Render a page's entry; the next cursor is stored bare, since entries are shared across query strings."""
+    entry = render_entry(items)
+    entry['next_cursor'] = encode_cursor(next_position) if next_position is not None else None
+    return entry
+
+def _with_next_link(request, response, entry):
+    """Advertise the following page, keeping this request's own query parameters."""
+    if entry.get('next_cursor'):
+        params = QueryDict(mutable=True)
+        params.update(request.GET)
+        params['cursor'] = entry['next_cursor']
+        response['Link'] = f'<{request.path}?{params.urlencode()}>; rel="next"'
+    return response
+
+def paginated_response(request, name, get_queryset, serializer, ordering=('id',), tags=(), timeout=None):
+    """Serve one cursor-paginated page of a list endpoint, caching each page on its own.
+
+    `serializer` is a PlannedModelSerializer class or a ValuesSerializer;
+    both plan the queryset and serialize the page's rows.
+
+    The body stays a plain JSON array; the cursor for the following page is
+    advertised in a `Link: <...>; rel="next"` header. Returns None when
+    `get_queryset` returns None (e.g. the parent object does not exist).
+    """
+    cursor = request.query_params.get('cursor')
+    try:
+        page_size = _page_size(request)
+        position = decode_cursor(cursor, ordering) if cursor else None
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({"error": "page_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    def fill():
+        queryset = get_queryset()
+        if queryset is None:
+            return None
+        queryset = serializer.plan_queryset(queryset)
+        page = keyset_page(queryset, ordering, position, page_size)
+        return _page(serializer.serialize_many(page.items), page.next_position)
+
+    key, page_timeout = _page_entry(name, page_size, position, timeout)
+    try:
+        entry = cached_entry(key, fill, tags, page_timeout)
+    except InvalidCursor:  # Well-formed, but not values of the ordering fields
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    if entry is None:
+        return None
+    return _with_next_link(request, entry_response(request, entry), entry)
+
+async def apaginated_response(request, name, get_queryset, serializer, ordering=('id',), tags=(), timeout=None):
+    """Async twin of paginated_response() for plain Django async views.
+
+    `get_queryset` may be a coroutine function, for lookups that must query
+    before they can build the queryset. Errors come back as JsonResponse.
+    """
+    cursor = request.GET.get('cursor')
+    try:
+        page_size = _page_size(request)
+        position = decode_cursor(cursor, ordering) if cursor else None
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return JsonResponse({"error": "page_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def fill():
+        queryset = get_queryset()
+        if inspect.isawaitable(queryset):
+            queryset = await queryset
+        if queryset is None:
+            return None
+        queryset = serializer.plan_queryset(queryset)
+        page = await akeyset_page(queryset, ordering, position, page_size)
+        return _page(serializer.serialize_many(page.items), page.next_position)
+
+    key, page_timeout = _page_entry(name, page_size, position, timeout)
+    try:
+        entry = await acached_entry(key, fill, tags, page_timeout)
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    if entry is None:
+        return None
+    return _with_next_link(request, entry_http_response(request, entry), entry)
+
+def ranked_response(request, name, get_results, tags=(), timeout=None):
+    """Serve one cursor-paginated page of a computed, ranked result list.
+
+    For results ordered by a score rather than an indexed column, e.g. search
+    hits: `get_results` returns the full (bounded) ranked list, which is
+    cached once under `tags` and sliced per page, so later pages cost no
+    query. The cursor is an opaque offset into that list.
+    """
+    cursor = request.query_params.get('cursor')
+    try:
+        page_size = _page_size(request)
+        offset = decode_cursor(cursor, ('offset',))[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursor("Invalid cursor")
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({"error": "page_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    def fill():
+        results = get_or_fill(
+            tagged_key(f'{name}:results', tags), get_results,
+            timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT
+        )
+        next_position = [offset + page_size] if offset + page_size < len(results) else None
+        return _page(results[offset:offset + page_size], next_position)
+
+    key, page_timeout = _page_entry(name, page_size, [offset] if offset else None, timeout)
+    entry = cached_entry(key, fill, tags, page_timeout)
+    return _with_next_link(request, entry_response(request, entry), entry)
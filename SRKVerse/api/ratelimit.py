@@ -0,0 +1,262 @@
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .cache import get_redis, shared_async
+from collections import OrderedDict, namedtuple
+import bisect
+import math
+import threading
+import time
+
+# Sliding-window counter: the current fixed window's count plus the previous
+# window's, weighted by how much of it still overlaps the sliding window.
+# ARGV[3] requests were already admitted from a worker's shadow counter and
+# are added unconditionally; then one more is admitted if it fits. Uses the
+# Redis clock so every process agrees on window boundaries. Returns
+# {allowed, remaining, ms until the window rolls over, ms until a retry can succeed}.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local unreported = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local index = math.floor(now / window)
+local elapsed = now - index * window
+local current_key = KEYS[1] .. ':' .. index
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (index - 1))) or 0
+local current = (tonumber(redis.call('GET', current_key)) or 0) + unreported
+local weighted = previous * (window - elapsed) / window
+local allowed = 0
+if weighted + current + 1 <= limit then
+    allowed = 1
+    current = current + 1
+end
+if unreported + allowed > 0 then
+    redis.call('INCRBY', current_key, unreported + allowed)
+    redis.call('PEXPIRE', current_key, window * 2)
+end
+local retry = 0
+if allowed == 0 then
+    if current + 1 > limit or previous == 0 then
+        retry = window - elapsed
+    else
+        retry = math.ceil(window - elapsed - (limit - current - 1) * window / previous)
+    end
+end
+return {allowed, math.max(math.floor(limit - weighted - current), 0), window - elapsed, retry}
+"""
+
+Policy = namedtuple('Policy', ['name', 'methods', 'key', 'window', 'limits'])
+Decision = namedtuple('Decision', ['allowed', 'limit', 'remaining', 'reset', 'retry_after', 'policy'])
+
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50)
+
+def load_policies():
+    """Compile RATELIMIT_POLICIES into {url name or '*': [Policy, ...]}."""
+    table = {}
+    for name, spec in settings.RATELIMIT_POLICIES.items():
+        policy = Policy(
+            name, frozenset(method.upper() for method in spec['methods']), spec.get('key', 'ip'),
+            spec['window'], spec['limits']
+        )
+        routes = spec['routes']
+        for route in ['*'] if routes == '*' else routes:
+            table.setdefault(route, []).append(policy)
+    return table
+
+def _authenticated_user(request):
+    """The user id of a valid JWT bearer token, without a database lookup, or None."""
+    header = request.headers.get('Authorization', '')
+    scheme, _, raw = header.partition(' ')
+    if scheme not in jwt_settings.AUTH_HEADER_TYPES or not raw:
+        return None
+    try:
+        return AccessToken(raw.strip())[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+class ShadowEntry:
+    __slots__ = ('remaining', 'synced_at', 'reset_at', 'unreported')
+
+    def __init__(self, remaining, synced_at, reset_at):
+        self.remaining = remaining
+        self.synced_at = synced_at
+        self.reset_at = reset_at
+        self.unreported = 0
+
+class RateLimiter:
+    """Applies the RATELIMIT_POLICIES table with one sliding-window script call per request.
+
+    Each worker keeps a shadow of the last answer Redis gave for every
+    client. While a client has used less than RATELIMIT_SHADOW_SHARE of the
+    headroom Redis last reported, and that answer is under
+    RATELIMIT_SHADOW_TTL seconds old, requests are admitted locally; the
+    count is sent with the client's next script call, so nothing goes
+    uncounted. Across W workers a client can overshoot by at most
+    W x RATELIMIT_SHADOW_SHARE of its remaining headroom.
+
+    Without Redis, windows are counted per process. Time spent deciding is
+    recorded per request, see stats().
+    """
+
+    def __init__(self):
+        self._policies = None
+        self._script = None
+        self._async_scripts = {}
+        self._lock = threading.Lock()
+        self._shadow = OrderedDict()
+        self._local_windows = {}
+        self.counts = {'requests': 0, 'shadow_hits': 0, 'shared_calls': 0, 'rejected': 0}
+        self._latency_total = 0.0
+        self._latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    @property
+    def policies(self):
+        if self._policies is None:
+            self._policies = load_policies()
+        return self._policies
+
+    def match(self, request):
+        """Return (Policy, counter key, limit) for a request, or None if no policy covers it."""
+        try:
+            match = resolve(request.path_info, urlconf=getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        if match.namespace:  # e.g. the admin
+            return None
+        listed = [policy for policy in self.policies.get(match.url_name, []) if request.method in policy.methods]
+        wildcard = [policy for policy in self.policies.get('*', []) if request.method in policy.methods]
+        if not listed and not wildcard:
+            return None
+        policy = (listed or wildcard)[0]
+        # Routes listed by name share their policy's counter; '*' counts each route on its own
+        scope = policy.name if listed else f'{policy.name}:{match.url_name}'
+        user_id = _authenticated_user(request)
+        limit = policy.limits.get('anonymous' if user_id is None else 'authenticated', policy.limits['anonymous'])
+        if limit is None:  # Unlimited for this tier
+            return None
+        if policy.key == 'user_or_ip' and user_id is not None:
+            client = f'user:{user_id}'
+        else:
+            client = f'ip:{request.META.get("REMOTE_ADDR", "")}'
+        # One hash slot per counter, so the script's derived keys work on Redis Cluster
+        return policy, f'ratelimit:{{{scope}:{client}}}', limit
+
+    def _from_shadow(self, key, policy, limit):
+        """Admit locally if the shadow allows it; otherwise return the count to report to Redis."""
+        with self._lock:
+            entry = self._shadow.get(key)
+            if entry is None:
+                return None, 0
+            now = time.monotonic()
+            fresh = now - entry.synced_at < settings.RATELIMIT_SHADOW_TTL and now < entry.reset_at
+            if fresh and entry.unreported + 1 <= entry.remaining * settings.RATELIMIT_SHADOW_SHARE:
+                entry.unreported += 1
+                self.counts['shadow_hits'] += 1
+                return Decision(
+                    True, limit, entry.remaining - entry.unreported, math.ceil(entry.reset_at - now), 0, policy
+                ), 0
+            unreported, entry.unreported = entry.unreported, 0
+            return None, unreported
+
+    def _remember(self, key, policy, limit, result, started):
+        allowed, remaining, reset_ms, retry_ms = (int(value) for value in result)
+        with self._lock:
+            self.counts['shared_calls'] += 1
+            self._shadow[key] = ShadowEntry(remaining, started, started + reset_ms / 1000)
+            self._shadow.move_to_end(key)
+            while len(self._shadow) > settings.RATELIMIT_SHADOW_MAX_ENTRIES:
+                self._shadow.popitem(last=False)
+        return Decision(bool(allowed), limit, remaining, math.ceil(reset_ms / 1000), math.ceil(retry_ms / 1000), policy)
+
+    def _local(self, key, policy, limit):
+        """The sliding-window script, for a single process without Redis."""
+        window = policy.window * 1000
+        with self._lock:
+            now = time.time() * 1000
+            index = int(now // window)
+            elapsed = now - index * window
+            counts = self._local_windows.get(key, {})
+            previous, current = counts.get(index - 1, 0), counts.get(index, 0)
+            weighted = previous * (window - elapsed) / window
+            allowed = weighted + current + 1 <= limit
+            current += allowed
+            self._local_windows[key] = {index - 1: previous, index: current}
+        if allowed:
+            retry = 0
+        elif current + 1 > limit or previous == 0:
+            retry = window - elapsed
+        else:
+            retry = window - elapsed - (limit - current - 1) * window / previous
+        return Decision(
+            allowed, limit, max(math.floor(limit - weighted - current), 0),
+            math.ceil((window - elapsed) / 1000), math.ceil(retry / 1000), policy
+        )
+
+    def _record(self, started, decision):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.counts['requests'] += 1
+            self.counts['rejected'] += not decision.allowed
+            self._latency_total += elapsed_ms
+            self._latency_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        return elapsed_ms
+
+    def check(self, request):
+        """Return (Decision, milliseconds spent) for a request, or (None, 0) if no policy applies."""
+        started = time.perf_counter()
+        matched = self.match(request)
+        if matched is None:
+            return None, 0
+        policy, key, limit = matched
+        decision, unreported = self._from_shadow(key, policy, limit)
+        if decision is None:
+            redis = get_redis()
+            if redis is None:
+                decision = self._local(key, policy, limit)
+            else:
+                if self._script is None or self._script.registered_client is not redis:
+                    self._script = redis.register_script(SLIDING_WINDOW_SCRIPT)
+                synced_at = time.monotonic()
+                result = self._script(keys=[key], args=[limit, policy.window * 1000, unreported])
+                decision = self._remember(key, policy, limit, result, synced_at)
+        return decision, self._record(started, decision)
+
+    async def acheck(self, request):
+        """Async twin of check(), calling the script over redis.asyncio."""
+        started = time.perf_counter()
+        matched = self.match(request)
+        if matched is None:
+            return None, 0
+        policy, key, limit = matched
+        decision, unreported = self._from_shadow(key, policy, limit)
+        if decision is None:
+            redis = shared_async.client()
+            if redis is None:
+                if get_redis() is not None:  # Redis, but not through django_redis: use the blocking client
+                    return self.check(request)
+                decision = self._local(key, policy, limit)
+            else:
+                script = self._async_scripts.get(redis)
+                if script is None:
+                    script = self._async_scripts[redis] = redis.register_script(SLIDING_WINDOW_SCRIPT)
+                synced_at = time.monotonic()
+                result = await script(keys=[key], args=[limit, policy.window * 1000, unreported])
+                decision = self._remember(key, policy, limit, result, synced_at)
+        return decision, self._record(started, decision)
+
+    def stats(self):
+        with self._lock:
+            requests = self.counts['requests']
+            return {
+                **self.counts,
+                'mean_latency_ms': round(self._latency_total / requests, 4) if requests else None,
+                'latency_ms_histogram': {
+                    **{f'<={bound}': count for bound, count in zip(LATENCY_BUCKETS_MS, self._latency_buckets)},
+                    f'>{LATENCY_BUCKETS_MS[-1]}': self._latency_buckets[-1],
+                },
+            }
+
+limiter = RateLimiter()
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db import connections
+from django.db.models import F, Q, FloatField, Value
+from .models import Movie, Song, Quote
+from collections import namedtuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+
+# `weights` are the columns folded into search_vector; `trigram_field` is
+# matched fuzzily so misspelt titles still hit; `columns` maps result keys to
+# the values() columns returned for each hit.
+SearchSpec = namedtuple('SearchSpec', ['model', 'weights', 'trigram_field', 'columns', 'tags'])
+
+SEARCH_SPECS = {
+    'movie': SearchSpec(
+        Movie, {'title': 'A', 'description': 'B', 'role': 'C'}, 'title',
+        {'id': 'id', 'title': 'title', 'release_year': 'release_year'}, ['movies']
+    ),
+    'song': SearchSpec(
+        Song, {'title': 'A', 'composer': 'B', 'lyricist': 'B'}, 'title',
+        {'id': 'id', 'title': 'title', 'movie': 'movie__title'}, ['songs', 'movies']
+    ),
+    'quote': SearchSpec(
+        Quote, {'text': 'A', 'context': 'B'}, 'text',
+        {'id': 'id', 'text': 'text', 'movie': 'movie__title'}, ['quotes', 'movies']
+    ),
+}
+
+def _is_postgres(model):
+    return connections[model.objects.db].vendor == 'postgresql'
+
+def search_vector(spec):
+    """Build the weighted tsvector expression a model's search_vector column stores."""
+    vectors = [SearchVector(field, weight=weight, config=SEARCH_CONFIG) for field, weight in spec.weights.items()]
+    vector = vectors[0]
+    for other in vectors[1:]:
+        vector = vector + other
+    return vector
+
+def search_spec(model):
+    """Return the SearchSpec of a searchable model, or None."""
+    for spec in SEARCH_SPECS.values():
+        if spec.model is model:
+            return spec
+    return None
+
+def update_search_vectors(model, pks=None):
+    """Recompute search_vector for the given rows (all rows if `pks` is None) in one UPDATE.
+
+    Writes keep the column current through the triggers installed by
+    migration 0002_search; this backfills rows stored before them. Goes
+    through the base manager so the write does not re-trigger the bulk-write
+    signals. A no-op off PostgreSQL.
+    """
+    spec = search_spec(model)
+    if spec is None or not _is_postgres(model):
+        return 0
+    queryset = model._base_manager.all()
+    if pks is not None:
+        if not pks:
+            return 0
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(search_vector=search_vector(spec))
+
+def _base_queryset(kind):
+    if kind == 'song':
+        return Song.objects.filter(is_approved=True)
+    return SEARCH_SPECS[kind].model.objects.all()
+
+def _matches(kind, query, limit):
+    spec = SEARCH_SPECS[kind]
+    queryset = _base_queryset(kind)
+    if _is_postgres(spec.model):
+        # Full-text hits use the GIN index on search_vector, fuzzy hits the
+        # trigram GIN index; the score adds lexeme rank and word similarity.
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        queryset = queryset.annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            similarity=TrigramWordSimilarity(query, spec.trigram_field),
+        ).filter(
+            Q(search_vector=search_query) | Q(**{f'{spec.trigram_field}__trigram_word_similar': query})
+        ).annotate(score=F('rank') + F('similarity'))
+    else:
+        # Unranked substring fallback for development databases
+        condition = Q()
+        for field in spec.weights:
+            condition |= Q(**{f'{field}__icontains': query})
+        queryset = queryset.filter(condition).annotate(score=Value(1.0, output_field=FloatField()))
+    rows = queryset.order_by('-score', 'id').values(*spec.columns.values(), 'score')[:limit]
+    return [
+        {'type': kind, **{key: row[column] for key, column in spec.columns.items()}, 'score': round(row['score'], 4)}
+        for row in rows
+    ]
+
+def search_tags(kinds):
+    """Cache tags covering every model whose writes can change results for `kinds`."""
+    return sorted({tag for kind in kinds for tag in SEARCH_SPECS[kind].tags})
+
+def search_catalog(query, kinds=None):
+    """Return up to SEARCH_MAX_RESULTS movies, songs and quotes matching `query`, best first."""
+    limit = settings.SEARCH_MAX_RESULTS
+    results = []
+    for kind in kinds or SEARCH_SPECS:
+        results += _matches(kind, query, limit)
+    results.sort(key=lambda result: (-result['score'], result['type'], result['id']))
+    return results[:limit]
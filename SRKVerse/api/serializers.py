@@ -1,32 +1,100 @@
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage
+from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage, Job, ChunkedUpload
+from .audio import content_hash, expected_format, probe_upload
 import mimetypes
 
-class MovieSerializer(serializers.ModelSerializer):
+class PlannedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer that declares the relations it reads so querysets can load them up front.
+
+    Nested planned serializers are loaded automatically (select_related for
+    single objects, prefetch_related for many=True) along with their own
+    relations. Relations read some other way, e.g. a `source='movie.title'`
+    field, are declared with `select_related` / `prefetch_related` on Meta.
+    """
+
+    @classmethod
+    def query_plan(cls):
+        """Return the (select_related, prefetch_related) paths this serializer needs."""
+        if '_query_plan' not in cls.__dict__:
+            meta = getattr(cls, 'Meta', None)
+            select = list(getattr(meta, 'select_related', ()))
+            prefetch = list(getattr(meta, 'prefetch_related', ()))
+            for name, field in cls._declared_fields.items():
+                many = isinstance(field, serializers.ListSerializer)
+                child = field.child if many else field
+                if not isinstance(child, PlannedModelSerializer):
+                    continue
+                source = field.source or name
+                child_select, child_prefetch = type(child).query_plan()
+                if many:
+                    prefetch += [source] + [f'{source}__{path}' for path in child_select + child_prefetch]
+                else:
+                    select += [source] + [f'{source}__{path}' for path in child_select]
+                    prefetch += [f'{source}__{path}' for path in child_prefetch]
+            cls._query_plan = (sorted(set(select)), sorted(set(prefetch)))
+        return cls._query_plan
+
+    @classmethod
+    def plan_queryset(cls, queryset):
+        """Apply this serializer's select_related/prefetch_related to a queryset."""
+        select, prefetch = cls.query_plan()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    @classmethod
+    def serialize_many(cls, items):
+        return cls(items, many=True).data
+
+class MovieSerializer(PlannedModelSerializer):
     class Meta:
         model = Movie
-        fields = '__all__'
+        exclude = ('search_vector',)
 
-class SongSerializer(serializers.ModelSerializer):
+class SongSerializer(PlannedModelSerializer):
     movie = MovieSerializer(read_only=True)
+    # Precomputed media is served by its own endpoints rather than inlined
+    waveform_url = serializers.SerializerMethodField()
+    preview_clip_url = serializers.SerializerMethodField()
+
     class Meta:
         model = Song
-        fields = '__all__'
+        exclude = ('search_vector', 'content_hash', 'waveform', 'preview_clip')
         read_only_fields = ('is_approved',)
 
+    def get_waveform_url(self, song):
+        return reverse('song-waveform', args=[song.pk]) if song.waveform else None
+
+    def get_preview_clip_url(self, song):
+        return reverse('song-preview', args=[song.pk]) if song.preview_clip else None
+
+def new_song_movie(movie_title, song_title):
+    """Return the movie an uploaded song belongs to, rejecting unknown movies and duplicate songs."""
+    movie = Movie.objects.filter(title__iexact=movie_title).first()
+    if movie and Song.objects.filter(title__iexact=song_title, movie=movie).exists():
+        raise serializers.ValidationError("Song or album already available")
+    if not movie:
+        raise serializers.ValidationError("Movie not found")
+    return movie
+
 class SongUploadSerializer(serializers.ModelSerializer):
     movie_title = serializers.CharField(write_only=True)
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-    ALLOWED_TYPES = ['audio/mpeg', 'audio/mp3', 'audio/wav']
+    ALLOWED_TYPES = ['audio/mpeg', 'audio/mp3', 'audio/wav', 'audio/x-wav']
 
     class Meta:
         model = Song
-        fields = ('title', 'movie_title', 'composer', 'lyricist', 'audio_file', 'spotify_id', 'youtube_link', 'duration', 'is_approved')
+        fields = ('title', 'movie_title', 'composer', 'lyricist', 'audio_file', 'spotify_id', 'youtube_link', 'duration', 'bitrate', 'is_approved')
         extra_kwargs = {
             'audio_file': {'required': True},
             'title': {'required': True},
             'movie_title': {'required': True},
             'is_approved': {'read_only': True},  # Controlled by admin
+            'bitrate': {'read_only': True},  # Read from the upload
         }
 
     def validate_audio_file(self, value):
@@ -35,16 +103,19 @@ class SongUploadSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid file format. Only MP3 or WAV files are allowed.")
         if value.size > self.MAX_FILE_SIZE:
             raise serializers.ValidationError("File size exceeds 5MB limit.")
+        # Probe the upload itself, before it is stored, so no second read or write is needed
+        self.audio_info = probe_upload(value)
+        sniffed = self.audio_info['format']
+        if sniffed is not None and sniffed != expected_format(value.name):
+            raise serializers.ValidationError("File content does not match its extension.")
+        # Exact duplicates are caught with one lookup on the unique content_hash index
+        self.content_hash = content_hash(value)
+        if Song.objects.filter(content_hash=self.content_hash).exists():
+            raise serializers.ValidationError("This audio file has already been uploaded.")
         return value
 
     def validate(self, data):
-        movie_title = data.get('movie_title')
-        song_title = data.get('title')
-        movie = Movie.objects.filter(title__iexact=movie_title).first()
-        if movie and Song.objects.filter(title__iexact=song_title, movie=movie).exists():
-            raise serializers.ValidationError("Song or album already available")
-        if not movie:
-            raise serializers.ValidationError("Movie not found")
+        new_song_movie(data.get('movie_title'), data.get('title'))
         return data
 
     def create(self, validated_data):
@@ -52,32 +123,71 @@ class SongUploadSerializer(serializers.ModelSerializer):
         movie = Movie.objects.get(title__iexact=movie_title)
         validated_data['movie'] = movie
         validated_data['is_approved'] = False  # Require admin approval
+        audio_info = getattr(self, 'audio_info', {})
+        if audio_info.get('duration') is not None:
+            validated_data['duration'] = audio_info['duration']
+        validated_data['bitrate'] = audio_info.get('bitrate')
+        validated_data['content_hash'] = getattr(self, 'content_hash', None)
         return Song.objects.create(**validated_data)
 
-class QuoteSerializer(serializers.ModelSerializer):
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Starts a resumable song upload and reports how many chunks storage has acknowledged."""
+    movie_title = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = (
+            'token', 'title', 'movie_title', 'composer', 'lyricist', 'filename', 'size',
+            'chunk_size', 'chunk_count', 'received_chunks', 'song'
+        )
+        read_only_fields = ('token', 'chunk_size', 'received_chunks', 'song')
+
+    def validate_filename(self, value):
+        if expected_format(value) is None:
+            raise serializers.ValidationError("Invalid file format. Only MP3 or WAV files are allowed.")
+        return value
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"File size must be between 1 byte and {settings.CHUNKED_UPLOAD_MAX_SIZE // (1024 * 1024)}MB."
+            )
+        return value
+
+    def validate(self, data):
+        data['movie'] = new_song_movie(data.pop('movie_title'), data.get('title'))
+        return data
+
+class QuoteSerializer(PlannedModelSerializer):
     movie = MovieSerializer(read_only=True)
     class Meta:
         model = Quote
-        fields = '__all__'
+        exclude = ('search_vector',)
 
-class AwardSerializer(serializers.ModelSerializer):
+class AwardSerializer(PlannedModelSerializer):
     movie = MovieSerializer(read_only=True)
     class Meta:
         model = Award
         fields = '__all__'
 
-class TimelineSerializer(serializers.ModelSerializer):
+class TimelineSerializer(PlannedModelSerializer):
     class Meta:
         model = Timeline
         fields = '__all__'
 
-class FanVoteSerializer(serializers.ModelSerializer):
+class FanVoteSerializer(PlannedModelSerializer):
     movie = MovieSerializer(read_only=True)
     class Meta:
         model = FanVote
         fields = '__all__'
 
-class FanMessageSerializer(serializers.ModelSerializer):
+class FanMessageSerializer(PlannedModelSerializer):
     class Meta:
         model = FanMessage
-        fields = '__all__'
\ No newline at end of file
+        fields = ('id', 'name', 'message', 'created_at')
+        read_only_fields = ('created_at',)
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'kind', 'status', 'attempts', 'max_attempts', 'run_at', 'last_error', 'created_at', 'updated_at')
@@ -1,130 +1,178 @@
 import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 from django.conf import settings
-from django.core.cache import cache
-from .models import Song, Movie, Quote, Award, Timeline, FanVote
+from .models import Song, Movie, Quote, Award, Timeline, FanVote, FanMessage
+from .cache import get_or_fill, tagged_key
+from .votes import get_movie_id, record_vote
+from .clients import clients
+from .token_bucket import TokenBucket
+from .circuit import CircuitOpenError, spotify_breaker
 from django.core.exceptions import ValidationError
 import logging
-import requests
 import random
 
 logger = logging.getLogger(__name__)
 
+spotify_bucket = TokenBucket('spotify', settings.SPOTIFY_RATE_LIMIT, settings.SPOTIFY_BURST)
+
 def get_spotify_client():
-    """Initialize Spotify client with credentials."""
+    """Return this process's pooled Spotify client."""
     try:
         if not (settings.SPOTIFY_CLIENT_ID and settings.SPOTIFY_CLIENT_SECRET):
             logger.warning("Spotify credentials missing.")
             raise ValidationError("Spotify credentials not configured.")
-        sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(
-            client_id=settings.SPOTIFY_CLIENT_ID,
-            client_secret=settings.SPOTIFY_CLIENT_SECRET
-        ))
-        return sp
+        return clients.spotify()
     except Exception as e:
         logger.error(f"Failed to initialize Spotify client: {str(e)}")
         raise ValidationError(f"Spotify authentication failed: {str(e)}")
 
-def enhance_song_with_spotify(song_title, movie_title, retries=3, backoff=1):
-    """Search Spotify for a song and update with metadata, cached for 24 hours."""
-    cache_key = f'spotify_song_{song_title.lower()}_{movie_title.lower()}'
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        Song.objects.filter(title__iexact=song_title, movie__title__iexact=movie_title).update(**cached_data)
-        logger.info(f"Used cached Spotify data for '{song_title}'")
-        return
+def retry_after(exception, default):
+    """Seconds a 429 asked us to wait (Retry-After), or `default` if it did not say."""
+    headers = getattr(exception, 'headers', None) or {}
+    try:
+        return max(float(headers.get('Retry-After')), 0)
+    except (TypeError, ValueError):
+        return default
 
-    sp = get_spotify_client()
-    if not sp:
-        return
+def call_spotify(request, retries=3, backoff=1):
+    """Run `request()` once the shared Spotify token bucket allows it.
 
-    query = f"track:{song_title} artist:\"{movie_title}\" SRK"
+    A 429 pauses the bucket for every worker for the Retry-After period (or
+    an exponential `backoff`) before the next attempt. While the Spotify
+    circuit is open the call fails fast without touching the network.
+    """
     for attempt in range(retries):
+        if not spotify_bucket.acquire(timeout=settings.SPOTIFY_ACQUIRE_TIMEOUT):
+            break
         try:
-            results = sp.search(q=query, type='track', limit=1)
-            tracks = results.get('tracks', {}).get('items', [])
-            if tracks:
-                track = tracks[0]
-                data = {
-                    'spotify_id': track['id'],
-                    'preview_url': track.get('preview_url', ''),
-                    'popularity': track.get('popularity', 0),
-                    'duration': track['duration_ms'] // 1000
-                }
-                Song.objects.filter(title__iexact=song_title, movie__title__iexact=movie_title).update(**data)
-                cache.set(cache_key, data, timeout=86400)  # Cache for 24 hours
-                logger.info(f"Enhanced song '{song_title}' with Spotify data.")
-                return
-            else:
-                logger.warning(f"No Spotify results for '{song_title}' in '{movie_title}'.")
-                return
+            return spotify_breaker.call(request)
+        except CircuitOpenError:
+            raise ValidationError("Spotify is temporarily unavailable. Please try again later.")
         except spotipy.exceptions.SpotifyException as e:
-            if e.http_status == 429:
-                logger.warning(f"Spotify rate limit hit. Retrying in {backoff} seconds...")
-                sleep(backoff)
-                backoff *= 2
-            else:
-                logger.error(f"Spotify error for '{song_title}': {str(e)}")
-                raise ValidationError(f"Spotify API error: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error enhancing '{song_title}': {str(e)}")
-            raise ValidationError(f"Failed to fetch Spotify data: {str(e)}")
-    logger.error(f"Failed to enhance '{song_title}' after {retries} retries.")
+            if e.http_status != 429:
+                raise
+            delay = retry_after(e, backoff)
+            logger.warning(f"Spotify rate limit hit. Pausing requests for {delay} seconds...")
+            spotify_bucket.pause(delay)
+            backoff *= 2
     raise ValidationError("Spotify rate limit exceeded. Please try again later.")
 
-def load_movies():
-    """Load movies from TMDb, cached for 24 hours."""
-    cache_key = 'tmdb_movies'
-    movies = cache.get(cache_key)
-    if movies:
-        return movies
+def spotify_search_key(song_title, movie_title):
+    return f'spotify_song_{song_title.lower()}_{movie_title.lower()}'
+
+def spotify_track_query(song_title, movie_title):
+    return f"track:{song_title} artist:\"{movie_title}\" SRK"
+
+def spotify_track_data(track):
+    """Map a Spotify track object to Song fields."""
+    return {
+        'spotify_id': track['id'],
+        'preview_url': track.get('preview_url', ''),
+        'popularity': track.get('popularity', 0),
+        'duration': track['duration_ms'] // 1000
+    }
+
+def enhance_song_with_spotify(song_title, movie_title, retries=3, backoff=1):
+    """Search Spotify for a song and update with metadata, cached for 24 hours (misses briefly)."""
+    data = get_or_fill(
+        spotify_search_key(song_title, movie_title),
+        lambda: search_spotify_track(song_title, movie_title, retries, backoff),
+        timeout=86400,
+        negative_timeout=settings.NEGATIVE_CACHE_TIMEOUT
+    )
+    if data:
+        Song.objects.filter(title__iexact=song_title, movie__title__iexact=movie_title).update(**data)
+        logger.info(f"Enhanced song '{song_title}' with Spotify data.")
+
+def search_spotify_track(song_title, movie_title, retries=3, backoff=1):
+    """Look up a song on Spotify and return its metadata, or None if there is no match."""
+    sp = get_spotify_client()
+    if not sp:
+        return None
+
+    query = spotify_track_query(song_title, movie_title)
     try:
-        response = requests.get(
-            f"https://api.themoviedb.org/3/search/person",
-            params={'api_key': settings.TMDB_API_KEY, 'query': 'Shah Rukh Khan'}
-        )
-        response.raise_for_status()
-        data = response.json()
-        movies = []
-        for result in data.get('results', []):
-            for movie in result.get('known_for', []):
-                movie_data = {
-                    'tmdb_id': movie['id'],
-                    'title': movie['title'],
-                    'release_year': int(movie['release_date'].split('-')[0]) if movie.get('release_date') else None,
-                    'description': movie.get('overview', ''),
-                    'poster_path': movie.get('poster_path', ''),
-                    'rating': movie.get('vote_average', None),
-                    'genres': [genre['name'] for genre in movie.get('genre_ids', [])]
-                }
-                movie_obj, created = Movie.objects.get_or_create(tmdb_id=movie_data['tmdb_id'], defaults=movie_data)
-                movies.append(movie_obj)
-        cache.set(cache_key, movies, timeout=86400)
-        return movies
+        results = call_spotify(lambda: sp.search(q=query, type='track', limit=1), retries, backoff)
+    except ValidationError as e:
+        logger.error(f"Failed to enhance '{song_title}': {'; '.join(e.messages)}")
+        raise
+    except spotipy.exceptions.SpotifyException as e:
+        logger.error(f"Spotify error for '{song_title}': {str(e)}")
+        raise ValidationError(f"Spotify API error: {str(e)}")
     except Exception as e:
-        logger.error(f"Error loading TMDb movies: {str(e)}")
-        return Movie.objects.all()  # Fallback to DB
+        logger.error(f"Unexpected error enhancing '{song_title}': {str(e)}")
+        raise ValidationError(f"Failed to fetch Spotify data: {str(e)}")
+    tracks = results.get('tracks', {}).get('items', [])
+    if tracks:
+        return spotify_track_data(tracks[0])
+    logger.warning(f"No Spotify results for '{song_title}' in '{movie_title}'.")
+    return None
 
 # Placeholder service functions (implement as needed)
+def get_movies():
+    return Movie.objects.all()
+
 def get_movies_by_year(year):
     return Movie.objects.filter(release_year=year)
 
 def get_movie_by_title(title):
     return Movie.objects.filter(title__iexact=title).first()
 
+async def aget_movie_by_title(title):
+    return await Movie.objects.filter(title__iexact=title).afirst()
+
 def get_top_rated_movies():
     return Movie.objects.order_by('-rating')[:10]
 
 def get_movies_by_genre(genre):
     return Movie.objects.filter(genres__contains=[genre])
 
-def get_random_quote():
-    quotes = Quote.objects.all()
-    return random.choice(quotes) if quotes else None
+def get_approved_songs():
+    return Song.objects.filter(is_approved=True)
+
+def get_songs_by_movie(title):
+    movie = Movie.objects.filter(title__iexact=title).first()
+    return movie.songs.filter(is_approved=True) if movie else None
+
+async def aget_songs_by_movie(title):
+    movie = await Movie.objects.filter(title__iexact=title).afirst()
+    return movie.songs.filter(is_approved=True) if movie else None
+
+def get_quote_ids(tag=None, movie_title=None):
+    """Return the primary-key index of quotes, optionally narrowed to a tag or movie.
+
+    The index is a plain list of ids cached (locally and in Redis) until a
+    quote write invalidates its tag, so picking from it never touches the DB.
+    """
+    if tag:
+        name, tags, queryset = f'quote_ids_tag_{tag.lower()}', [f'quotes:tag:{tag.lower()}'], get_quotes_by_tag(tag)
+    elif movie_title:
+        name = f'quote_ids_movie_{movie_title.lower()}'
+        tags, queryset = [f'quotes:movie:{movie_title.lower()}', 'movies'], get_quotes_by_movie(movie_title)
+    else:
+        name, tags, queryset = 'quote_ids', ['quotes'], Quote.objects.all()
+    return get_or_fill(
+        tagged_key(name, tags),
+        lambda: list(queryset.values_list('id', flat=True)),
+        timeout=settings.RESPONSE_CACHE_TIMEOUT
+    )
+
+def get_random_quote(tag=None, movie_title=None):
+    """Pick a uniformly random quote from the id index and fetch it by primary key."""
+    ids = get_quote_ids(tag, movie_title)
+    if not ids:
+        return None
+    return Quote.objects.select_related('movie').filter(pk=random.choice(ids)).first()
 
 def get_quotes_by_movie(title):
     movie = Movie.objects.filter(title__iexact=title).first()
-    return movie.quotes.all() if movie else []
+    return movie.quotes.all() if movie else Quote.objects.none()
+
+async def aget_quotes_by_movie(title):
+    movie = await Movie.objects.filter(title__iexact=title).afirst()
+    return movie.quotes.all() if movie else Quote.objects.none()
+
+def get_quotes():
+    return Quote.objects.all()
 
 def get_quotes_by_tag(tag):
     return Quote.objects.filter(tags__contains=[tag])
@@ -151,14 +199,19 @@ def get_votes():
     return FanVote.objects.all()
 
 def vote_favorite(title):
-    movie = Movie.objects.filter(title__iexact=title).first()
-    if movie:
-        vote, created = FanVote.objects.get_or_create(movie=movie, defaults={'vote_count': 1})
-        if not created:
-            vote.vote_count += 1
-            vote.save()
-        return vote
-    return None
+    movie_id = get_movie_id(title)
+    if movie_id is None:
+        return None
+    pending = record_vote(movie_id)
+    # Report persisted plus pending votes without writing to the row
+    vote = FanVote.objects.select_related('movie').filter(movie_id=movie_id).first()
+    if vote is None:
+        vote = FanVote(movie=Movie.objects.get(id=movie_id), vote_count=0)
+    vote.vote_count += pending
+    return vote
+
+def get_fan_messages():
+    return FanMessage.objects.all()
 
 def get_quiz():
     return {
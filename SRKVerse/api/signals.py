@@ -0,0 +1,51 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage, post_bulk_write
+from .cache import invalidate_tags
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_TAGGED_MODELS = (Movie, Song, Quote, Award, Timeline, FanVote, FanMessage)
+
+def remember_cache_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the tags of the stored row so a save that moves it invalidates the old families too.
+
+    One values() query over the tag columns, skipped when the save cannot
+    change the row's tags.
+    """
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not sender.changes_cache_tags(update_fields):
+        instance._previous_cache_tags = []
+        return
+    instance._previous_cache_tags = sender.tags_of(sender._base_manager.filter(pk=instance.pk))
+
+def invalidate_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        tags = set(instance.cache_tags()) | set(getattr(instance, '_previous_cache_tags', []))
+        invalidate_tags(tags)
+    except Exception as e:
+        logger.error(f"Cache invalidation failed for {sender.__name__} {instance.pk}: {str(e)}")
+
+def invalidate_on_delete(sender, instance, **kwargs):
+    try:
+        invalidate_tags(instance.cache_tags())
+    except Exception as e:
+        logger.error(f"Cache invalidation failed for {sender.__name__} {instance.pk}: {str(e)}")
+
+def invalidate_on_bulk_write(sender, tags, **kwargs):
+    try:
+        invalidate_tags(tags)
+    except Exception as e:
+        logger.error(f"Cache invalidation failed for bulk {sender.__name__} write: {str(e)}")
+
+def connect_cache_invalidation():
+    """Wire tag invalidation to every write path of the cached models."""
+    for model in CACHE_TAGGED_MODELS:
+        uid = f'cache_invalidation_{model.__name__}'
+        pre_save.connect(remember_cache_tags, sender=model, dispatch_uid=uid)
+        post_save.connect(invalidate_on_save, sender=model, dispatch_uid=uid)
+        post_delete.connect(invalidate_on_delete, sender=model, dispatch_uid=uid)
+        post_bulk_write.connect(invalidate_on_bulk_write, sender=model, dispatch_uid=uid)
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+from .cache import get_or_fill, tagged_key
+from .models import Song
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header, size):
+    """Return the inclusive (start, end) byte range a Range header asks for, or None for the whole file.
+
+    Only single ranges are honoured; multi-range and malformed headers get the
+    whole file, which RFC 9110 allows. Raises RangeNotSatisfiable when the
+    range lies entirely past the end of the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:  # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+class FileRange:
+    """Read-only window onto bytes [start, start + length) of an open file.
+
+    read() stops at the end of the window. fileno() exposes the underlying
+    file, already positioned at `start`, so a WSGI server's file_wrapper
+    (e.g. gunicorn's) can sendfile() the range, bounded by Content-Length,
+    without the bytes passing through Python.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+def approved_song_media(song_id, field='audio_file'):
+    """Return an approved song's stored `field`, or None if the song is unapproved or lacks it.
+
+    `field` is audio_file or preview_clip (giving the storage name) or
+    waveform (giving the peak bytes). Cached against the `songs` tag, so
+    approving or editing a song takes effect at once while repeated plays
+    skip the database.
+    """
+    def lookup():
+        value = Song.objects.filter(pk=song_id, is_approved=True).values_list(field, flat=True).first()
+        if isinstance(value, memoryview):  # BinaryField on PostgreSQL
+            value = bytes(value)
+        return value or None  # An empty FileField reads as ''
+
+    return get_or_fill(
+        tagged_key(f'song_media:{field}:{song_id}', ['songs']), lookup,
+        timeout=settings.AUDIO_STREAM_CACHE_TIMEOUT, negative_timeout=settings.AUDIO_STREAM_CACHE_TIMEOUT
+    )
+
+def presigned_url(name):
+    """Return a signed storage URL for `name`, cached for less than its own lifetime."""
+    return get_or_fill(f'audio_url:{name}', lambda: default_storage.url(name), timeout=settings.AUDIO_URL_CACHE_TIMEOUT)
+
+def audio_response(request, name):
+    """Serve stored audio: from local disk with Range support, or as a redirect to a signed S3 URL."""
+    if not isinstance(default_storage, FileSystemStorage):
+        # S3 answers Range requests itself; nothing is proxied through the app
+        return HttpResponseRedirect(presigned_url(name))
+
+    path = default_storage.path(name)
+    audio = open(path, 'rb')
+    size = default_storage.size(name)
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        audio.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(audio, filename=path)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(audio, start, end - start + 1), filename=path, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -1,10 +1,63 @@
+import io
 import os
-from django.test import TestCase
+import json
+import base64
+import wave
+import time
+import hashlib
+import tempfile
+import threading
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.core.cache import cache
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
-from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage
-from .serializers import SongUploadSerializer
+from .models import Movie, Song, Quote, Award, Timeline, FanVote, FanMessage, Job, ChunkedUpload
+from .serializers import (
+    SongUploadSerializer, SongSerializer, FanVoteSerializer, MovieSerializer, QuoteSerializer, AwardSerializer
+)
+from .fast_serializers import ValuesSerializer
+from .cache import (
+    cached_entry, get_tag_versions, release_lock, response_key, get_or_fill, shared_async, two_tier, LocalCache,
+    FILL_LOCK_PREFIX
+)
+from .pagination import encode_cursor, decode_cursor
+from .cache import get_redis
+from .token_bucket import TokenBucket
+from .ratelimit import RateLimiter
+from .audio import MPEG, WAV, sniff_audio_format
+from .uploads import chunk_store, write_chunk
+from .media import render_media
+from . import async_views
+from .leaderboard import LeaderboardBroadcaster, Subscription, broadcaster, leaderboard_rows
+from .admin import SongAdmin, SongAdminForm
+from django.contrib import admin
+from .clients import ClientRegistry, clients
+from .circuit import CircuitBreaker, CircuitOpenError, circuit_states, CLOSED, OPEN, HALF_OPEN
+from .enrichment import enrich_songs
+from .services import call_spotify, enhance_song_with_spotify
+from .tmdb import ingest_filmography
+from .jobs import claim_job, enqueue_job, run_job, run_pending_jobs, SPOTIFY_ENRICHMENT, MEDIA_PROCESSING, VOTE_RANKING_REBUILD
+from .fan_messages import flush_fan_messages, FLUSH_LOCK_KEY, PENDING_MESSAGES_KEY, FLUSHING_MESSAGES_KEY
+from redis.exceptions import LockNotOwnedError
+from .votes import (
+    apply_vote_deltas, flush_pending_votes, record_vote,
+    PENDING_VOTES_KEY, FLUSHING_VOTES_KEY, RANKING_KEY, RANKING_BUILT_KEY, FLUSH_LOCK_KEY as VOTES_FLUSH_LOCK_KEY
+)
 from rest_framework import status
 from unittest.mock import patch, MagicMock
 from django.core.exceptions import ValidationError
@@ -221,6 +274,7 @@ class SRKVerseAPITests(APITestCase):
         self.assertEqual(response.data['error'], "Movie not found")
 
     def test_upload_song_valid(self):
+        self.client.force_authenticate(User.objects.create_user('uploader', password='secret'))
         with open('test_song.mp3', 'wb') as f:
             f.write(b"Fake MP3 content")
         upload_file = SimpleUploadedFile('test_song.mp3', b"Fake MP3 content", content_type='audio/mpeg')
@@ -231,12 +285,14 @@ class SRKVerseAPITests(APITestCase):
             'lyricist': 'Anand Bakshi',
             'audio_file': upload_file
         }
-        with patch('api.views.enhance_song_with_spotify') as mock_enhance:
+        with patch('api.jobs.enhance_song_with_spotify') as mock_enhance:
             response = self.client.post(reverse('upload-song'), data, format='multipart')
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-            self.assertEqual(response.data['message'], 'Song uploaded successfully')
+            self.assertEqual(response.data['message'], 'Song uploaded successfully, pending admin approval')
             self.assertEqual(Song.objects.count(), 2)
-            mock_enhance.assert_called_once_with('Yeh Dil Deewana', 'Dilwale Dulhania Le Jayenge')
+            mock_enhance.assert_not_called()
+            job = Job.objects.get(pk=response.data['enrichment_job'])
+            self.assertEqual((job.kind, job.status, job.created_by.username), (SPOTIFY_ENRICHMENT, Job.PENDING, 'uploader'))
         os.remove('test_song.mp3')
 
     def test_upload_song_duplicate(self):
@@ -282,6 +338,7 @@ class SRKVerseAPITests(APITestCase):
         os.remove('test_song.mp3')
 
     def test_upload_song_spotify_failure(self):
+        self.client.force_authenticate(User.objects.create_user('uploader', password='secret'))
         with open('test_song.mp3', 'wb') as f:
             f.write(b"Fake MP3 content")
         upload_file = SimpleUploadedFile('test_song.mp3', b"Fake MP3 content", content_type='audio/mpeg')
@@ -290,11 +347,14 @@ class SRKVerseAPITests(APITestCase):
             'movie_title': 'Dilwale Dulhania Le Jayenge',
             'audio_file': upload_file
         }
-        with patch('api.views.enhance_song_with_spotify', side_effect=ValidationError("Spotify rate limit exceeded")):
+        with patch('api.jobs.enhance_song_with_spotify', side_effect=ValidationError("Spotify rate limit exceeded")):
             response = self.client.post(reverse('upload-song'), data, format='multipart')
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-            self.assertIn('Spotify metadata could not be fetched', response.data['message'])
             self.assertEqual(Song.objects.count(), 2)
+            run_pending_jobs()
+            job = Job.objects.get(pk=response.data['enrichment_job'])
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertIn('Spotify rate limit exceeded', job.last_error)
         os.remove('test_song.mp3')
 
     def test_get_all_quotes(self):
@@ -382,4 +442,1476 @@ class SRKVerseAPITests(APITestCase):
             response = self.client.post(reverse('validate-quiz'), data, format='json')
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertTrue(response.data['correct'])
-            mock_validate.assert_called_once_with('Dilwale Dulhania Le Jayenge', 'Some quote')
\ No newline at end of file
+            mock_validate.assert_called_once_with('Dilwale Dulhania Le Jayenge', 'Some quote')
+
+class FreshCacheMixin:
+    """Starts every test with both cache tiers empty."""
+
+    def setUp(self):
+        super().setUp()
+        self.reset_caches()
+
+    def reset_caches(self):
+        cache.clear()
+        two_tier.local.clear()
+
+    def create_ddlj(self, **fields):
+        return Movie.objects.create(
+            tmdb_id=12345, title="Dilwale Dulhania Le Jayenge", release_year=1995, **fields
+        )
+
+
+class QueryBudgetMixin(FreshCacheMixin):
+    """Fails a test when an endpoint runs more queries than its declared budget."""
+
+    def assertWithinQueryBudget(self, url, budget):
+        self.reset_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{url} ran {len(queries)} queries, over its budget of {budget}:\n"
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+        return response
+
+
+class ResponseCacheTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = self.create_ddlj(rating=8.0)
+
+    def test_cached_hit_serves_rendered_bytes_without_queries(self):
+        first = self.client.get(reverse('movies-by-year', args=[1995]))
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('movies-by-year', args=[1995]))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second.data[0]['title'], "Dilwale Dulhania Le Jayenge")
+
+    def test_cached_entry_stores_content_hash(self):
+        self.client.get(reverse('movie-by-title', args=[self.movie.title]))
+        title = self.movie.title.lower()
+        entry = cache.get(response_key(f'movie_title_{title}', [f'movies:title:{title}']))['value']
+        self.assertEqual(entry['etag'], hashlib.sha256(entry['content']).hexdigest())
+
+    def test_matching_etag_returns_not_modified(self):
+        first = self.client.get(reverse('movies-by-year', args=[1995]))
+        response = self.client.get(reverse('movies-by-year', args=[1995]), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_missing_object_is_not_cached(self):
+        response = self.client.get(reverse('movie-by-title', args=['Nonexistent Movie']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(cache.get(response_key('movie_title_nonexistent movie', ['movies:title:nonexistent movie'])))
+
+
+class CacheInvalidationTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = self.create_ddlj(rating=8.0)
+
+    def test_approving_songs_with_queryset_update_invalidates_song_lists(self):
+        song = Song.objects.create(title="Tujhe Dekha To", movie=self.movie)
+        self.assertEqual(len(self.client.get(reverse('song-list')).data), 0)
+        self.assertEqual(len(self.client.get(reverse('movie-songs', args=[self.movie.title])).data), 0)
+        Song.objects.filter(pk=song.pk).update(is_approved=True)
+        self.assertEqual(len(self.client.get(reverse('song-list')).data), 1)
+        self.assertEqual(len(self.client.get(reverse('movie-songs', args=[self.movie.title])).data), 1)
+
+    def test_bulk_writes_read_tags_in_constant_queries(self):
+        songs = [Song.objects.create(title=f"Song {i}", movie=self.movie) for i in range(5)]
+        with self.assertNumQueries(2):  # Tags of the matched rows, then the UPDATE
+            Song.objects.filter(pk__in=[song.pk for song in songs]).update(is_approved=True)
+        other = Movie.objects.create(tmdb_id=54321, title="Kal Ho Naa Ho", release_year=2003)
+        self.assertEqual(len(self.client.get(reverse('movie-songs', args=[other.title])).data), 0)
+        with self.assertNumQueries(3):  # Moving rows changes their tags: read them before and after
+            Song.objects.filter(pk__in=[song.pk for song in songs]).update(movie=other)
+        self.assertEqual(len(self.client.get(reverse('movie-songs', args=[other.title])).data), 5)
+        with self.assertNumQueries(1):  # A save that cannot change tags skips the lookup
+            songs[0].save(update_fields=['is_approved'])
+
+    def test_new_quote_invalidates_quote_list(self):
+        self.assertEqual(len(self.client.get(reverse('quote-list')).data), 0)
+        Quote.objects.create(text="Don ko pakadna mushkil hi nahi, namumkin hai.", movie=self.movie)
+        self.assertEqual(len(self.client.get(reverse('quote-list')).data), 1)
+
+    def test_award_edit_invalidates_old_and_new_type_families(self):
+        award = Award.objects.create(title="Filmfare Best Actor", year=1993, type="Filmfare", movie=self.movie)
+        self.assertEqual(len(self.client.get(reverse('awards-by-type', args=['Filmfare'])).data), 1)
+        self.assertEqual(len(self.client.get(reverse('awards-by-type', args=['National'])).data), 0)
+        award.type = "National"
+        award.save()
+        self.assertEqual(len(self.client.get(reverse('awards-by-type', args=['Filmfare'])).data), 0)
+        self.assertEqual(len(self.client.get(reverse('awards-by-type', args=['National'])).data), 1)
+
+    def test_unrelated_family_stays_cached(self):
+        Award.objects.create(title="Filmfare Best Actor", year=1993, type="Filmfare", movie=self.movie)
+        self.client.get(reverse('events-by-year', args=[1992]))
+        Award.objects.create(title="Padma Shri", year=2005, type="National", movie=self.movie)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('events-by-year', args=[1992]))
+
+    def test_deleting_vote_invalidates_votes(self):
+        vote = FanVote.objects.create(movie=self.movie, vote_count=3)
+        self.assertEqual(len(self.client.get(reverse('get-votes')).data), 1)
+        vote.delete()
+        self.assertEqual(len(self.client.get(reverse('get-votes')).data), 0)
+
+
+class SingleFlightCacheTests(FreshCacheMixin, TestCase):
+    def test_fill_computes_once_and_caches(self):
+        compute = MagicMock(return_value=['movie'])
+        self.assertEqual(get_or_fill('sf_key', compute, timeout=60), ['movie'])
+        self.assertEqual(get_or_fill('sf_key', compute, timeout=60), ['movie'])
+        compute.assert_called_once()
+
+    def test_none_is_not_cached(self):
+        compute = MagicMock(return_value=None)
+        self.assertIsNone(get_or_fill('sf_key', compute, timeout=60))
+        self.assertIsNone(cache.get('sf_key'))
+
+    def test_stale_value_served_while_another_worker_refreshes(self):
+        cache.set('sf_key', {'value': 'stale', 'expires_at': time.time() - 1, 'delta': 0.1}, timeout=60)
+        cache.add(f'{FILL_LOCK_PREFIX}:sf_key', 'other-worker', timeout=30)
+        compute = MagicMock(return_value='fresh')
+        self.assertEqual(get_or_fill('sf_key', compute, timeout=60), 'stale')
+        compute.assert_not_called()
+
+    def test_expired_value_refreshed_by_lock_holder(self):
+        cache.set('sf_key', {'value': 'stale', 'expires_at': time.time() - 1, 'delta': 0.1}, timeout=60)
+        compute = MagicMock(return_value='fresh')
+        self.assertEqual(get_or_fill('sf_key', compute, timeout=60), 'fresh')
+        self.assertIsNone(cache.get(f'{FILL_LOCK_PREFIX}:sf_key'))
+
+    def test_hot_key_refreshed_early_before_expiry(self):
+        cache.set('sf_key', {'value': 'old', 'expires_at': time.time() + 1, 'delta': 2.0}, timeout=60)
+        compute = MagicMock(return_value='new')
+        with patch('api.cache.random.random', return_value=0.01):
+            self.assertEqual(get_or_fill('sf_key', compute, timeout=60), 'new')
+        compute.assert_called_once()
+
+    def test_waiter_picks_up_result_published_by_lock_holder(self):
+        cache.add(f'{FILL_LOCK_PREFIX}:sf_key', 'other-worker', timeout=30)
+        compute = MagicMock(return_value='mine')
+
+        def publish(_):
+            cache.set('sf_key', {'value': 'theirs', 'expires_at': time.time() + 60, 'delta': 0.1}, timeout=60)
+
+        with patch('api.cache.time.sleep', side_effect=publish):
+            self.assertEqual(get_or_fill('sf_key', compute, timeout=60), 'theirs')
+        compute.assert_not_called()
+
+    def test_fill_lock_is_released_only_by_its_holder(self):
+        lock_key = f'{FILL_LOCK_PREFIX}:sf_key'
+        cache.add(lock_key, 'next-holder', timeout=30)  # Our lock expired and another worker took it
+        release_lock(lock_key, 'expired-holder')
+        self.assertEqual(cache.get(lock_key), 'next-holder')
+        async_to_sync(shared_async.release)(lock_key, 'expired-holder')
+        self.assertEqual(cache.get(lock_key), 'next-holder')
+        release_lock(lock_key, 'next-holder')
+        self.assertIsNone(cache.get(lock_key))
+
+
+class TwoTierCacheTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.timeline = Timeline.objects.create(year=1992, event="Debut in Deewana")
+
+    def test_local_tier_serves_repeat_reads_without_shared_lookups(self):
+        self.client.get(reverse('timeline'))
+        before = two_tier.stats()
+        with patch.object(two_tier.backend, 'get', wraps=two_tier.backend.get) as shared_get, \
+                patch.object(two_tier.backend, 'get_many', wraps=two_tier.backend.get_many) as shared_get_many:
+            response = self.client.get(reverse('timeline'))
+        self.assertEqual(response.data[0]['event'], "Debut in Deewana")
+        shared_get.assert_not_called()
+        shared_get_many.assert_not_called()
+        self.assertGreater(two_tier.stats()['local']['hits'], before['local']['hits'])
+
+    def test_write_evicts_local_copies(self):
+        self.assertEqual(len(self.client.get(reverse('timeline')).data), 1)
+        Timeline.objects.create(year=1995, event="Dilwale Dulhania Le Jayenge")
+        self.assertEqual(len(self.client.get(reverse('timeline')).data), 2)
+
+    def test_invalidation_is_published_to_other_workers(self):
+        redis = MagicMock()
+        with patch.object(two_tier, '_redis', return_value=redis):
+            two_tier.evict(['tag_version:timeline'])
+        channel, message = redis.publish.call_args.args
+        self.assertEqual(channel, settings.CACHE_INVALIDATION_CHANNEL)
+        self.assertEqual(json.loads(message)['keys'], ['tag_version:timeline'])
+
+    def test_worker_ignores_its_own_invalidations(self):
+        two_tier.local.set('tag_version:timeline', 1)
+        generation = two_tier.local.generation
+        two_tier._on_invalidation(json.dumps({'origin': two_tier._origin(), 'keys': ['tag_version:timeline']}))
+        self.assertEqual((two_tier.local.get('tag_version:timeline'), two_tier.local.generation), (1, generation))
+        two_tier._on_invalidation(json.dumps({'origin': 'another-worker', 'keys': ['tag_version:timeline']}))
+        self.assertNotEqual(two_tier.local.get('tag_version:timeline'), 1)
+
+    def test_seeded_tag_versions_are_kept_locally(self):
+        version = get_tag_versions(['awards'])['awards']
+        self.assertEqual(two_tier.local.get('tag_version:awards'), version)
+
+    def test_local_cache_is_bounded_lru(self):
+        local = LocalCache(max_entries=2, timeout=30)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual(local.get('a'), 1)
+        self.assertEqual(local.get('c'), 3)
+        self.assertEqual(len(local), 2)
+
+    def test_read_racing_an_eviction_is_not_stored_locally(self):
+        local = LocalCache(max_entries=10, timeout=30)
+        generation = local.generation
+        local.evict(['k'])
+        local.set('k', 'stale', generation=generation)
+        self.assertEqual(len(local), 0)
+
+    def test_cache_stats_requires_admin(self):
+        response = self.client.get(reverse('cache-stats'))
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+class KeysetPaginationTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        for year in (1995, 1992, 1993, 1992, 1998):
+            Timeline.objects.create(year=year, event=f"Event {year}")
+
+    def _next_url(self, response):
+        link = response.get('Link')
+        return link[link.index('<') + 1:link.index('>')] if link else None
+
+    def test_pages_walk_the_full_list_in_stable_order(self):
+        seen = []
+        url = reverse('timeline') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data), 2)
+            seen.extend((item['year'], item['id']) for item in response.data)
+            url = self._next_url(response)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_last_page_has_no_next_link(self):
+        response = self.client.get(reverse('timeline'))
+        self.assertEqual(len(response.data), 5)
+        self.assertIsNone(response.get('Link'))
+
+    def test_deep_page_seeks_instead_of_offsetting(self):
+        first = self.client.get(reverse('timeline') + '?page_size=2')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self._next_url(first))
+        sql = ' '.join(query['sql'] for query in queries.captured_queries).upper()
+        self.assertNotIn('OFFSET', sql)
+
+    def test_each_page_is_cached_separately(self):
+        first = self.client.get(reverse('timeline') + '?page_size=2')
+        second_url = self._next_url(first)
+        second = self.client.get(second_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(second_url).content, second.content)
+        self.assertNotEqual(first.content, second.content)
+
+    def test_every_spelling_of_a_cursor_shares_one_cached_page(self):
+        first = self.client.get(reverse('timeline') + '?page_size=2')
+        second = self.client.get(self._next_url(first))
+        position = decode_cursor(parse_qs(urlparse(self._next_url(first)).query)['cursor'][0], ('year', 'id'))
+        respelled = base64.urlsafe_b64encode(json.dumps(position, indent=1).encode()).decode()  # Padded, with whitespace
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('timeline') + f'?page_size=2&cursor={respelled}')
+        self.assertEqual(response.content, second.content)
+
+    def test_cursor_pages_expire_sooner_than_the_first_page(self):
+        first = self.client.get(reverse('timeline') + '?page_size=2')
+        with patch('api.pagination.cached_entry', wraps=cached_entry) as cached:
+            self.client.get(self._next_url(first))
+        self.assertEqual(cached.call_args.args[3], settings.CURSOR_PAGE_CACHE_TIMEOUT)
+        self.assertLess(settings.CURSOR_PAGE_CACHE_TIMEOUT, settings.RESPONSE_CACHE_TIMEOUT)
+
+    def test_next_link_keeps_each_requests_own_parameters(self):
+        self.client.get(reverse('timeline') + '?page_size=1')
+        response = self.client.get(reverse('timeline') + '?page_size=1&foo=bar')
+        self.assertEqual(parse_qs(urlparse(self._next_url(response)).query)['foo'], ['bar'])
+        response = self.client.get(reverse('timeline') + '?page_size=1')
+        self.assertNotIn('foo', parse_qs(urlparse(self._next_url(response)).query))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('timeline') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        nested = encode_cursor([[1992], {'id': 7}])
+        response = self.client.get(reverse('timeline') + f'?cursor={nested}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_values_must_fit_the_ordering_fields(self):
+        for url, position in [
+            (reverse('timeline'), ['x', 'y']),
+            (reverse('movie-list'), ['x']),
+            (reverse('fan-message-feed'), ['not a date', 7]),
+        ]:
+            response = self.client.get(url + f'?cursor={encode_cursor(position)}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, url)
+
+    def test_invalid_page_size_is_rejected(self):
+        response = self.client.get(reverse('timeline') + '?page_size=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor([1992, 7]), ('year', 'id')), [1992, 7])
+
+
+class AsyncReadPathTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = self.create_ddlj()
+        Movie.objects.create(tmdb_id=12346, title="Kuch Kuch Hota Hai", release_year=1998)
+        for year in (1995, 1992, 1993):
+            Timeline.objects.create(year=year, event=f"Event {year}")
+
+    async def test_asgi_requests_are_served_by_async_views(self):
+        response = await self.async_client.get(reverse('movie-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIs(response.resolver_match.func, async_views.get_all_movies)
+        self.assertEqual([movie['title'] for movie in response.json()], ["Dilwale Dulhania Le Jayenge", "Kuch Kuch Hota Hai"])
+
+    def test_wsgi_requests_keep_the_sync_views(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNot(response.resolver_match.func, async_views.get_all_movies)
+
+    async def test_async_view_reuses_the_sync_views_cache_entry(self):
+        url = reverse('movie-by-title', args=[self.movie.title])
+        sync_response = await sync_to_async(self.client.get)(url)
+        with patch.object(async_views, 'aget_movie_by_title') as lookup:
+            async_response = await self.async_client.get(url)
+        lookup.assert_not_called()
+        self.assertEqual((async_response.content, async_response['ETag']), (sync_response.content, sync_response['ETag']))
+        not_modified = await self.async_client.get(url, headers={'If-None-Match': async_response['ETag']})
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_pages_match_the_sync_pages(self):
+        url = reverse('timeline') + '?page_size=2'
+        async_response = await self.async_client.get(url)
+        self.reset_caches()
+        sync_response = await sync_to_async(self.client.get)(url)
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response['Link'], sync_response['Link'])
+        response = await self.async_client.get(reverse('timeline') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get(reverse('events-by-year', args=[1992]) + f'?cursor={encode_cursor(["x", "y"])}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_lookup_of_unknown_movie_is_not_found(self):
+        response = await self.async_client.get(reverse('movie-songs', args=["Unknown"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.post(reverse('movie-list'))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class QueryPlanningTests(QueryBudgetMixin, APITestCase):
+    # One query per list page, plus one for the parent lookup on nested routes
+    QUERY_BUDGETS = {
+        'song-list': 1,
+        'quote-list': 1,
+        'award-list': 1,
+        'get-votes': 1,
+    }
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            movie = Movie.objects.create(tmdb_id=1000 + i, title=f"Movie {i}", release_year=1990 + i)
+            Song.objects.create(title=f"Song {i}", movie=movie, is_approved=True)
+            Quote.objects.create(text=f"Quote {i}", movie=movie, tags=["iconic"])
+            Award.objects.create(title=f"Award {i}", year=1990 + i, type="Filmfare", movie=movie)
+            FanVote.objects.create(movie=movie, vote_count=i)
+
+    def test_list_endpoints_stay_within_query_budget(self):
+        for name, budget in self.QUERY_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                response = self.assertWithinQueryBudget(reverse(name), budget)
+                self.assertEqual(len(response.data), 5)
+                self.assertIn('title', response.data[0]['movie'])
+
+    def test_nested_route_stays_within_query_budget(self):
+        self.assertWithinQueryBudget(reverse('movie-songs', args=['Movie 3']), 2)
+
+    def test_serializers_plan_their_nested_relations(self):
+        self.assertEqual(SongSerializer.query_plan(), (['movie'], []))
+        self.assertEqual(FanVoteSerializer.query_plan(), (['movie'], []))
+        self.assertEqual(MovieSerializer.query_plan(), ([], []))
+
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.movie = Movie.objects.create(
+            tmdb_id=12345, title="Dilwale Dulhania Le Jayenge", release_year=1995,
+            description="A romantic drama", rating=8.0, genres=["Romance", "Drama"]
+        )
+        Movie.objects.create(title="Untitled")
+        Quote.objects.create(text="Picture abhi baaki hai mere dost.", movie=self.movie, tags=["iconic"])
+        Quote.objects.create(text="Kabhi kabhi jeetne ke liye kuch haarna padta hai.")
+        Award.objects.create(title="Filmfare Best Actor", year=1993, type="Filmfare", movie=self.movie)
+        Award.objects.create(title="Padma Shri", year=2005, type="National")
+
+    def test_output_matches_model_serializers(self):
+        for serializer_class, queryset in (
+            (MovieSerializer, Movie.objects.order_by('id')),
+            (QuoteSerializer, Quote.objects.order_by('id')),
+            (AwardSerializer, Award.objects.order_by('id')),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                expected = json.loads(JSONRenderer().render(serializer_class(queryset, many=True).data))
+                actual = ValuesSerializer(serializer_class).serialize(queryset)
+                self.assertEqual(actual, expected)
+                self.assertEqual([list(row) for row in actual], [list(row) for row in expected])
+
+    def test_values_path_runs_one_query(self):
+        with self.assertNumQueries(1):
+            ValuesSerializer(AwardSerializer).serialize(Award.objects.all())
+
+    def test_benchmark_command_checks_both_paths(self):
+        out = StringIO()
+        call_command('benchmark_serializers', rows=20, iterations=2, stdout=out)
+        self.assertIn('speedup', out.getvalue())
+        self.assertEqual(Movie.objects.count(), 2)
+
+
+class VoteEngineTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = self.create_ddlj()
+        self.redis = get_redis()
+        if self.redis is not None:
+            self.redis.delete(PENDING_VOTES_KEY, FLUSHING_VOTES_KEY, VOTES_FLUSH_LOCK_KEY)
+
+    def _vote(self):
+        return self.client.post(reverse('vote-favorite'), {'title': self.movie.title}, format='json')
+
+    def test_fallback_increments_row_atomically(self):
+        with patch('api.votes.get_redis', return_value=None):
+            for _ in range(3):
+                response = self._vote()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['vote_count'], 3)
+        self.assertEqual(FanVote.objects.get(movie=self.movie).vote_count, 3)
+
+    def test_vote_for_unknown_movie(self):
+        response = self.client.post(reverse('vote-favorite'), {'title': 'Nonexistent Movie'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_apply_vote_deltas_batches_existing_and_new_rows(self):
+        other = Movie.objects.create(tmdb_id=54321, title="Kal Ho Naa Ho", release_year=2003)
+        FanVote.objects.create(movie=self.movie, vote_count=10)
+        with CaptureQueriesContext(connection) as queries:
+            apply_vote_deltas({self.movie.id: 5, other.id: 2, 999999: 4})
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(statements.count('INSERT'), 1)
+        self.assertEqual(FanVote.objects.get(movie=self.movie).vote_count, 15)
+        self.assertEqual(FanVote.objects.get(movie=other).vote_count, 2)
+
+    def test_redis_votes_are_pending_until_flushed(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        FanVote.objects.create(movie=self.movie, vote_count=10)
+        for _ in range(3):
+            response = self._vote()
+        self.assertEqual(response.data['vote_count'], 13)
+        self.assertEqual(FanVote.objects.get(movie=self.movie).vote_count, 10)
+        self.assertEqual(self.client.get(reverse('get-votes')).data[0]['vote_count'], 13)
+        self.assertEqual(flush_pending_votes(), 3)
+        self.assertEqual(FanVote.objects.get(movie=self.movie).vote_count, 13)
+        self.assertEqual(self.client.get(reverse('get-votes')).data[0]['vote_count'], 13)
+
+    def test_flush_leaves_another_flushers_lock_alone(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        self._vote()
+        self.redis.set(VOTES_FLUSH_LOCK_KEY, 'other-flusher', px=60000)
+        self.assertEqual(flush_pending_votes(), 0)
+        self.assertEqual(self.redis.get(VOTES_FLUSH_LOCK_KEY), b'other-flusher')
+        self.redis.delete(VOTES_FLUSH_LOCK_KEY)
+        self.assertEqual(flush_pending_votes(), 1)
+
+
+@override_settings(LEADERBOARD_FRAME_INTERVAL=0.01, LEADERBOARD_HEARTBEAT=5)
+class LeaderboardStreamTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ddlj = self.create_ddlj()
+        self.kkhh = Movie.objects.create(tmdb_id=12346, title="Kuch Kuch Hota Hai", release_year=1998)
+        FanVote.objects.create(movie=self.ddlj, vote_count=5)
+        FanVote.objects.create(movie=self.kkhh, vote_count=3)
+        redis = get_redis()
+        if redis is not None:
+            redis.delete(PENDING_VOTES_KEY, FLUSHING_VOTES_KEY, RANKING_KEY, RANKING_BUILT_KEY)
+
+    async def _vote(self, movie, times):
+        for _ in range(times):
+            await sync_to_async(record_vote)(movie.id)
+
+    def _event(self, chunk):
+        lines = chunk.decode().strip().split('\n')
+        return lines[-2].split(': ', 1)[1], json.loads(lines[-1].split(': ', 1)[1])
+
+    def test_rows_are_ranked_with_pending_votes(self):
+        async_to_sync(self._vote)(self.kkhh, 4)
+        rows = leaderboard_rows()
+        self.assertEqual((rows[self.kkhh.id]['rank'], rows[self.kkhh.id]['votes']), (1, 7))
+        self.assertEqual((rows[self.ddlj.id]['rank'], rows[self.ddlj.id]['votes']), (2, 5))
+
+    @override_settings(LEADERBOARD_FRAME_INTERVAL=60)  # Frames are published explicitly below
+    async def test_stream_sends_snapshot_then_delta(self):
+        url = reverse('leaderboard-stream', urlconf=settings.ASYNC_ROOT_URLCONF)
+        response = await self.async_client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        try:
+            event, rows = self._event(await chunks.__anext__())
+            self.assertEqual(event, 'snapshot')
+            self.assertEqual([row['title'] for row in rows], [self.ddlj.title, self.kkhh.title])
+
+            await self._vote(self.kkhh, 4)
+            await broadcaster.publish_frame()
+            event, delta = self._event(await chunks.__anext__())
+            self.assertEqual(event, 'delta')
+            self.assertEqual(
+                [(row['title'], row['votes'], row['rank']) for row in delta['changed']],
+                [(self.kkhh.title, 7, 1), (self.ddlj.title, 5, 2)]
+            )
+        finally:
+            await chunks.aclose()
+
+    async def test_one_computation_per_frame_for_all_subscribers(self):
+        board = LeaderboardBroadcaster()
+        first, second = board.subscribe(), board.subscribe()
+        try:
+            await board.snapshot()
+            await self._vote(self.kkhh, 3)
+            with patch('api.leaderboard.leaderboard_rows', wraps=leaderboard_rows) as compute:
+                await board.publish_frame()
+            self.assertEqual(compute.call_count, 1)
+            self.assertEqual(await first.next_frame(timeout=1), await second.next_frame(timeout=1))
+        finally:
+            board.unsubscribe(first)
+            board.unsubscribe(second)
+        self.assertIsNone(board.task)
+
+    async def test_slow_subscriber_gets_one_merged_frame(self):
+        subscription = Subscription()
+        subscription.push({1: {'votes': 1}, 2: {'votes': 1}})
+        subscription.push({1: {'votes': 2}, 3: None})
+        self.assertEqual(await subscription.next_frame(timeout=1), {1: {'votes': 2}, 2: {'votes': 1}, 3: None})
+        self.assertIsNone(await subscription.next_frame(timeout=0.01))
+
+
+class VoteRankingTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = get_redis()
+        if self.redis is not None:
+            self.redis.delete(PENDING_VOTES_KEY, FLUSHING_VOTES_KEY, RANKING_KEY, RANKING_BUILT_KEY)
+        self.movies = [
+            Movie.objects.create(tmdb_id=12345 + i, title=title, release_year=1995 + i)
+            for i, title in enumerate(["Dilwale Dulhania Le Jayenge", "Kuch Kuch Hota Hai", "Kal Ho Naa Ho", "Swades"])
+        ]
+        for movie, votes in zip(self.movies, (5, 9, 1, 7)):
+            FanVote.objects.create(movie=movie, vote_count=votes)
+
+    def test_top_n_is_ranked_and_bounded(self):
+        response = self.client.get(reverse('get-votes') + '?top=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['rank'], row['title'], row['vote_count']) for row in response.data],
+            [(1, "Kuch Kuch Hota Hai", 9), (2, "Swades", 7)]
+        )
+        response = self.client.get(reverse('get-votes') + '?top=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rank_of_movie_with_neighbours(self):
+        for _ in range(3):
+            record_vote(self.movies[0].id)
+        response = self.client.get(reverse('movie-rank', args=["Dilwale Dulhania Le Jayenge"]) + '?around=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rank'], response.data['vote_count']), (2, 8))
+        self.assertEqual([row['title'] for row in response.data['around']], ["Kuch Kuch Hota Hai", "Dilwale Dulhania Le Jayenge", "Swades"])
+
+    def test_unknown_or_unvoted_movie_has_no_rank(self):
+        Movie.objects.create(tmdb_id=99999, title="Pardes", release_year=1997)
+        for title in ("Nonexistent Movie", "Pardes"):
+            response = self.client.get(reverse('movie-rank', args=[title]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_reconciles_ranking_with_postgres(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        self.assertEqual(self.client.get(reverse('get-votes') + '?top=1').data[0]['title'], "Kuch Kuch Hota Hai")
+        FanVote.objects.filter(movie=self.movies[2]).update(vote_count=50)  # e.g. corrected in the admin
+        self.assertEqual(self.client.get(reverse('get-votes') + '?top=1').data[0]['title'], "Kuch Kuch Hota Hai")
+        enqueue_job(VOTE_RANKING_REBUILD, {})
+        run_pending_jobs()
+        self.assertEqual(self.client.get(reverse('get-votes') + '?top=1').data[0]['vote_count'], 50)
+
+
+@override_settings(FAN_MESSAGE_BATCH_SIZE=2)
+class FanMessageIngestionTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = get_redis()
+        if self.redis is not None:
+            self.redis.delete(PENDING_MESSAGES_KEY, FLUSHING_MESSAGES_KEY, FLUSH_LOCK_KEY)
+
+    def _submit(self, count):
+        for i in range(count):
+            response = self.client.post(reverse('submit-message'), {'name': f"Fan{i}", 'message': "Love SRK!"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        link = response.get('Link')
+        return [message['name'] for message in response.data], link[link.index('<') + 1:link.index('>')] if link else None
+
+    def test_messages_are_acknowledged_then_stored_in_batches(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        self.assertEqual(self._feed(reverse('fan-message-feed')), ([], None))
+        self._submit(5)
+        self.assertEqual(FanMessage.objects.count(), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_fan_messages(), 5)
+        self.assertEqual([query['sql'].split()[0] for query in queries.captured_queries].count('INSERT'), 3)
+        self.assertEqual(len(self._feed(reverse('fan-message-feed'))[0]), 5)  # The flush invalidated the cached page
+        self.assertEqual(flush_fan_messages(), 0)
+
+    def test_replayed_batch_is_not_stored_twice(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        self._submit(2)
+        queued = self.redis.lrange(PENDING_MESSAGES_KEY, 0, -1)
+        flush_fan_messages()
+        self.redis.rpush(FLUSHING_MESSAGES_KEY, *queued)  # As if a flush died before trimming its batch
+        flush_fan_messages()
+        self.assertEqual(FanMessage.objects.count(), 2)
+
+    def test_flusher_that_lost_its_lock_does_not_trim(self):
+        if self.redis is None:
+            self.skipTest("Requires the Redis cache backend")
+        self._submit(4)
+        bulk_create = FanMessage.objects.bulk_create
+
+        def slow_insert(*args, **kwargs):
+            # The lock expires mid-insert and another flusher takes it
+            self.redis.set(FLUSH_LOCK_KEY, 'other-flusher')
+            return bulk_create(*args, **kwargs)
+
+        with patch.object(FanMessage.objects, 'bulk_create', side_effect=slow_insert):
+            with self.assertRaises(LockNotOwnedError):
+                flush_fan_messages()
+        self.assertEqual(self.redis.llen(FLUSHING_MESSAGES_KEY), 4)  # Left for the lock holder
+        self.assertEqual(self.redis.get(FLUSH_LOCK_KEY), b'other-flusher')
+        self.redis.delete(FLUSH_LOCK_KEY)
+        self.assertEqual(flush_fan_messages(), 4)
+        self.assertEqual(FanMessage.objects.count(), 4)
+
+    def test_fallback_inserts_directly(self):
+        with patch('api.fan_messages.get_redis', return_value=None):
+            self._submit(1)
+        self.assertEqual(FanMessage.objects.count(), 1)
+
+    def test_feed_is_newest_first_by_cursor(self):
+        now = timezone.now()
+        for i in range(5):
+            FanMessage.objects.create(name=f"Fan{i}", message="Love SRK!", created_at=now - timedelta(minutes=i))
+        names, url = [], reverse('fan-message-feed') + '?page_size=2'
+        while url:
+            page, url = self._feed(url)
+            names += page
+        self.assertEqual(names, [f"Fan{i}" for i in range(5)])
+
+
+class RandomQuoteTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(tmdb_id=12345, title="Om Shanti Om", release_year=2007)
+        self.other = Movie.objects.create(tmdb_id=54321, title="Chak De! India", release_year=2007)
+        self.quotes = [
+            Quote.objects.create(text=f"Om Shanti Om quote {i}", movie=self.movie) for i in range(3)
+        ] + [Quote.objects.create(text="Sattar minute", movie=self.other)]
+
+    def test_random_quote_is_a_single_primary_key_fetch_once_indexed(self):
+        self.client.get(reverse('random-quote'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('random-quote'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_random_quote_varies_between_requests(self):
+        texts = {self.client.get(reverse('random-quote')).data['text'] for _ in range(40)}
+        self.assertGreater(len(texts), 1)
+
+    def test_random_quote_filtered_by_movie(self):
+        for _ in range(10):
+            response = self.client.get(reverse('random-quote'), {'movie': 'Chak De! India'})
+            self.assertEqual(response.data['text'], "Sattar minute")
+
+    def test_new_quote_enters_the_index(self):
+        self.client.get(reverse('random-quote'), {'movie': 'Chak De! India'})
+        Quote.objects.filter(movie=self.other).delete()
+        response = self.client.get(reverse('random-quote'), {'movie': 'Chak De! India'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        Quote.objects.create(text="Jo hamara hai, woh hamara hai", movie=self.other)
+        response = self.client.get(reverse('random-quote'), {'movie': 'Chak De! India'})
+        self.assertEqual(response.data['text'], "Jo hamara hai, woh hamara hai")
+
+
+class SearchTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(tmdb_id=12345, title="Om Shanti Om", release_year=2007)
+        self.other = Movie.objects.create(tmdb_id=54321, title="Chak De! India", release_year=2007)
+        Song.objects.create(title="Dard-e-Disco", movie=self.movie, is_approved=True)
+        Song.objects.create(title="Shanti Unreleased", movie=self.movie, is_approved=False)
+        Quote.objects.create(text="Picture abhi baaki hai mere dost", movie=self.movie)
+
+    def test_search_returns_hits_across_models(self):
+        response = self.client.get(reverse('search'), {'q': 'om shanti'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(hit['type'], hit['id']) for hit in response.data], [('movie', self.movie.id)])
+        response = self.client.get(reverse('search'), {'q': 'disco'})
+        self.assertEqual(response.data[0]['movie'], "Om Shanti Om")
+
+    def test_search_skips_unapproved_songs_and_filters_by_type(self):
+        response = self.client.get(reverse('search'), {'q': 'shanti', 'type': 'song'})
+        self.assertEqual(response.data, [])
+        response = self.client.get(reverse('search'), {'q': 'shanti', 'type': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_rejects_short_queries(self):
+        response = self.client.get(reverse('search'), {'q': ' o '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_pages_are_cached_and_invalidated_on_write(self):
+        for i in range(3):
+            Quote.objects.create(text=f"Dost quote {i}", movie=self.other)
+        first = self.client.get(reverse('search'), {'q': 'dost', 'page_size': 2})
+        self.assertEqual(len(first.data), 2)
+        self.assertIn('rel="next"', first['Link'])
+        cursor = first['Link'].split('cursor=')[1].split('>')[0]
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('search'), {'q': 'dost', 'page_size': 2, 'cursor': cursor})
+        self.assertEqual(len(second.data), 2)
+        self.assertNotIn('Link', second)
+        Quote.objects.create(text="Dost fresh quote", movie=self.other)
+        response = self.client.get(reverse('search'), {'q': 'dost', 'page_size': 10})
+        self.assertEqual(len(response.data), 5)
+
+
+class FakeTMDbHandler(BaseHTTPRequestHandler):
+    """Local TMDb stand-in: 3 discover pages of 2 movies each."""
+    pages = {
+        page: [
+            {'id': 100 + page * 10 + i, 'title': f"Movie {page}.{i}", 'release_date': f"{1990 + page}-01-01",
+             'overview': "", 'poster_path': None, 'vote_average': 7.0, 'genre_ids': [18]}
+            for i in range(2)
+        ]
+        for page in (1, 2, 3)
+    }
+    requested_pages = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/search/person'):
+            body = {'results': [{'id': 35742, 'name': params['query']}]}
+        elif url.path.endswith('/genre/movie/list'):
+            body = {'genres': [{'id': 18, 'name': "Drama"}]}
+        elif url.path.endswith('/discover/movie') and params.get('with_cast') == '35742':
+            page = int(params['page'])
+            self.requested_pages.append(page)
+            body = {'page': page, 'total_pages': len(self.pages), 'results': self.pages[page]}
+        else:
+            self.send_error(404)
+            return
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TMDbIngestionTests(FreshCacheMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTMDbHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(TMDB_API_URL=f'http://127.0.0.1:{cls.server.server_port}')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        FakeTMDbHandler.requested_pages = []
+
+    def test_command_ingests_every_page(self):
+        out = StringIO()
+        call_command('load_tmdb_data', '--concurrency', '2', stdout=out)
+        self.assertIn("Upserted 6 movies", out.getvalue())
+        self.assertEqual(sorted(FakeTMDbHandler.requested_pages), [1, 2, 3])
+        self.assertEqual(Movie.objects.count(), 6)
+        self.assertEqual(Movie.objects.get(tmdb_id=121).genres, ["Drama"])
+
+    def test_ingest_updates_existing_movies_and_keeps_role(self):
+        Movie.objects.create(tmdb_id=110, title="Old title", role="Raj")
+        call_command('load_tmdb_data', stdout=StringIO())
+        call_command('load_tmdb_data', stdout=StringIO())
+        movie = Movie.objects.get(tmdb_id=110)
+        self.assertEqual((movie.title, movie.role, movie.release_year), ("Movie 1.0", "Raj", 1991))
+        self.assertEqual(Movie.objects.count(), 6)
+
+    def test_ingest_invalidates_responses_cached_under_a_movies_old_values(self):
+        Movie.objects.create(tmdb_id=110, title="Old title", release_year=1985)
+        url = reverse('movies-by-year', args=[1985])
+        self.assertEqual([movie['title'] for movie in self.client.get(url).json()], ["Old title"])
+        call_command('load_tmdb_data', stdout=StringIO())
+        self.assertEqual(self.client.get(url).json(), [])
+
+
+class JobQueueTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='fan', password='secret')
+        movie = self.create_ddlj()
+        self.song = Song.objects.create(title="Tujhe Dekha To", movie=movie)
+
+    @patch('api.jobs.enhance_song_with_spotify')
+    def test_job_runs_and_succeeds(self, mock_enhance):
+        job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id})
+        self.assertEqual(run_pending_jobs(), 1)
+        mock_enhance.assert_called_once_with("Tujhe Dekha To", "Dilwale Dulhania Le Jayenge", retries=1, backoff=0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.SUCCEEDED, 1, None))
+
+    @patch('api.jobs.enhance_song_with_spotify', side_effect=ValidationError("Spotify API error"))
+    def test_failing_job_backs_off_then_dead_letters(self, mock_enhance):
+        job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id}, max_attempts=2)
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(run_pending_jobs(), 0)  # Not due yet
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 2))
+        self.assertIn("Spotify API error", job.last_error)
+
+    def test_expired_lease_is_reclaimed_and_stale_outcome_discarded(self):
+        job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id})
+        stale = claim_job()
+        self.assertIsNone(claim_job())  # Leased
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = claim_job()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        with patch('api.jobs.enhance_song_with_spotify'):
+            self.assertFalse(run_job(stale))
+            self.assertTrue(run_job(reclaimed))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.SUCCEEDED)
+
+    def test_long_running_job_renews_its_lease(self):
+        leases = []
+
+        def render(song_ids, on_rendered):
+            for _ in song_ids:
+                Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() + timedelta(seconds=1))
+                job.locked_until = Job.objects.get(pk=job.pk).locked_until  # As if time had passed
+                on_rendered()
+                leases.append(Job.objects.get(pk=job.pk).locked_until)
+            return len(song_ids), 0
+
+        enqueue_job(MEDIA_PROCESSING, {'song_ids': [1, 2]})
+        job = claim_job()
+        with patch('api.jobs.process_song_media', side_effect=render):
+            self.assertTrue(run_job(job))
+        self.assertEqual(len(leases), 2)
+        for lease in leases:
+            self.assertGreater(lease, timezone.now() + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT - 5))
+
+    def test_job_status_endpoint(self):
+        job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id}, created_by=self.user)
+        response = self.client.get(reverse('job-status', args=[job.id]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('job-status', args=[job.id]))
+        self.assertEqual((response.data['status'], response.data['kind']), (Job.PENDING, SPOTIFY_ENRICHMENT))
+        response = self.client.get(reverse('job-status', args=[job.id + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_job_status_is_limited_to_the_jobs_owner_and_staff(self):
+        job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id}, created_by=self.user)
+        system_job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': self.song.id})
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='secret'))
+        for pk in (job.id, system_job.id):
+            response = self.client.get(reverse('job-status', args=[pk]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=User.objects.create_user(username='staff', password='secret', is_staff=True))
+        for pk in (job.id, system_job.id):
+            response = self.client.get(reverse('job-status', args=[pk]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SpotifyBatchEnrichmentTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        movie = self.create_ddlj()
+        self.known = Song.objects.create(title="Tujhe Dekha To", movie=movie, spotify_id='known')
+        self.found = Song.objects.create(title="Mehndi Laga Ke Rakhna", movie=movie)
+        self.missing = Song.objects.create(title="Unreleased Demo", movie=movie)
+
+    def track(self, track_id, popularity):
+        return {'id': track_id, 'preview_url': None, 'popularity': popularity, 'duration_ms': 250000}
+
+    @patch('api.enrichment.get_spotify_client')
+    def test_enrich_songs_batches_lookups_and_bulk_updates(self, mock_client):
+        sp = MagicMock()
+        sp.tracks.return_value = {'tracks': [self.track('known', 90)]}
+        sp.search.side_effect = lambda q, **kwargs: {
+            'tracks': {'items': [self.track('found', 70)] if 'Mehndi' in q else []}
+        }
+        mock_client.return_value = sp
+        with CaptureQueriesContext(connection) as queries:
+            counts = enrich_songs()
+        self.assertEqual(counts, {'updated': 2, 'unmatched': 1, 'failed': 0})
+        sp.tracks.assert_called_once_with(['known'])
+        self.assertEqual(sp.search.call_count, 2)
+        # One bulk UPDATE; enriched fields are not searchable, so no search_vector refresh follows
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('search_vector', updates[0]['sql'])
+        self.known.refresh_from_db()
+        self.found.refresh_from_db()
+        self.assertEqual((self.known.popularity, self.known.duration), (90, 250))
+        self.assertEqual((self.found.spotify_id, self.found.popularity), ('found', 70))
+
+    def test_call_spotify_pauses_all_callers_for_retry_after(self):
+        request = MagicMock(side_effect=[
+            spotipy.exceptions.SpotifyException(429, -1, "Too many requests", headers={'Retry-After': '7'}),
+            {'ok': True}
+        ])
+        with patch('api.services.spotify_bucket') as bucket:
+            bucket.acquire.return_value = True
+            self.assertEqual(call_spotify(request), {'ok': True})
+        bucket.pause.assert_called_once_with(7.0)
+
+    def test_token_bucket_limits_and_pauses(self):
+        bucket = TokenBucket('test', rate=1, capacity=2)
+        if get_redis() is not None:
+            get_redis().delete(bucket.key)
+        self.assertEqual([bucket.try_acquire() for _ in range(2)], [0, 0])
+        self.assertGreater(bucket.try_acquire(), 0)
+        self.assertFalse(bucket.acquire(timeout=0.1))
+        bucket.pause(30)
+        self.assertGreater(bucket.try_acquire(), 20)
+
+
+class ClientRegistryTests(FreshCacheMixin, APITestCase):
+    def test_sessions_are_reused_until_the_process_forks(self):
+        registry = ClientRegistry()
+        session = registry.session('tmdb')
+        self.assertIs(registry.session('tmdb'), session)
+        self.assertIsNot(registry.session('spotify'), session)
+        registry._pid = -1  # As seen from a forked child
+        self.assertIsNot(registry.session('tmdb'), session)
+
+    def test_session_applies_default_timeout(self):
+        session = ClientRegistry().session('tmdb')
+        with patch('requests.adapters.HTTPAdapter.send') as send:
+            send.return_value.status_code = 200
+            send.return_value.headers = {}
+            send.return_value.is_redirect = False
+            session.get('http://tmdb.invalid/3/genre/movie/list')
+        self.assertEqual(send.call_args.kwargs['timeout'], settings.TMDB_TIMEOUT)
+
+    @override_settings(SPOTIFY_CLIENT_ID='id', SPOTIFY_CLIENT_SECRET='secret')
+    def test_spotify_client_and_token_are_shared(self):
+        registry = ClientRegistry()
+        sp = registry.spotify()
+        self.assertIs(registry.spotify(), sp)
+        token = {'access_token': 'abc', 'expires_in': 3600, 'expires_at': int(time.time()) + 3600}
+        sp.auth_manager.cache_handler.save_token_to_cache(token)
+        other = ClientRegistry()
+        with patch('spotipy.oauth2.SpotifyClientCredentials._request_access_token') as request_token:
+            self.assertEqual(other.spotify().auth_manager.get_access_token(as_dict=False), 'abc')
+        request_token.assert_not_called()
+        self.assertEqual(registry.counts['spotify_token_fetches'], 1)
+
+    def test_client_stats_endpoint_is_admin_only(self):
+        admin = User.objects.create_superuser(username='admin', password='secret')
+        clients.session('tmdb')
+        self.client.force_authenticate(user=User.objects.create_user(username='fan', password='secret'))
+        self.assertEqual(self.client.get(reverse('client-stats')).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('client-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('tmdb', response.data['providers'])
+        self.assertEqual(response.data['circuits']['spotify']['state'], CLOSED)
+
+
+@override_settings(CIRCUIT_FAILURE_THRESHOLD=2, CIRCUIT_RESET_TIMEOUT=30)
+class ProviderResilienceTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = self.create_ddlj()
+        Song.objects.create(title="Unreleased Demo", movie=self.movie)
+
+    @patch('api.services.get_spotify_client')
+    def test_spotify_miss_is_cached_briefly(self, mock_client):
+        mock_client.return_value.search.return_value = {'tracks': {'items': []}}
+        enhance_song_with_spotify("Unreleased Demo", "Dilwale Dulhania Le Jayenge")
+        enhance_song_with_spotify("Unreleased Demo", "Dilwale Dulhania Le Jayenge")
+        self.assertEqual(mock_client.return_value.search.call_count, 1)
+
+    def test_breaker_opens_fails_fast_and_recovers_through_one_trial(self):
+        breaker = CircuitBreaker('test')
+        outage = MagicMock(side_effect=ConnectionError("down"))
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(outage)
+        self.assertEqual(breaker.state(), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(outage)
+        self.assertEqual(outage.call_count, 2)
+
+        cache.set(breaker.opened_until_key, time.time() - 1, timeout=None)
+        self.assertEqual(breaker.state(), HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # Only one trial at a time
+        cache.delete(breaker.trial_key)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.status()['state'], CLOSED)
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        breaker = CircuitBreaker('test')
+        for _ in range(3):
+            with self.assertRaises(spotipy.exceptions.SpotifyException):
+                breaker.call(MagicMock(side_effect=spotipy.exceptions.SpotifyException(404, -1, "Not found")))
+        self.assertEqual(breaker.state(), CLOSED)
+
+    @override_settings(TMDB_API_URL='http://127.0.0.1:9')  # Nothing listens on the discard port
+    def test_tmdb_outage_opens_the_breaker_and_ingestion_fails_fast(self):
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                ingest_filmography(person_id=35742)
+        self.assertEqual(circuit_states()['tmdb']['state'], OPEN)
+        with patch('api.clients.TimeoutSession.request') as request:
+            with self.assertRaises(CircuitOpenError):
+                ingest_filmography(person_id=35742)
+        request.assert_not_called()
+        self.assertEqual(list(Movie.objects.all()), [self.movie])
+
+def wav_bytes(seconds=1, rate=8000, level=0):
+    """A constant-level 16-bit mono WAV (silent by default): 8 kHz gives 128 kbps."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(level.to_bytes(2, 'little', signed=True) * rate * seconds)
+    return buffer.getvalue()
+
+class AudioProbeTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('uploader', password='secret'))
+        self.create_ddlj()
+
+    def upload(self, name, content, content_type):
+        data = {
+            'title': 'Yeh Dil Deewana',
+            'movie_title': 'Dilwale Dulhania Le Jayenge',
+            'audio_file': SimpleUploadedFile(name, content, content_type=content_type)
+        }
+        return self.client.post(reverse('upload-song'), data, format='multipart')
+
+    def test_sniff_audio_format(self):
+        self.assertEqual(sniff_audio_format(wav_bytes()[:12]), WAV)
+        self.assertEqual(sniff_audio_format(b'ID3\x04\x00'), MPEG)
+        self.assertEqual(sniff_audio_format(b'\xff\xfb\x90\x00'), MPEG)
+        self.assertIsNone(sniff_audio_format(b'Fake MP3 content'))
+
+    def test_metadata_is_read_before_the_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.upload('song.wav', wav_bytes(), 'audio/wav')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        song = Song.objects.get(title='Yeh Dil Deewana')
+        self.assertEqual((song.duration, song.bitrate), (1, 128))
+        writes = [q['sql'].split()[0] for q in queries.captured_queries if q['sql'].startswith(('INSERT INTO "api_song"', 'UPDATE "api_song"'))]
+        self.assertEqual(writes, ['INSERT'])  # search_vector is filled by the insert itself on Postgres
+        song.audio_file.delete()
+
+    def test_content_contradicting_extension_is_rejected(self):
+        response = self.upload('song.mp3', wav_bytes(), 'audio/mpeg')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('audio_file', response.data['error'])
+        self.assertFalse(Song.objects.exists())
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4096)
+class ChunkedUploadTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.client.force_authenticate(User.objects.create_user('uploader', password='secret'))
+        self.create_ddlj()
+        self.audio = wav_bytes(seconds=2)
+
+    def start(self, filename='song.wav'):
+        response = self.client.post(reverse('start-upload'), {
+            'title': 'Yeh Dil Deewana', 'movie_title': 'Dilwale Dulhania Le Jayenge',
+            'filename': filename, 'size': len(self.audio)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['token']
+
+    def put_chunk(self, token, index, content=None):
+        content = self.audio[index * 4096:(index + 1) * 4096] if content is None else content
+        return self.client.put(
+            reverse('upload-chunk', args=[token, index]), content, content_type='application/octet-stream'
+        )
+
+    def test_interrupted_upload_resumes_and_completes_once(self):
+        token = self.start()
+        for index in range(3):
+            self.assertEqual(self.put_chunk(token, index).status_code, status.HTTP_200_OK)
+        upload = self.client.get(reverse('chunked-upload', args=[token])).data
+        self.assertEqual((upload['received_chunks'], upload['chunk_count']), (3, 8))
+        self.assertEqual(upload['next_chunk_url'], reverse('upload-chunk', args=[token, 3]))
+        self.assertEqual(self.put_chunk(token, 5).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.client.post(reverse('complete-upload', args=[token])).status_code, status.HTTP_409_CONFLICT)
+
+        for index in range(2, 8):  # Chunk 2 again, as if its acknowledgement had been lost
+            self.assertEqual(self.put_chunk(token, index).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('complete-upload', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        song = Song.objects.get(title='Yeh Dil Deewana')
+        self.assertEqual((song.duration, song.bitrate, song.is_approved), (2, 128, False))
+        with song.audio_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.audio)
+        self.assertFalse(os.listdir(os.path.join(self.media.name, 'partial-uploads')))
+        self.assertEqual(Job.objects.get(pk=response.data['enrichment_job']).created_by.username, 'uploader')
+
+        response = self.client.post(reverse('complete-upload', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Song.objects.count(), 1)
+
+    def upload_all(self):
+        token = self.start()
+        for index in range(8):
+            self.assertEqual(self.put_chunk(token, index).status_code, status.HTTP_200_OK)
+        return token
+
+    def test_duplicate_that_wins_the_insert_race_is_rejected_and_its_file_removed(self):
+        token = self.upload_all()
+        Song.objects.create(
+            title="Tujhe Dekha To", movie=Movie.objects.get(), content_hash=hashlib.sha256(self.audio).hexdigest()
+        )
+        # Both completions pass the duplicate check before either inserts
+        with patch('django.db.models.query.QuerySet.exists', side_effect=[False, True]):
+            response = self.client.post(reverse('complete-upload', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "This audio file has already been uploaded.")
+        self.assertFalse(os.listdir(os.path.join(self.media.name, 'songs')))
+        self.assertFalse(ChunkedUpload.objects.filter(token=token).exists())
+
+    def test_failure_after_assembly_removes_the_file(self):
+        token = self.upload_all()
+        with patch('api.uploads.content_hash', side_effect=OSError("Storage read failed")):
+            response = self.client.post(reverse('complete-upload', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(os.listdir(os.path.join(self.media.name, 'songs')))
+        self.assertFalse(ChunkedUpload.objects.filter(token=token).exists())
+
+    def test_bad_chunks_are_not_acknowledged(self):
+        token = self.start(filename='song.mp3')
+        self.assertEqual(self.put_chunk(token, 0).status_code, status.HTTP_400_BAD_REQUEST)  # WAV bytes
+        self.assertEqual(self.put_chunk(token, 0, b'\xff\xfb' + b'\x00' * 10).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ChunkedUpload.objects.get(token=token).received_chunks, 0)
+
+    def test_invalid_uploads_are_rejected_at_start(self):
+        response = self.client.post(reverse('start-upload'), {
+            'title': 'Yeh Dil Deewana', 'movie_title': 'Dilwale Dulhania Le Jayenge',
+            'filename': 'song.txt', 'size': settings.CHUNKED_UPLOAD_MAX_SIZE + 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['error']), {'filename', 'size'})
+
+    def test_s3_chunks_stream_into_multipart_parts(self):
+        storage = MagicMock(bucket_name='songs-bucket')
+        storage.get_available_name.return_value = 'songs/song.wav'
+        storage._normalize_name.side_effect = lambda name: name
+        s3 = storage.connection.meta.client
+        s3.create_multipart_upload.return_value = {'UploadId': 'multipart-1'}
+        s3.upload_part.side_effect = lambda Body, PartNumber, **kwargs: {'ETag': f'etag-{PartNumber}-{len(Body.read())}'}
+        token = self.start()
+        upload = ChunkedUpload.objects.get(token=token)
+        with patch('api.uploads.default_storage', storage):
+            store = chunk_store(storage)
+            store.start(upload)
+            upload.save()
+            for index in range(upload.chunk_count):
+                upload = write_chunk(upload, index, io.BytesIO(self.audio[index * 4096:]), upload.chunk_length(index))
+            store.complete(upload)
+        self.assertEqual(upload.parts[-1], f'etag-8-{len(self.audio) - 7 * 4096}')
+        s3.complete_multipart_upload.assert_called_once()
+        parts = s3.complete_multipart_upload.call_args.kwargs['MultipartUpload']['Parts']
+        self.assertEqual([part['PartNumber'] for part in parts], list(range(1, 9)))
+        self.assertEqual(s3.complete_multipart_upload.call_args.kwargs['UploadId'], 'multipart-1')
+
+class SongStreamTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        movie = self.create_ddlj()
+        self.audio = wav_bytes()
+        self.song = Song(title="Tujhe Dekha To", movie=movie, is_approved=True)
+        self.song.audio_file.save('tujhe.wav', ContentFile(self.audio))
+        self.url = reverse('stream-song', args=[self.song.id])
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_whole_file_and_byte_ranges(self):
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, self.audio))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response, body = self.get(Range='bytes=10-19')
+        self.assertEqual((response.status_code, body), (206, self.audio[10:20]))
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.audio)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response, body = self.get(Range='bytes=-5')
+        self.assertEqual((response.status_code, body), (206, self.audio[-5:]))
+        response, body = self.get(Range=f'bytes={len(self.audio) - 4}-')
+        self.assertEqual(body, self.audio[-4:])
+
+        response, _ = self.get(Range=f'bytes={len(self.audio)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.audio)}')
+
+    def test_only_approved_songs_are_served_and_the_check_is_cached(self):
+        Song.objects.filter(pk=self.song.pk).update(is_approved=False)
+        self.assertEqual(self.get()[0].status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get()[0].status_code, 404)
+        Song.objects.filter(pk=self.song.pk).update(is_approved=True)  # Bumps the songs tag
+        self.assertEqual(self.get()[0].status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get()[0].status_code, 200)
+
+    def test_remote_storage_redirects_to_a_cached_presigned_url(self):
+        storage = MagicMock()
+        storage.url.return_value = 'https://songs.s3.amazonaws.com/songs/tujhe.wav?X-Amz-Signature=abc'
+        with patch('api.streaming.default_storage', storage):
+            for _ in range(2):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(response['Location'], storage.url.return_value)
+        storage.url.assert_called_once_with(self.song.audio_file.name)
+
+class ContentDeduplicationTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.client.force_authenticate(User.objects.create_user('uploader', password='secret'))
+        self.movie = self.create_ddlj()
+
+    def upload(self, title, content):
+        return self.client.post(reverse('upload-song'), {
+            'title': title, 'movie_title': 'Dilwale Dulhania Le Jayenge',
+            'audio_file': SimpleUploadedFile('song.wav', content, content_type='audio/wav')
+        }, format='multipart')
+
+    def test_same_audio_under_another_title_is_rejected_before_storage(self):
+        audio = wav_bytes()
+        self.assertEqual(self.upload('Yeh Dil Deewana', audio).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Song.objects.get().content_hash, hashlib.sha256(audio).hexdigest())
+        stored = os.listdir(os.path.join(self.media.name, 'songs'))
+        response = self.upload('Yeh Dil Deewana (Remix)', audio)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('audio_file', response.data['error'])
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'songs')), stored)
+        self.assertEqual(self.upload('Yeh Dil Deewana (Remix)', wav_bytes(seconds=2)).status_code, status.HTTP_201_CREATED)
+
+    def test_backfill_hashes_existing_files_and_reports_duplicates(self):
+        songs = []
+        for title, content in [('Tujhe Dekha To', b'first'), ('Mehndi Laga Ke', b'second'), ('Ho Gaya Hai Tujhko', b'first')]:
+            song = Song(title=title, movie=self.movie)
+            song.audio_file.save(f'{title}.mp3', ContentFile(content))
+            songs.append(song)
+        out = StringIO()
+        call_command('backfill_content_hashes', workers=2, stdout=out)
+        hashes = [Song.objects.get(pk=song.pk).content_hash for song in songs]
+        self.assertEqual(hashes, [hashlib.sha256(b'first').hexdigest(), hashlib.sha256(b'second').hexdigest(), None])
+        self.assertIn(f'duplicate an earlier song\'s audio: {songs[2].pk}', out.getvalue())
+
+    def test_admin_rejects_duplicate_audio_as_a_form_error(self):
+        audio = wav_bytes()
+        self.assertEqual(self.upload('Yeh Dil Deewana', audio).status_code, status.HTTP_201_CREATED)
+        form = SongAdminForm(
+            data={'title': 'Yeh Dil Deewana (Remix)', 'movie': self.movie.pk},
+            files={'audio_file': SimpleUploadedFile('remix.wav', audio, content_type='audio/wav')}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['audio_file'], ["This audio file has already been uploaded."])
+
+@override_settings(MEDIA_WAVEFORM_POINTS=100, MEDIA_PREVIEW_SECONDS=1, MEDIA_WORKERS=2)
+class MediaProcessingTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        movie = self.create_ddlj()
+        self.song = Song(title="Tujhe Dekha To", movie=movie)
+        self.song.audio_file.save('tujhe.wav', ContentFile(wav_bytes(seconds=3, level=16384)))
+
+    def test_render_wav_peaks_and_preview_clip(self):
+        peaks, clip, extension = render_media(self.song.audio_file.name)
+        self.assertEqual((len(peaks), set(peaks), extension), (100, {127}, '.wav'))
+        with wave.open(io.BytesIO(clip)) as preview:
+            self.assertEqual((preview.getnframes(), preview.getframerate()), (8000, 8000))
+
+    def test_approval_queues_rendering_exposed_through_the_song_api(self):
+        request = MagicMock()
+        with patch.object(SongAdmin, 'message_user'):
+            SongAdmin(Song, admin.site).approve_songs(request, Song.objects.filter(pk=self.song.pk))
+        job = Job.objects.get(kind=MEDIA_PROCESSING)
+        self.assertEqual(job.payload, {'song_ids': [self.song.pk]})
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {'processed': 1, 'failed': 0}))
+
+        data = self.client.get(reverse('song-list')).json()[0]
+        self.assertEqual(data['waveform_url'], reverse('song-waveform', args=[self.song.pk]))
+        response = self.client.get(data['waveform_url'])
+        self.assertEqual((response['Content-Type'], response.content), ('application/octet-stream', bytes([127]) * 100))
+        response = self.client.get(data['preview_clip_url'], headers={'Range': 'bytes=0-3'})
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (206, b'RIFF'))
+
+
+RATELIMIT_TEST_POLICIES = {
+    'writes': {
+        'routes': ['vote-favorite', 'submit-message'], 'methods': ['POST'], 'key': 'user_or_ip',
+        'window': 3600, 'limits': {'anonymous': 2, 'authenticated': 4},
+    },
+    'reads': {'routes': '*', 'methods': ['GET'], 'window': 3600, 'limits': {'anonymous': 3, 'authenticated': None}},
+}
+
+@override_settings(RATELIMIT_ENABLE=True, RATELIMIT_POLICIES=RATELIMIT_TEST_POLICIES, RATELIMIT_SHADOW_SHARE=0)
+class RateLimitTests(FreshCacheMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        redis = get_redis()
+        if redis is not None:
+            for key in redis.scan_iter('ratelimit:*'):
+                redis.delete(key)
+        self.limiter = RateLimiter()
+        patcher = patch('api.middleware.limiter', self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='fan', password='pass')
+
+    def _get(self, address='10.0.0.1', **headers):
+        return self.client.get(reverse('quote-list'), REMOTE_ADDR=address, headers=headers)
+
+    def test_requests_over_the_limit_are_rejected_with_headers(self):
+        responses = [self._get() for _ in range(4)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 429])
+        self.assertEqual([response['RateLimit-Remaining'] for response in responses], ['2', '1', '0', '0'])
+        self.assertEqual(responses[0]['RateLimit-Policy'], '3;w=3600')
+        self.assertIn('ratelimit;dur=', responses[0]['Server-Timing'])
+        self.assertEqual(responses[3].json(), {"error": "Rate limit exceeded"})
+        self.assertGreater(int(responses[3]['Retry-After']), 0)
+        self.assertEqual(self._get(address='10.0.0.2').status_code, status.HTTP_200_OK)  # Counted per client
+        # '*' keeps a counter per route
+        self.assertEqual(self.client.get(reverse('award-list'), REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_200_OK)
+
+    def test_routes_sharing_a_policy_share_its_counter(self):
+        self.client.post(reverse('vote-favorite'), {'movie': "Unknown"}, format='json', REMOTE_ADDR='10.0.0.1')
+        self.client.post(reverse('submit-message'), {'name': "Fan", 'message': "Hi"}, format='json', REMOTE_ADDR='10.0.0.1')
+        response = self.client.post(reverse('submit-message'), {'name': "Fan", 'message': "Hi"}, format='json', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_authenticated_tier_is_counted_per_user(self):
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        statuses = [
+            self.client.post(reverse('submit-message'), {'name': "Fan", 'message': "Hi"}, format='json',
+                             REMOTE_ADDR=f'10.0.0.{i}', headers=auth).status_code
+            for i in range(5)
+        ]
+        self.assertEqual(statuses, [200] * 4 + [429])
+        # Unlimited reads for this tier; a forged token falls back to the anonymous limit
+        self.assertNotIn('RateLimit-Limit', self._get(**auth))
+        self.assertEqual(self._get(Authorization='Bearer forged')['RateLimit-Limit'], '3')
+
+    @override_settings(RATELIMIT_SHADOW_SHARE=0.5)
+    def test_shadow_counter_skips_redis_and_reports_skipped_hits_later(self):
+        if get_redis() is None:
+            self.skipTest("Requires the Redis cache backend")
+        with override_settings(RATELIMIT_POLICIES={'reads': {**RATELIMIT_TEST_POLICIES['reads'], 'limits': {'anonymous': 10}}}):
+            responses = [self._get() for _ in range(6)]
+        self.assertEqual([response['RateLimit-Remaining'] for response in responses], ['9', '8', '7', '6', '5', '4'])
+        stats = self.limiter.stats()
+        self.assertEqual((stats['requests'], stats['shared_calls'], stats['shadow_hits']), (6, 2, 4))
+
+    def test_fallback_without_redis(self):
+        with patch('api.ratelimit.get_redis', return_value=None):
+            self.assertEqual([self._get().status_code for _ in range(4)], [200, 200, 200, 429])
+
+    async def test_asgi_requests_are_limited(self):
+        responses = [await self.async_client.get(reverse('quote-list'), REMOTE_ADDR='10.0.0.9') for _ in range(4)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 429])
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('ratelimit-stats')).status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('ratelimit-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('latency_ms_histogram', response.data)
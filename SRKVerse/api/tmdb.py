@@ -0,0 +1,88 @@
+from django.conf import settings
+from .cache import get_or_fill
+from .circuit import tmdb_breaker
+from .clients import clients
+from .models import Movie
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upserts refresh TMDb-owned columns only; `role` is curated locally.
+TMDB_FIELDS = ['title', 'release_year', 'description', 'poster_path', 'rating', 'genres']
+
+def _get(session, path, params):
+    response = session.get(f'{settings.TMDB_API_URL}{path}', params={'api_key': settings.TMDB_API_KEY, **params})
+    response.raise_for_status()
+    return response.json()
+
+def tmdb_get(session, path, **params):
+    """GET a TMDb endpoint through the TMDb circuit breaker."""
+    return tmdb_breaker.call(_get, session, path, params)
+
+def find_person_id(session, name):
+    """Resolve a person's TMDb id, cached for a day (misses briefly)."""
+    def search():
+        results = tmdb_get(session, '/search/person', query=name).get('results', [])
+        return results[0]['id'] if results else None
+
+    person_id = get_or_fill(
+        f'tmdb_person_id_{name.lower()}', search,
+        timeout=86400, negative_timeout=settings.NEGATIVE_CACHE_TIMEOUT
+    )
+    if person_id is None:
+        raise ValueError(f"No TMDb person found for '{name}'")
+    return person_id
+
+def movie_from_tmdb(data, genre_names):
+    release_date = data.get('release_date') or ''
+    return Movie(
+        tmdb_id=data['id'],
+        title=data['title'],
+        release_year=int(release_date.split('-')[0]) if release_date else None,
+        description=data.get('overview') or '',
+        poster_path=data.get('poster_path') or '',
+        rating=data.get('vote_average'),
+        genres=[genre_names[genre_id] for genre_id in data.get('genre_ids', []) if genre_id in genre_names]
+    )
+
+def fetch_filmography(person_id=None, concurrency=None):
+    """Fetch every movie a person is credited in as unsaved Movie instances.
+
+    The first /discover page reports the page count; the remaining pages and
+    the genre list are then fetched in parallel on a pool of `concurrency`
+    threads over the shared TMDb session, so wall time grows with
+    pages / concurrency rather than movies.
+    """
+    concurrency = concurrency or settings.TMDB_MAX_CONCURRENCY
+    session = clients.session('tmdb')
+    person_id = person_id or find_person_id(session, settings.TMDB_PERSON_NAME)
+
+    def fetch_page(page):
+        return tmdb_get(session, '/discover/movie', with_cast=person_id, sort_by='primary_release_date.asc', page=page)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        genres = pool.submit(tmdb_get, session, '/genre/movie/list')
+        first = fetch_page(1)
+        pages = [first] + list(pool.map(fetch_page, range(2, first.get('total_pages', 1) + 1)))
+        genre_names = {genre['id']: genre['name'] for genre in genres.result().get('genres', [])}
+
+    # Pages can shift while they are read; keep the last copy of each movie
+    movies = {}
+    for page in pages:
+        for data in page.get('results', []):
+            movies[data['id']] = movie_from_tmdb(data, genre_names)
+    logger.info(f"Fetched {len(movies)} TMDb movies from {len(pages)} pages")
+    return list(movies.values())
+
+def upsert_movies(movies):
+    """Insert new movies and refresh existing ones by tmdb_id in one statement per batch."""
+    Movie.objects.bulk_create(
+        movies, batch_size=500, update_conflicts=True,
+        unique_fields=['tmdb_id'], update_fields=TMDB_FIELDS
+    )
+    return len(movies)
+
+def ingest_filmography(person_id=None, concurrency=None):
+    """Fetch the full TMDb filmography and upsert it into Movie, returning the movie count."""
+    return upsert_movies(fetch_filmography(person_id, concurrency))
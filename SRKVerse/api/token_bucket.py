@@ -0,0 +1,109 @@
+from .cache import get_redis
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Refill and take one token atomically. Uses the Redis clock so every process
+# agrees on time. Returns 0 when a token was taken, otherwise the milliseconds
+# to wait before trying again (including any Retry-After pause).
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until')
+local paused_until = tonumber(state[3]) or 0
+if paused_until > now then
+    return paused_until - now
+end
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 60000)
+return wait
+"""
+
+# Stop handing out tokens for ARGV[1] milliseconds (never shortening a longer pause)
+PAUSE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0
+if until_ms > current then
+    redis.call('HSET', KEYS[1], 'paused_until', until_ms)
+    redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[1]) + 60000)
+end
+return until_ms
+"""
+
+class TokenBucket:
+    """Rate limiter for an outbound API, shared by every process through Redis.
+
+    Holds up to `capacity` tokens refilled at `rate` per second; each call
+    takes one. `pause` (e.g. on a 429 with Retry-After) stops every process
+    from taking tokens until it ends. Without Redis the bucket is per process.
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.key = f'token_bucket:{name}'
+        self.rate = rate
+        self.capacity = capacity
+        self._scripts = None
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _redis_scripts(self):
+        redis = get_redis()
+        if redis is None:
+            return None
+        if self._scripts is None or self._scripts[0] is not redis:
+            self._scripts = (redis, redis.register_script(TAKE_SCRIPT), redis.register_script(PAUSE_SCRIPT))
+        return self._scripts
+
+    def try_acquire(self):
+        """Take a token if one is available; return 0, or the seconds to wait before retrying."""
+        scripts = self._redis_scripts()
+        if scripts is not None:
+            return scripts[1](keys=[self.key], args=[self.rate, self.capacity]) / 1000
+        with self._lock:
+            now = time.monotonic()
+            if self._paused_until > now:
+                return self._paused_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """Block until a token is taken; return False if that would take longer than `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens, in any process, for the next `seconds`."""
+        scripts = self._redis_scripts()
+        if scripts is not None:
+            scripts[2](keys=[self.key], args=[int(seconds * 1000)])
+        else:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"Paused {self.key} for {seconds}s")
@@ -0,0 +1,245 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from datetime import timedelta
+from .audio import content_hash, expected_format, probe_upload, sniff_audio_format
+from .models import ChunkedUpload, Song
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 64 * 1024  # Bytes held in memory at a time while a chunk streams through
+PARTIAL_DIR = 'partial-uploads'  # Local backend: chunks are assembled here, beside the final file
+
+class UploadError(Exception):
+    """Request that cannot be applied to this upload (bad chunk, wrong length, ...)."""
+
+class UploadConflict(UploadError):
+    """Request that is valid but arrives out of order, e.g. a chunk past the next expected one."""
+
+def _copy(stream, target, length):
+    """Copy exactly `length` bytes from `stream` to `target` a buffer at a time.
+
+    Returns the first bytes written, for format sniffing. Raises UploadError
+    if the stream ends early, e.g. because the client disconnected.
+    """
+    head = b''
+    remaining = length
+    while remaining:
+        block = stream.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            raise UploadError(f"Chunk ended after {length - remaining} of {length} bytes.")
+        if not head:
+            head = block[:12]
+        target.write(block)
+        remaining -= len(block)
+    return head
+
+class LocalChunkStore:
+    """Assembles chunks in a partial file on the storage's own disk, then moves it into place."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def _partial_path(self, upload):
+        return self.storage.path(f'{PARTIAL_DIR}/{upload.token}.part')
+
+    def start(self, upload):
+        path = self._partial_path(upload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+
+    def write(self, upload, index, stream, length):
+        # Chunks land at their own offset, so a retried chunk overwrites its earlier attempt
+        with open(self._partial_path(upload), 'r+b') as partial:
+            partial.seek(index * upload.chunk_size)
+            return _copy(stream, partial, length), None
+
+    def complete(self, upload):
+        name = self.storage.get_available_name(f'songs/{upload.filename}')
+        path = self.storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._partial_path(upload), path)
+        return name
+
+    def abort(self, upload):
+        try:
+            os.remove(self._partial_path(upload))
+        except FileNotFoundError:
+            pass
+
+class S3ChunkStore:
+    """Streams each chunk into one part of an S3 multipart upload; S3 joins them on completion."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        return self.storage.connection.meta.client
+
+    def _target(self, upload):
+        return {
+            'Bucket': self.storage.bucket_name,
+            'Key': self.storage._normalize_name(upload.storage_name),
+            'UploadId': upload.multipart_id,
+        }
+
+    def start(self, upload):
+        # The object key is fixed for the whole multipart upload, so the name is chosen up front
+        upload.storage_name = self.storage.get_available_name(f'songs/{upload.filename}')
+        upload.multipart_id = self.client.create_multipart_upload(
+            Bucket=self.storage.bucket_name,
+            Key=self.storage._normalize_name(upload.storage_name),
+            ContentType=expected_format(upload.filename)
+        )['UploadId']
+
+    def write(self, upload, index, stream, length):
+        # boto3 needs a seekable body; spool the chunk, spilling to disk past the buffer size
+        with tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_SIZE) as spool:
+            head = _copy(stream, spool, length)
+            spool.seek(0)
+            response = self.client.upload_part(
+                Body=spool, ContentLength=length, PartNumber=index + 1, **self._target(upload)
+            )
+        return head, response['ETag']
+
+    def complete(self, upload):
+        parts = [{'PartNumber': index + 1, 'ETag': etag} for index, etag in enumerate(upload.parts)]
+        self.client.complete_multipart_upload(MultipartUpload={'Parts': parts}, **self._target(upload))
+        return upload.storage_name
+
+    def abort(self, upload):
+        if upload.multipart_id:
+            self.client.abort_multipart_upload(**self._target(upload))
+
+def chunk_store(storage=None):
+    """Return the chunk store for `storage`, by default the configured file storage backend."""
+    storage = default_storage if storage is None else storage
+    if isinstance(storage, FileSystemStorage):
+        return LocalChunkStore(storage)
+    if hasattr(storage, 'bucket_name'):
+        return S3ChunkStore(storage)
+    raise ImproperlyConfigured(f"Chunked uploads do not support {type(storage).__name__}")
+
+def start_upload(upload):
+    """Open storage for a new ChunkedUpload and save it."""
+    upload.chunk_size = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    upload.save()
+    chunk_store().start(upload)
+    upload.save(update_fields=['storage_name', 'multipart_id', 'updated_at'])
+    return upload
+
+def write_chunk(upload, index, stream, length):
+    """Stream chunk `index` into storage and acknowledge it.
+
+    Chunks are accepted in order; any already-acknowledged chunk may be sent
+    again (a client that lost the acknowledgement retries it), so an
+    interrupted upload resumes from `received_chunks`. Memory use is one
+    copy buffer whatever the chunk or file size.
+    """
+    if upload.song_id:
+        raise UploadConflict("Upload is already complete.")
+    if not 0 <= index < upload.chunk_count:
+        raise UploadError(f"Chunk index must be between 0 and {upload.chunk_count - 1}.")
+    if index > upload.received_chunks:
+        raise UploadConflict(f"Chunk {upload.received_chunks} must be sent next.")
+    if length != upload.chunk_length(index):
+        raise UploadError(f"Chunk {index} must be exactly {upload.chunk_length(index)} bytes.")
+
+    head, etag = chunk_store().write(upload, index, stream, length)
+    sniffed = sniff_audio_format(head) if index == 0 else None
+    if sniffed is not None and sniffed != expected_format(upload.filename):
+        raise UploadError("File content does not match its extension.")
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if etag is not None:
+            upload.parts[index:index + 1] = [etag]  # Replaces the ETag of a resent part
+        upload.received_chunks = max(upload.received_chunks, index + 1)
+        upload.save(update_fields=['parts', 'received_chunks', 'updated_at'])
+    return upload
+
+def _is_assembled(upload):
+    # storage_name is set once the file is in place (chosen up front on S3, whose
+    # multipart id is cleared on completion)
+    return bool(upload.storage_name) and not upload.multipart_id
+
+def _discard_assembled(upload, name):
+    """Delete an assembled file whose song could not be created, unless a concurrent completion used it."""
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().filter(pk=upload.pk).first()
+        if upload is not None and upload.song_id:
+            return
+        default_storage.delete(name)
+        if upload is not None:
+            upload.delete()
+
+def complete_upload(upload):
+    """Join the chunks into the final file and create the song, once; repeated calls return it.
+
+    The upload row is locked only to assemble the file and to create the
+    song: probing and hashing, which read the whole file back, run in
+    between. If the song cannot be created the file is deleted again, since
+    rolling back the transaction leaves storage alone.
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.song_id:
+            return upload.song, False
+        if upload.received_chunks < upload.chunk_count:
+            raise UploadConflict(f"Only {upload.received_chunks} of {upload.chunk_count} chunks have been received.")
+        if not _is_assembled(upload):
+            upload.storage_name = chunk_store().complete(upload)
+            upload.multipart_id = ''
+            upload.save(update_fields=['storage_name', 'multipart_id', 'updated_at'])
+    name = upload.storage_name
+    try:
+        with default_storage.open(name, 'rb') as audio:
+            audio_info = probe_upload(audio)
+            audio_hash = content_hash(audio)
+        # The whole file has to be assembled before it can be hashed
+        if Song.objects.filter(content_hash=audio_hash).exists():
+            raise UploadError("This audio file has already been uploaded.")
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.song_id:  # A concurrent request completed it meanwhile
+                return upload.song, False
+            song = Song.objects.create(
+                title=upload.title, movie=upload.movie, composer=upload.composer, lyricist=upload.lyricist,
+                audio_file=name, duration=audio_info['duration'], bitrate=audio_info['bitrate'],
+                content_hash=audio_hash, is_approved=False  # Require admin approval
+            )
+            upload.song = song
+            upload.save(update_fields=['song', 'updated_at'])
+    except IntegrityError:
+        # Another upload of the same audio, or song title, won the race to insert
+        _discard_assembled(upload, name)
+        if Song.objects.filter(content_hash=audio_hash).exists():
+            raise UploadError("This audio file has already been uploaded.")
+        raise UploadError("This song has already been uploaded for the movie.")
+    except Exception:
+        _discard_assembled(upload, name)
+        raise
+    return song, True
+
+def abort_upload(upload):
+    """Discard an unfinished upload and whatever chunks storage holds for it."""
+    chunk_store().abort(upload)
+    upload.delete()
+
+def expire_uploads():
+    """Abort unfinished uploads untouched for CHUNKED_UPLOAD_EXPIRY seconds, returning how many."""
+    cutoff = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+    expired = 0
+    for upload in ChunkedUpload.objects.filter(song__isnull=True, updated_at__lt=cutoff):
+        try:
+            abort_upload(upload)
+            expired += 1
+        except Exception as e:
+            logger.error(f"Error expiring upload {upload.token}: {str(e)}")
+    return expired
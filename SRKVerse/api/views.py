@@ -1,75 +1,86 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django_ratelimit.decorators import ratelimit
-from django.core.cache import cache
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .serializers import (
     MovieSerializer, SongSerializer, SongUploadSerializer, QuoteSerializer,
-    AwardSerializer, TimelineSerializer, FanVoteSerializer, FanMessageSerializer
+    TimelineSerializer, FanVoteSerializer, FanMessageSerializer, JobSerializer,
+    ChunkedUploadSerializer
 )
 from .services import (
-    load_movies, get_random_quote, get_movies_by_year, get_movie_by_title,
+    get_random_quote, get_movies_by_year, get_movie_by_title,
     get_top_rated_movies, get_movies_by_genre, get_quotes_by_movie,
     get_quotes_by_tag, get_awards, get_awards_by_year, get_awards_by_type,
     get_timeline, get_events_by_year, get_debut, get_votes, vote_favorite,
-    get_quiz, validate_quiz, enhance_song_with_spotify
+    get_quiz, validate_quiz, get_songs_by_movie,
+    get_movies, get_approved_songs, get_quotes, get_fan_messages
 )
-from .models import Song, Movie
-from django.core.exceptions import ValidationError
+from .models import Job, ChunkedUpload
+from .jobs import enqueue_job, SPOTIFY_ENRICHMENT
+from .uploads import UploadConflict, UploadError, abort_upload, complete_upload, start_upload, write_chunk
+from .cache import cached_response, two_tier
+from .clients import clients
+from .circuit import circuit_states
+from .ratelimit import limiter
+from .pagination import paginated_response, ranked_response
+from .search import SEARCH_SPECS, search_catalog, search_tags
+from .streaming import approved_song_media, audio_response
+from .fast_serializers import movie_values, quote_values, award_values
+from .fan_messages import submit_fan_message
+from .votes import get_movie_id, get_pending_votes, merge_pending_votes, ranked_votes, vote_position, with_titles
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+import hashlib
 import logging
 import sentry_sdk
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+def _serialize(serializer_class, instance, many=False):
+    """Serialize an instance or queryset, passing through None for missing objects."""
+    if instance is None:
+        return None
+    return serializer_class(instance, many=many).data
+
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_all_movies(request):
-    """Fetch all movies, cached for 1 hour."""
+    """Fetch all movies a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = 'movies_all'
-        movies = cache.get(cache_key)
-        if not movies:
-            movies = load_movies()  # Assumes TMDb integration
-            cache.set(cache_key, movies, timeout=3600)
-        serializer = MovieSerializer(movies, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, 'movies_all', get_movies, movie_values,
+            tags=['movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching movies: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch movies"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_movies_by_year_view(request, year):
-    """Fetch movies by release year, cached for 1 hour."""
+    """Fetch movies by release year a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'movies_year_{year}'
-        movies = cache.get(cache_key)
-        if not movies:
-            movies = get_movies_by_year(year)
-            cache.set(cache_key, movies, timeout=3600)
-        serializer = MovieSerializer(movies, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'movies_year_{year}', lambda: get_movies_by_year(year), movie_values,
+            tags=[f'movies:year:{year}']
+        )
     except Exception as e:
         logger.error(f"Error fetching movies for year {year}: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No movies found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_movie_by_title_view(request, title):
-    """Fetch a movie by title, cached for 1 hour."""
-    try:
-        cache_key = f'movie_title_{title.lower()}'
-        movie = cache.get(cache_key)
-        if not movie:
-            movie = get_movie_by_title(title)
-            cache.set(cache_key, movie, timeout=3600)
-        if movie:
-            serializer = MovieSerializer(movie)
-            return Response(serializer.data)
+    """Fetch a movie by title, cached until a related model changes."""
+    try:
+        response = cached_response(
+            request, f'movie_title_{title.lower()}',
+            lambda: _serialize(MovieSerializer, get_movie_by_title(title)),
+            tags=[f'movies:title:{title.lower()}']
+        )
+        if response is not None:
+            return response
         return Response({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         logger.error(f"Error fetching movie '{title}': {str(e)}")
@@ -77,133 +88,220 @@ def get_movie_by_title_view(request, title):
         return Response({"error": "Failed to fetch movie"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_top_rated_view(request):
-    """Fetch top-rated movies, cached for 1 hour."""
+    """Fetch top-rated movies, cached until a related model changes."""
     try:
-        cache_key = 'movies_top_rated'
-        movies = cache.get(cache_key)
-        if not movies:
-            movies = get_top_rated_movies()
-            cache.set(cache_key, movies, timeout=3600)
-        serializer = MovieSerializer(movies, many=True)
-        return Response(serializer.data)
+        return cached_response(
+            request, 'movies_top_rated',
+            lambda: movie_values.serialize(get_top_rated_movies()),
+            tags=['movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching top-rated movies: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch top-rated movies"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_by_genre_view(request, genre):
-    """Fetch movies by genre, cached for 1 hour."""
+    """Fetch movies by genre a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'movies_genre_{genre.lower()}'
-        movies = cache.get(cache_key)
-        if not movies:
-            movies = get_movies_by_genre(genre)
-            cache.set(cache_key, movies, timeout=3600)
-        serializer = MovieSerializer(movies, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'movies_genre_{genre.lower()}', lambda: get_movies_by_genre(genre), movie_values,
+            tags=[f'movies:genre:{genre.lower()}']
+        )
     except Exception as e:
         logger.error(f"Error fetching movies for genre {genre}: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No movies found for genre {genre}"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_all_songs(request):
-    """Fetch all approved songs, cached for 1 hour."""
+    """Fetch all approved songs a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = 'songs_all'
-        songs = cache.get(cache_key)
-        if not songs:
-            songs = Song.objects.filter(is_approved=True)
-            cache.set(cache_key, songs, timeout=3600)
-        serializer = SongSerializer(songs, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, 'songs_all', get_approved_songs, SongSerializer,
+            tags=['songs', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching songs: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch songs"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_movie_songs(request, title):
-    """Fetch approved songs for a movie, cached for 1 hour."""
-    try:
-        cache_key = f'songs_movie_{title.lower()}'
-        songs = cache.get(cache_key)
-        if not songs:
-            movie = Movie.objects.filter(title__iexact=title).first()
-            if movie:
-                songs = movie.songs.filter(is_approved=True)
-                cache.set(cache_key, songs, timeout=3600)
-            else:
-                return Response({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
-        serializer = SongSerializer(songs, many=True)
-        return Response(serializer.data)
+    """Fetch approved songs for a movie a cursor page at a time, each page cached until a related model changes."""
+    try:
+        response = paginated_response(
+            request, f'songs_movie_{title.lower()}', lambda: get_songs_by_movie(title), SongSerializer,
+            tags=[f'songs:movie:{title.lower()}', 'movies']
+        )
+        if response is not None:
+            return response
+        return Response({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         logger.error(f"Error fetching songs for movie '{title}': {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch songs"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
-@ratelimit(key='user_or_ip', rate='5/m', method='POST')
 @permission_classes([IsAuthenticated])
 def upload_song(request):
-    """Handle authenticated song uploads with Spotify enhancement."""
+    """Handle authenticated song uploads; Spotify enrichment runs later on the job queue."""
     try:
         serializer = SongUploadSerializer(data=request.data)
         if serializer.is_valid():
-            song = serializer.save()
-            # Attempt Spotify enhancement
-            try:
-                enhance_song_with_spotify(serializer.validated_data['title'], serializer.validated_data['movie_title'])
-                return Response({
-                    "message": "Song uploaded successfully, pending admin approval",
-                    "song": serializer.data
-                }, status=status.HTTP_201_CREATED)
-            except ValidationError as e:
-                logger.warning(f"Spotify enhancement failed for '{serializer.validated_data['title']}': {str(e)}")
-                return Response({
-                    "message": "Song uploaded successfully, pending admin approval, but Spotify metadata could not be fetched",
-                    "song": serializer.data,
-                    "warning": str(e)
-                }, status=status.HTTP_201_CREATED)
+            return _song_uploaded_response(serializer.save(), request.user)
         return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error uploading song: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to upload song"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _song_uploaded_response(song, user):
+    """Queue Spotify enrichment for a newly uploaded song and describe both to the client."""
+    job = enqueue_job(SPOTIFY_ENRICHMENT, {'song_id': song.id}, created_by=user)
+    return Response({
+        "message": "Song uploaded successfully, pending admin approval",
+        "song": SongUploadSerializer(song).data,
+        "enrichment_job": job.id,
+        "enrichment_status_url": reverse('job-status', args=[job.id])
+    }, status=status.HTTP_201_CREATED)
+
+def _upload_status(upload):
+    """A chunked upload's progress plus the URL of the next chunk to send (None once all are stored)."""
+    next_chunk = upload.received_chunks if upload.received_chunks < upload.chunk_count else None
+    return {
+        **ChunkedUploadSerializer(upload).data,
+        "next_chunk_url": reverse('upload-chunk', args=[upload.token, next_chunk]) if next_chunk is not None else None,
+        "complete_url": reverse('complete-upload', args=[upload.token]),
+    }
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_chunked_upload_view(request):
+    """Start a resumable upload of a song too large for a single request."""
+    try:
+        serializer = ChunkedUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            upload = start_upload(ChunkedUpload(user=request.user, **serializer.validated_data))
+            return Response(_upload_status(upload), status=status.HTTP_201_CREATED)
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error starting chunked upload: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to start upload"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def chunked_upload_view(request, token):
+    """Report which chunks are stored, so an interrupted client can resume; DELETE abandons the upload."""
+    upload = ChunkedUpload.objects.filter(token=token, user=request.user).first()
+    if upload is None:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == 'GET':
+        return Response(_upload_status(upload))
+    if upload.song_id:
+        return Response({"error": "Upload is already complete."}, status=status.HTTP_409_CONFLICT)
+    try:
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    except Exception as e:
+        logger.error(f"Error aborting upload {token}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to abort upload"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk_view(request, token, index):
+    """Stream one chunk from the raw request body into storage, never buffering it whole."""
+    upload = ChunkedUpload.objects.filter(token=token, user=request.user).first()
+    if upload is None:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        upload = write_chunk(upload, index, request.stream, length)
+        return Response(_upload_status(upload))
+    except UploadConflict as e:
+        return Response({"error": str(e), **_upload_status(upload)}, status=status.HTTP_409_CONFLICT)
+    except UploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error storing chunk {index} of upload {token}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to store chunk"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_chunked_upload_view(request, token):
+    """Assemble a fully received upload into the song's audio file and create the song."""
+    upload = ChunkedUpload.objects.filter(token=token, user=request.user).first()
+    if upload is None:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        song, created = complete_upload(upload)
+        if created:
+            return _song_uploaded_response(song, request.user)
+        return Response({"message": "Upload already completed", "song": SongUploadSerializer(song).data})
+    except UploadConflict as e:
+        return Response({"error": str(e), **_upload_status(upload)}, status=status.HTTP_409_CONFLICT)
+    except UploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error completing upload {token}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to complete upload"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@require_safe
+def stream_song_view(request, song_id, field='audio_file'):
+    """Stream an approved song's audio, or with field='preview_clip' its preview, with Range support.
+
+    A plain Django view: it returns audio bytes or a redirect, not API data,
+    so DRF content negotiation would only reject players' Accept headers.
+    """
+    try:
+        name = approved_song_media(song_id, field)
+        if name is None:
+            return JsonResponse({"error": "Song not found"}, status=status.HTTP_404_NOT_FOUND)
+        return audio_response(request, name)
+    except Exception as e:
+        logger.error(f"Error streaming {field} of song {song_id}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to stream song"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@require_safe
+def song_waveform_view(request, song_id):
+    """Serve an approved song's waveform as raw bytes, one peak (0-255) per point."""
+    try:
+        peaks = approved_song_media(song_id, 'waveform')
+        if peaks is None:
+            return JsonResponse({"error": "Waveform not found"}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(peaks, content_type='application/octet-stream')
+    except Exception as e:
+        logger.error(f"Error fetching waveform of song {song_id}: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return JsonResponse({"error": "Failed to fetch waveform"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_all_quotes(request):
-    """Fetch all quotes, cached for 1 hour."""
+    """Fetch all quotes a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = 'quotes_all'
-        quotes = cache.get(cache_key)
-        if not quotes:
-            quotes = Quote.objects.all()
-            cache.set(cache_key, quotes, timeout=3600)
-        serializer = QuoteSerializer(quotes, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, 'quotes_all', get_quotes, quote_values,
+            tags=['quotes', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching quotes: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch quotes"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_random_quote_view(request):
-    """Fetch a random quote, cached for 10 minutes."""
+    """Fetch a fresh random quote per request, optionally filtered by ?tag= or ?movie=."""
     try:
-        cache_key = 'random_quote'
-        quote = cache.get(cache_key)
-        if not quote:
-            quote = get_random_quote()
-            cache.set(cache_key, quote, timeout=600)
+        quote = get_random_quote(
+            tag=request.query_params.get('tag'),
+            movie_title=request.query_params.get('movie')
+        )
         if quote:
             serializer = QuoteSerializer(quote)
             return Response(serializer.data)
@@ -214,137 +312,112 @@ def get_random_quote_view(request):
         return Response({"error": "Failed to fetch random quote"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_quotes_by_movie_view(request, title):
-    """Fetch quotes by movie title, cached for 1 hour."""
+    """Fetch quotes by movie title a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'quotes_movie_{title.lower()}'
-        quotes = cache.get(cache_key)
-        if not quotes:
-            quotes = get_quotes_by_movie(title)
-            cache.set(cache_key, quotes, timeout=3600)
-        serializer = QuoteSerializer(quotes, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'quotes_movie_{title.lower()}', lambda: get_quotes_by_movie(title), quote_values,
+            tags=[f'quotes:movie:{title.lower()}', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching quotes for movie '{title}': {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No quotes found for movie '{title}'"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_quotes_by_tag_view(request, tag):
-    """Fetch quotes by tag, cached for 1 hour."""
+    """Fetch quotes by tag a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'quotes_tag_{tag.lower()}'
-        quotes = cache.get(cache_key)
-        if not quotes:
-            quotes = get_quotes_by_tag(tag)
-            cache.set(cache_key, quotes, timeout=3600)
-        serializer = QuoteSerializer(quotes, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'quotes_tag_{tag.lower()}', lambda: get_quotes_by_tag(tag), quote_values,
+            tags=[f'quotes:tag:{tag.lower()}', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching quotes for tag '{tag}': {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No quotes found for tag '{tag}'"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_all_awards(request):
-    """Fetch all awards, cached for 1 hour."""
+    """Fetch all awards a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = 'awards_all'
-        awards = cache.get(cache_key)
-        if not awards:
-            awards = get_awards()
-            cache.set(cache_key, awards, timeout=3600)
-        serializer = AwardSerializer(awards, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, 'awards_all', get_awards, award_values,
+            ordering=('year', 'id'),
+            tags=['awards', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching awards: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch awards"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_awards_by_year_view(request, year):
-    """Fetch awards by year, cached for 1 hour."""
+    """Fetch awards by year a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'awards_year_{year}'
-        awards = cache.get(cache_key)
-        if not awards:
-            awards = get_awards_by_year(year)
-            cache.set(cache_key, awards, timeout=3600)
-        serializer = AwardSerializer(awards, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'awards_year_{year}', lambda: get_awards_by_year(year), award_values,
+            ordering=('year', 'id'),
+            tags=[f'awards:year:{year}', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching awards for year {year}: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No awards found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_awards_by_type_view(request, award_type):
-    """Fetch awards by type, cached for 1 hour."""
+    """Fetch awards by type a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'awards_type_{award_type.lower()}'
-        awards = cache.get(cache_key)
-        if not awards:
-            awards = get_awards_by_type(award_type)
-            cache.set(cache_key, awards, timeout=3600)
-        serializer = AwardSerializer(awards, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'awards_type_{award_type.lower()}', lambda: get_awards_by_type(award_type), award_values,
+            ordering=('year', 'id'),
+            tags=[f'awards:type:{award_type.lower()}', 'movies']
+        )
     except Exception as e:
         logger.error(f"Error fetching awards for type '{award_type}': {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No awards found for type '{award_type}'"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_timeline_view(request):
-    """Fetch career timeline, cached for 1 hour."""
+    """Fetch career timeline a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = 'timeline'
-        timeline = cache.get(cache_key)
-        if not timeline:
-            timeline = get_timeline()
-            cache.set(cache_key, timeline, timeout=3600)
-        serializer = TimelineSerializer(timeline, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, 'timeline', get_timeline, TimelineSerializer,
+            ordering=('year', 'id'),
+            tags=['timeline']
+        )
     except Exception as e:
         logger.error(f"Error fetching timeline: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch timeline"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_events_by_year_view(request, year):
-    """Fetch timeline events by year, cached for 1 hour."""
+    """Fetch timeline events by year a cursor page at a time, each page cached until a related model changes."""
     try:
-        cache_key = f'events_year_{year}'
-        events = cache.get(cache_key)
-        if not events:
-            events = get_events_by_year(year)
-            cache.set(cache_key, events, timeout=3600)
-        serializer = TimelineSerializer(events, many=True)
-        return Response(serializer.data)
+        return paginated_response(
+            request, f'events_year_{year}', lambda: get_events_by_year(year), TimelineSerializer,
+            ordering=('year', 'id'),
+            tags=[f'timeline:year:{year}']
+        )
     except Exception as e:
         logger.error(f"Error fetching events for year {year}: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": f"No events found for year {year}"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_debut_view(request):
-    """Fetch SRK's debut event, cached for 1 hour."""
-    try:
-        cache_key = 'debut'
-        debut = cache.get(cache_key)
-        if not debut:
-            debut = get_debut()
-            cache.set(cache_key, debut, timeout=3600)
-        if debut:
-            serializer = TimelineSerializer(debut)
-            return Response(serializer.data)
+    """Fetch SRK's debut event, cached until a related model changes."""
+    try:
+        response = cached_response(
+            request, 'debut',
+            lambda: _serialize(TimelineSerializer, get_debut()),
+            tags=['timeline']
+        )
+        if response is not None:
+            return response
         return Response({"error": "Debut event not found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         logger.error(f"Error fetching debut: {str(e)}")
@@ -352,24 +425,84 @@ def get_debut_view(request):
         return Response({"error": "Failed to fetch debut event"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_votes_view(request):
-    """Fetch fan votes, cached for 10 minutes."""
+    """Fetch fan votes a cursor page at a time, merging votes not yet flushed to the database.
+
+    Each page of persisted counts is cached until the next flush; pending
+    counts are added per request. Movies whose first votes are still
+    pending show up once they are flushed.
+
+    With ?top=N it instead returns the N most-voted movies, ranked, from
+    the vote ranking.
+    """
+    if 'top' in request.query_params:
+        return _top_votes_response(request)
     try:
-        cache_key = 'votes'
-        votes = cache.get(cache_key)
-        if not votes:
-            votes = get_votes()
-            cache.set(cache_key, votes, timeout=600)
-        serializer = FanVoteSerializer(votes, many=True)
-        return Response(serializer.data)
+        response = paginated_response(
+            request, 'votes', get_votes, FanVoteSerializer,
+            tags=['votes', 'movies']
+        )
+        pending = get_pending_votes()
+        if not pending or response.status_code != status.HTTP_200_OK:
+            return response
+        merged = Response(merge_pending_votes(response.data, pending))
+        if response.has_header('Link'):
+            merged['Link'] = response['Link']
+        return merged
     except Exception as e:
         logger.error(f"Error fetching votes: {str(e)}")
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to fetch votes"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _bounded_int(request, name, default, minimum, maximum):
+    value = int(request.query_params.get(name, default))
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+def _top_votes_response(request):
+    try:
+        top = _bounded_int(request, 'top', 1, 1, settings.VOTE_RANKING_MAX_TOP)
+    except ValueError:
+        return Response(
+            {"error": f"top must be an integer between 1 and {settings.VOTE_RANKING_MAX_TOP}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        return Response(with_titles(ranked_votes(0, top - 1)))
+    except Exception as e:
+        logger.error(f"Error fetching top {top} votes: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to fetch votes"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def movie_rank_view(request, title):
+    """Fetch a movie's rank in the fan poll, with ?around=K movies either side of it (default 2)."""
+    try:
+        around = _bounded_int(request, 'around', 2, 0, settings.VOTE_RANKING_MAX_AROUND)
+    except ValueError:
+        return Response(
+            {"error": f"around must be an integer between 0 and {settings.VOTE_RANKING_MAX_AROUND}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        movie_id = get_movie_id(title)
+        ranked = vote_position(movie_id) if movie_id is not None else None
+        if ranked is None:
+            return Response({"error": "Movie has no votes"}, status=status.HTTP_404_NOT_FOUND)
+        position, vote_count = ranked
+        return Response({
+            'rank': position + 1,
+            'movie_id': movie_id,
+            'vote_count': vote_count,
+            'around': with_titles(ranked_votes(max(position - around, 0), position + around)),
+        })
+    except Exception as e:
+        logger.error(f"Error fetching rank for movie '{title}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to fetch rank"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
-@ratelimit(key='user_or_ip', rate='10/m', method='POST')
 def vote_favorite_view(request):
     """Record a vote for a favorite movie."""
     try:
@@ -378,7 +511,6 @@ def vote_favorite_view(request):
             return Response({"error": "Title is required"}, status=status.HTTP_400_BAD_REQUEST)
         vote = vote_favorite(title)
         if vote:
-            cache.delete('votes')  # Invalidate cache
             serializer = FanVoteSerializer(vote)
             return Response(serializer.data)
         return Response({"error": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -388,7 +520,6 @@ def vote_favorite_view(request):
         return Response({"error": "Failed to vote for movie"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@ratelimit(key='ip', rate='100/m', method='GET')
 def get_quiz_view(request):
     """Fetch a quiz question."""
     try:
@@ -400,7 +531,6 @@ def get_quiz_view(request):
         return Response({"error": "Failed to fetch quiz"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
-@ratelimit(key='user_or_ip', rate='10/m', method='POST')
 def validate_quiz_view(request):
     """Validate a quiz answer."""
     try:
@@ -415,17 +545,86 @@ def validate_quiz_view(request):
         sentry_sdk.capture_exception(e)
         return Response({"error": "Failed to validate quiz"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def get_fan_messages_view(request):
+    """Fetch fan messages newest first, a cursor page at a time, each page cached until the next flush stores more."""
+    try:
+        return paginated_response(
+            request, 'fan_messages', get_fan_messages, FanMessageSerializer,
+            ordering=('-created_at', '-id'),
+            tags=['fan_messages']
+        )
+    except Exception as e:
+        logger.error(f"Error fetching fan messages: {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Failed to fetch fan messages"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
-@ratelimit(key='user_or_ip', rate='10/m', method='POST')
 def submit_message_view(request):
-    """Submit a fan message."""
+    """Submit a fan message, acknowledged as soon as it is queued for a batched insert."""
     try:
         serializer = FanMessageSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response({"message": f"Thank you {serializer.data['name']} for your message!"})
+            name = serializer.validated_data['name']
+            submit_fan_message(name, serializer.validated_data['message'])
+            return Response({"message": f"Thank you {name} for your message!"})
         return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error submitting fan message: {str(e)}")
         sentry_sdk.capture_exception(e)
-        return Response({"error": "Failed to submit fan message"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return Response({"error": "Failed to submit fan message"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def search_view(request):
+    """Search movies, songs and quotes (?q=, optional ?type=movie,song,quote), ranked and cached per query."""
+    query = ' '.join(request.query_params.get('q', '').split())
+    if len(query) < settings.SEARCH_MIN_QUERY_LENGTH:
+        return Response(
+            {"error": f"q must be at least {settings.SEARCH_MIN_QUERY_LENGTH} characters"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    kinds = sorted(set(request.query_params.get('type', ','.join(SEARCH_SPECS)).split(',')))
+    unknown = [kind for kind in kinds if kind not in SEARCH_SPECS]
+    if unknown:
+        return Response({"error": f"Unknown type: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        digest = hashlib.sha256(query.lower().encode()).hexdigest()
+        return ranked_response(
+            request, f'search:{",".join(kinds)}:{digest}', lambda: search_catalog(query, kinds),
+            tags=search_tags(kinds)
+        )
+    except Exception as e:
+        logger.error(f"Error searching for '{query}': {str(e)}")
+        sentry_sdk.capture_exception(e)
+        return Response({"error": "Search failed"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_status_view(request, job_id):
+    """Report the progress of a background job, e.g. an upload's Spotify enrichment.
+
+    Users only see the jobs their own requests queued; staff see every job.
+    """
+    jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(created_by=request.user)
+    job = jobs.filter(pk=job_id).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(JobSerializer(job).data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """Report this worker's hit/miss counts for the local and shared cache tiers."""
+    return Response(two_tier.stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def client_stats_view(request):
+    """Report outbound HTTP connection pools and token fetches for this worker, plus provider circuit states."""
+    return Response({**clients.stats(), 'circuits': circuit_states()})
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def ratelimit_stats_view(request):
+    """Report this worker's rate-limit decisions, Redis script calls avoided by shadow counters, and limiter latency."""
+    return Response(limiter.stats())
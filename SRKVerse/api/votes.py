@@ -0,0 +1,196 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from redis.exceptions import LockError, ResponseError
+from .cache import get_or_fill, get_redis
+from .models import Movie, FanVote
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING_VOTES_KEY = 'votes:pending'
+FLUSHING_VOTES_KEY = 'votes:flushing'
+FLUSH_LOCK_KEY = 'votes:flush_lock'
+RANKING_KEY = 'votes:ranking'  # Sorted set: movie_id scored by persisted plus pending votes
+RANKING_BUILT_KEY = 'votes:ranking:built'  # Set once RANKING_KEY holds every movie, not just recent votes
+
+def get_movie_id(title):
+    """Resolve a movie title to its id, cached so a vote does not need a DB lookup."""
+    return get_or_fill(
+        f'movie_id_{title.lower()}',
+        lambda: Movie.objects.filter(title__iexact=title).values_list('id', flat=True).first(),
+        timeout=300
+    )
+
+def record_vote(movie_id):
+    """Count one vote for a movie and return its pending (not yet flushed) delta.
+
+    With Redis the vote is an atomic HINCRBY, so concurrent votes never
+    contend on the FanVote row; flush_pending_votes applies the deltas in
+    batches. The vote also increments the movie's score in the RANKING_KEY
+    sorted set and is announced on LEADERBOARD_CHANNEL for the live
+    leaderboard stream. Without Redis the vote is applied to the row with an F()
+    expression, which is still lost-update free.
+    """
+    redis = get_redis()
+    if redis is not None:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hincrby(PENDING_VOTES_KEY, movie_id, 1)
+        pipe.hget(FLUSHING_VOTES_KEY, movie_id)
+        pipe.zincrby(RANKING_KEY, 1, movie_id)
+        pipe.publish(settings.LEADERBOARD_CHANNEL, movie_id)
+        pending, flushing, _, _ = pipe.execute()
+        return pending + int(flushing or 0)
+    if not FanVote.objects.filter(movie_id=movie_id).update(vote_count=F('vote_count') + 1):
+        FanVote.objects.create(movie_id=movie_id, vote_count=1)
+    return 0
+
+def get_pending_votes():
+    """Return {movie_id: delta} for votes not yet flushed, including a flush in progress."""
+    redis = get_redis()
+    if redis is None:
+        return {}
+    pending = {}
+    pipe = redis.pipeline(transaction=False)
+    pipe.hgetall(PENDING_VOTES_KEY)
+    pipe.hgetall(FLUSHING_VOTES_KEY)
+    for counts in pipe.execute():
+        for movie_id, delta in counts.items():
+            pending[int(movie_id)] = pending.get(int(movie_id), 0) + int(delta)
+    return pending
+
+def merge_pending_votes(votes, pending):
+    """Add pending deltas to serialized FanVote rows in place."""
+    for vote in votes:
+        vote['vote_count'] += pending.get(vote['movie']['id'], 0)
+    return votes
+
+def apply_vote_deltas(deltas):
+    """Apply {movie_id: delta} to FanVote in one UPDATE plus one bulk INSERT for new rows."""
+    deltas = {movie_id: delta for movie_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        existing = set(FanVote.objects.filter(movie_id__in=deltas).values_list('movie_id', flat=True))
+        if existing:
+            increment = Case(
+                *[When(movie_id=movie_id, then=Value(deltas[movie_id])) for movie_id in existing],
+                default=Value(0)
+            )
+            FanVote.objects.filter(movie_id__in=existing).update(vote_count=F('vote_count') + increment)
+        live_movies = set(Movie.objects.filter(id__in=set(deltas) - existing).values_list('id', flat=True))
+        FanVote.objects.bulk_create(
+            FanVote(movie_id=movie_id, vote_count=deltas[movie_id]) for movie_id in live_movies
+        )
+        dropped = set(deltas) - existing - live_movies
+        if dropped:
+            logger.warning(f"Dropped votes for deleted movies: {sorted(dropped)}")
+
+def flush_pending_votes():
+    """Move the pending vote counts to Postgres in one batch and return how many votes were applied.
+
+    The pending hash is atomically renamed before it is read, so votes that
+    arrive during the flush land in a fresh hash. A flush that dies before
+    deleting the renamed hash leaves it behind and the next flush applies it
+    first, so delivery is at-least-once. Only one flusher runs at a time,
+    and the lock carries an owner token: a flusher whose lock expired
+    neither deletes the hash nor releases the lock another flusher now holds.
+    """
+    redis = get_redis()
+    if redis is None:
+        return 0
+    lock = redis.lock(FLUSH_LOCK_KEY, timeout=60)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        if not redis.exists(FLUSHING_VOTES_KEY):
+            try:
+                redis.rename(PENDING_VOTES_KEY, FLUSHING_VOTES_KEY)
+            except ResponseError:
+                return 0  # Nothing pending
+        deltas = {int(movie_id): int(delta) for movie_id, delta in redis.hgetall(FLUSHING_VOTES_KEY).items()}
+        apply_vote_deltas(deltas)
+        lock.reacquire()  # Raises LockNotOwnedError if the lock expired and was taken over
+        redis.delete(FLUSHING_VOTES_KEY)
+        return sum(deltas.values())
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Vote flush lock expired before the flush finished")
+
+def rebuild_vote_ranking():
+    """Rebuild the RANKING_KEY sorted set from FanVote plus pending votes and return how many movies it ranks.
+
+    The new set is written under a temporary key and renamed over the old
+    one, so readers never see it half built. Votes cast while it is being
+    rebuilt may be missed until the next rebuild; run it periodically
+    (manage.py rebuild_vote_ranking, or the vote_ranking_rebuild job) to
+    correct any drift, e.g. after counts were edited in the admin.
+    """
+    redis = get_redis()
+    if redis is None:
+        return 0
+    totals = dict(FanVote.objects.values_list('movie_id', 'vote_count'))
+    for movie_id, delta in get_pending_votes().items():
+        totals[movie_id] = totals.get(movie_id, 0) + delta
+    building = f'{RANKING_KEY}:rebuild'
+    pipe = redis.pipeline()
+    pipe.delete(building)
+    if totals:
+        pipe.zadd(building, totals)
+        pipe.rename(building, RANKING_KEY)
+    else:
+        pipe.delete(RANKING_KEY)
+    pipe.set(RANKING_BUILT_KEY, 1)
+    pipe.publish(settings.LEADERBOARD_CHANNEL, 'rebuild')
+    pipe.execute()
+    return len(totals)
+
+def _ranking_redis():
+    redis = get_redis()
+    if redis is not None and not redis.exists(RANKING_BUILT_KEY):
+        rebuild_vote_ranking()
+    return redis
+
+def _ranked(rows, start):
+    return [
+        {'rank': start + offset + 1, 'movie_id': int(movie_id), 'vote_count': int(votes)}
+        for offset, (movie_id, votes) in enumerate(rows)
+    ]
+
+def ranked_votes(start=0, stop=-1):
+    """Return ranking rows for 0-based positions start..stop (inclusive; -1 for the end), most votes first.
+
+    With Redis this is one O(log n + m) ZREVRANGE on the sorted set; without
+    it, an ordered FanVote query. Tied movies keep a fixed, arbitrary order.
+    """
+    if start < 0:
+        return []
+    redis = _ranking_redis()
+    if redis is not None:
+        return _ranked(redis.zrevrange(RANKING_KEY, start, stop, withscores=True), start)
+    queryset = FanVote.objects.order_by('-vote_count', '-movie_id').values_list('movie_id', 'vote_count')
+    return _ranked(queryset[start:] if stop < 0 else queryset[start:stop + 1], start)
+
+def vote_position(movie_id):
+    """Return a movie's 0-based position in the ranking and its vote count, or None if it has no votes."""
+    redis = _ranking_redis()
+    if redis is not None:
+        pipe = redis.pipeline(transaction=False)
+        pipe.zrevrank(RANKING_KEY, movie_id)
+        pipe.zscore(RANKING_KEY, movie_id)
+        position, votes = pipe.execute()
+        return None if position is None else (position, int(votes))
+    vote = FanVote.objects.filter(movie_id=movie_id).values_list('vote_count', flat=True).first()
+    if vote is None:
+        return None
+    ahead = FanVote.objects.filter(
+        Q(vote_count__gt=vote) | Q(vote_count=vote, movie_id__gt=movie_id)
+    ).count()
+    return ahead, vote
+
+def with_titles(rows):
+    """Add each ranking row's movie title, in one query."""
+    titles = dict(Movie.objects.filter(id__in=[row['movie_id'] for row in rows]).values_list('id', 'title'))
+    return [{**row, 'title': titles[row['movie_id']]} for row in rows if row['movie_id'] in titles]
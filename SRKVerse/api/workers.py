@@ -0,0 +1,31 @@
+"""Process pools for CPU-bound work such as hashing and decoding audio.
+
+Workers are spawned rather than forked: the job runner is multithreaded, and
+a forked child would inherit whatever locks (logging, Redis pools) and
+database connections other threads held at that moment. A spawned worker
+starts clean, so the parent's connections are left alone. This module is
+imported by each worker before Django is set up, so it must not import models.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+import multiprocessing
+import os
+
+def _setup_worker(overrides):
+    import django
+    django.setup()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+def process_pool(tasks, workers=None, settings_names=()):
+    """A spawn-context ProcessPoolExecutor of at most `workers` processes for `tasks` items of work.
+
+    Workers load DJANGO_SETTINGS_MODULE afresh; the parent's current values
+    of `settings_names` (e.g. MEDIA_ROOT under override_settings) are copied in.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(min(workers or os.cpu_count() or 1, tasks), 1),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_setup_worker,
+        initargs=({name: getattr(settings, name) for name in settings_names},),
+    )